@@ -0,0 +1,7 @@
+"""Terminal chess: the rules engine is importable without any I/O, run the game with python -m chess"""
+from chess.engine import (
+    EMPTY, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, WHITE, BLACK, TYPE_MASK, COLOUR_MASK, TEAMS, COLOURS, NO_SQUARE,
+    PIECE_VALUES, PROMOTION_PIECES,
+    CheckInfo, Snapshot, Position, MoveCache, BoardView, Game, Piece, Pawn, Rook, Knight, Bishop, Queen, King,
+    square, encode_move, move_to_str, move_from_str, board_to_str, export_game, import_game,
+)
@@ -0,0 +1,164 @@
+"""Command line entry point: the interactive menu and the tool subcommands"""
+from typing import List
+import importlib
+import os
+import sys
+
+# Subcommands and the module providing their main(args), imported on demand to keep startup fast
+COMMANDS = {
+    "perft": "chess.perft",
+    "bench": "chess.bench",
+    "selfplay": "chess.selfplay",
+    "search": "chess.search",
+    "serve": "chess.server",
+    "archive": "chess.archive",
+    "book": "chess.book",
+    "tablebase": "chess.tablebase",
+    "batch": "chess.batch",
+    "journal": "chess.journal",
+    "pgn": "chess.pgn",
+    "ratings": "chess.stats",
+}
+
+COMPUTER_NAME = "Computer" # player name the computer's results are recorded under
+COMPUTER_TIME_LIMIT = 3.0 # seconds the computer may think per move
+COMPUTER_BOOK = "chess.book" # opening book the computer plays from if the file exists, see python -m chess book
+COMPUTER_TABLEBASES = "tablebases" # endgame tables the computer searches with if the directory exists, see python -m chess tablebase
+JOURNAL = "chess.journal" # every move of the ongoing game, see chess.journal
+LEADERBOARD_PAGE = 10 # players shown per page of the leaderboard
+
+def menu() -> int:
+    """Run the interactive menu"""
+    from chess.engine import Game, import_game
+    from chess.journal import Journal, resume
+    from chess.stats import db_setup, db_check_player, db_update_player, db_get_statistics, db_leaderboard, print_leaderboard
+    from chess.archive import archive_game
+    from chess.ui import get_key_press, game_loop
+    from chess.search import ComputerPlayer
+    from chess import profiling
+    import sqlite3
+
+    db = sqlite3.connect("chess.db")
+    db_setup(db)
+
+    os.system("clear")
+    print("#############################################")
+    print("# Welcome to Chess!                         #")
+    print("#############################################")
+    while True:
+        # Ask the user what they want to do
+        print("What do you want to do?")
+        print(" 1. Play a game")
+        print(" 2. Show statistics")
+        print(" 3. Leaderboard")
+        print(" q. Quit")
+        match get_key_press():
+            case "1":
+                game = None
+                computer = {}
+                print("Should the computer play one side? (w)hite, (b)lack or (n)o")
+                match get_key_press():
+                    case "w":
+                        computer["white"] = ComputerPlayer(time_limit=COMPUTER_TIME_LIMIT)
+                    case "b":
+                        computer["black"] = ComputerPlayer(time_limit=COMPUTER_TIME_LIMIT)
+                white = COMPUTER_NAME if "white" in computer else input("Enter the name of the white player: ")
+                black = COMPUTER_NAME if "black" in computer else input("Enter the name of the black player: ")
+                db_check_player(db, white)
+                db_check_player(db, black)
+                # ask if the player wants to continue a game if a journal, or a chess.game saved by older versions, exists
+                if os.path.exists(JOURNAL) or os.path.exists("chess.game"):
+                    print("An ongoing game was found. Do you want to continue it? (y/n)")
+                    if get_key_press() == "y":
+                        if os.path.exists(JOURNAL):
+                            try:
+                                game = resume(JOURNAL)
+                            except ValueError as error: # damaged, or written by an older version
+                                print(f"The ongoing game cannot be continued ({error}), starting a new one.")
+                                game = Game()
+                        else:
+                            with open("chess.game", "r") as file:
+                                game = import_game(file.read())
+                    else:
+                        game = Game()
+                    # the journal started below replaces both files
+                    try:
+                        os.remove("chess.game")
+                    except FileNotFoundError:
+                        pass
+                else:
+                    game = Game()
+                if computer and os.path.exists(COMPUTER_BOOK):
+                    from chess.book import OpeningBook
+                    game.book = OpeningBook(COMPUTER_BOOK)
+                if computer and os.path.isdir(COMPUTER_TABLEBASES):
+                    from chess.tablebase import Tablebases
+                    game.tablebases = Tablebases(COMPUTER_TABLEBASES)
+                journal = Journal(JOURNAL, game)
+                # try catch block to handle ctrl+c interrupts, the journal already holds every move
+                try:
+                    result, message = game_loop(game, computer, journal)
+                    # the game is over, there is nothing left to resume
+                    journal.close()
+                    os.remove(JOURNAL)
+                    print(message)
+                    if profiling.profiler is not None:
+                        profiling.profiler.dump() # the statistics so far, the file is rewritten at exit
+                    db_update_player(db, white, black, result)
+                    archive_game(db, game, white, black)
+                except KeyboardInterrupt:
+                    journal.close()
+                    print("Game saved successfully.")
+            case "2":
+                name = input("Enter the name of the player you want to see the statistics for: ")
+                db_get_statistics(db, name)
+                pass
+            case "3":
+                rank = 1
+                rows = db_leaderboard(db, LEADERBOARD_PAGE)
+                while True:
+                    if not rows:
+                        print("No more players.")
+                        break
+                    print_leaderboard(rows, rank)
+                    print("(n)ext page or any other key to return")
+                    if get_key_press() != "n":
+                        break
+                    rank += len(rows)
+                    rows = db_leaderboard(db, LEADERBOARD_PAGE, (rows[-1][2], rows[-1][0]))
+            case "q":
+                break
+    db.close()
+    print("Thank you for playing!")
+    return 0
+
+def run(args: List[str]) -> int:
+    """Run the subcommand named by the first argument, or the interactive menu if there is none"""
+    if not args:
+        return menu()
+    if args[0] not in COMMANDS:
+        print(f"Unknown command {args[0]!r}, available commands: {', '.join(COMMANDS)}", file=sys.stderr)
+        return 2
+    return importlib.import_module(COMMANDS[args[0]]).main(args[1:])
+
+def main(argv: List[str] = None) -> int:
+    """Dispatch to a subcommand, or run the interactive menu if none is given
+
+    A leading --profile[=FILE] option, or the CHESS_PROFILE environment variable, profiles the run, see chess.profiling.
+    """
+    args = sys.argv[1:] if argv is None else argv
+    from chess import profiling
+    if args and (args[0] == "--profile" or args[0].startswith("--profile=")):
+        profiling.enable(args[0].partition("=")[2] or None)
+        args = args[1:]
+    else:
+        profiling.enable_from_environment()
+    if profiling.profiler is None:
+        return run(args)
+    try:
+        return run(args)
+    finally:
+        profiling.disable().dump()
+
+if __name__ == "__main__":
+    sys.exit(main())
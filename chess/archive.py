@@ -0,0 +1,90 @@
+"""Game archive: every finished game with all positions it reached, searchable by position key
+
+The tables are created by the schema migrations in chess.stats. The moves table has one row per position of
+a game: the ply, the position key, the packed position and the move played from it, which is NULL for the
+final position. Position keys are stored as signed 64-bit integers, as SQLite has no unsigned type.
+"""
+from typing import Iterable, List, Tuple
+import argparse
+import sqlite3
+
+from chess.engine import Game, Position, move_to_str, move_from_str
+
+def to_signed(key: int) -> int:
+    """Return the 64-bit key as the signed integer SQLite stores"""
+    return key - (1 << 64) if key >= 1 << 63 else key
+
+def to_unsigned(key: int) -> int:
+    """Return the key read from SQLite as the unsigned 64-bit position key"""
+    return key + (1 << 64) if key < 0 else key
+
+def _move_rows(game: Game) -> List[Tuple[int, int | None, int, bytes]]:
+    """Return (ply, move, signed key, packed position) for every position of the game, replaying it from its start"""
+    replay = Game.from_fen(game.start_fen)
+    replay.move_cache = None
+    rows = []
+    for ply, move in enumerate(game.move_history() + [None]):
+        position = replay.position
+        rows.append((ply, move, to_signed(position.key), position.pack()))
+        if move is not None:
+            replay.make_move(move)
+    return rows
+
+def archive_games(db: sqlite3.Connection, games: Iterable[Tuple[Game, str, str]]) -> List[int]:
+    """Store finished (game, white, black) games with all their positions in one transaction and return their ids"""
+    ids = []
+    with db:
+        for game, white, black in games:
+            cursor = db.execute("INSERT INTO games (white, black, result, winner, termination, start_fen, plies) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                (white, black, game.result, game.winner, game.termination, game.start_fen, len(game.undo_stack)))
+            ids.append(cursor.lastrowid)
+            db.executemany("INSERT INTO moves (game_id, ply, move, position_key, position) VALUES (?, ?, ?, ?, ?)",
+                           ((cursor.lastrowid,) + row for row in _move_rows(game)))
+    return ids
+
+def archive_game(db: sqlite3.Connection, game: Game, white: str, black: str) -> int:
+    """Store a finished game with all its positions and return its id"""
+    return archive_games(db, [(game, white, black)])[0]
+
+def games_with_position(db: sqlite3.Connection, key: int, limit: int = 100) -> List[Tuple[int, str, str, str, str]]:
+    """Return (id, white, black, result, winner) of the games that reached the position with the key"""
+    return db.execute("""SELECT DISTINCT games.id, white, black, result, winner FROM moves JOIN games ON games.id = moves.game_id
+                         WHERE position_key = ? ORDER BY games.id LIMIT ?""", (to_signed(key), limit)).fetchall()
+
+def move_statistics(db: sqlite3.Connection, key: int) -> List[Tuple[int, int, int, int, int]]:
+    """Return (move, games, white wins, black wins, other results) of the moves played from the position, most played first"""
+    return db.execute("""SELECT move, COUNT(*), SUM(winner IS 'white'), SUM(winner IS 'black'), SUM(winner IS NULL)
+                         FROM moves JOIN games ON games.id = moves.game_id
+                         WHERE position_key = ? AND move IS NOT NULL GROUP BY move ORDER BY COUNT(*) DESC""", (to_signed(key),)).fetchall()
+
+def position_at(db: sqlite3.Connection, game_id: int, ply: int) -> Position | None:
+    """Return the position of an archived game before the move of the ply, or None if the game is shorter"""
+    row = db.execute("SELECT position FROM moves WHERE game_id = ? AND ply = ?", (game_id, ply)).fetchone()
+    return Position.unpack(row[0]) if row is not None else None
+
+def replay_record(record: dict) -> Game:
+    """Return the game of a self-play record, with its moves made and its result set"""
+    game = Game()
+    game.move_cache = None
+    for text in record["moves"].split():
+        game.make_move(move_from_str(text))
+    game.game_over = True
+    game.result, game.winner, game.termination = record["result"], record["winner"], record["termination"]
+    return game
+
+def main(args: List[str]) -> int:
+    """Show what the archive knows about a position"""
+    from chess.stats import db_setup
+    parser = argparse.ArgumentParser(prog="python -m chess archive", description="Look up a position in the game archive.")
+    parser.add_argument("--db", default="chess.db", help="statistics database holding the archive (default: chess.db)")
+    parser.add_argument("--fen", default=Game().to_fen(), help="position to look up (default: the start position)")
+    options = parser.parse_args(args)
+    db = sqlite3.connect(options.db)
+    db_setup(db)
+    key = Game.from_fen(options.fen).position.key
+    games = db.execute("SELECT COUNT(DISTINCT game_id) FROM moves WHERE position_key = ?", (to_signed(key),)).fetchone()[0]
+    print(f"{games} games reached the position")
+    for move, count, white_wins, black_wins, others in move_statistics(db, key):
+        print(f"{move_to_str(move):6} {count:7} games  white won {white_wins * 100 / count:5.1f}%  black won {black_wins * 100 / count:5.1f}%  other {others * 100 / count:5.1f}%")
+    db.close()
+    return 0
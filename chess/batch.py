@@ -0,0 +1,180 @@
+"""Batch analysis of many positions at once: attacks, checks, mobility and move counts with NumPy bitboards
+
+Boards are an (N, 64) int8 array of piece codes laid out like Position.squares. Each piece type and colour
+becomes a column of 64-bit bitboards, and all N positions are processed together by shifting and masking
+whole columns. A board has no castling rights or en passant square, so move counts leave those moves out.
+
+Needs NumPy 2.0 or later, which added np.bitwise_count.
+"""
+from typing import Iterable, List, NamedTuple
+import argparse
+import random
+import time
+
+import numpy as np
+
+from chess.engine import (Game, Position, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, WHITE, BLACK, TYPE_MASK, COLOUR_MASK,
+                          NO_SQUARE, TEAMS)
+
+FILE_A = 0x0101010101010101
+FILE_B = FILE_A << 1
+FILE_G = FILE_A << 6
+FILE_H = FILE_A << 7
+RANK_3 = 0xFF << 16
+RANK_6 = 0xFF << 40
+ALL_SQUARES = (1 << 64) - 1
+NOT_A, NOT_H = ALL_SQUARES ^ FILE_A, ALL_SQUARES ^ FILE_H
+NOT_AB, NOT_GH = NOT_A & ~FILE_B, NOT_H & ~FILE_G
+
+# (shift, squares a step in that direction can land on) for every direction, a negative shift goes down the board
+ROOK_DIRECTIONS = ((8, ALL_SQUARES), (-8, ALL_SQUARES), (1, NOT_A), (-1, NOT_H))
+BISHOP_DIRECTIONS = ((9, NOT_A), (7, NOT_H), (-7, NOT_A), (-9, NOT_H))
+KING_STEPS = ROOK_DIRECTIONS + BISHOP_DIRECTIONS
+KNIGHT_STEPS = ((17, NOT_A), (15, NOT_H), (10, NOT_AB), (6, NOT_GH), (-6, NOT_AB), (-10, NOT_GH), (-15, NOT_A), (-17, NOT_H))
+PAWN_CAPTURES = {WHITE: ((9, NOT_A), (7, NOT_H)), BLACK: ((-7, NOT_A), (-9, NOT_H))}
+
+class BatchResult(NamedTuple):
+    """Per position and colour (column 0 white, 1 black) results of analyse"""
+    attacks: np.ndarray # uint64 bitboards of the squares the colour attacks
+    in_check: np.ndarray # bool, the king of the colour is attacked
+    mobility: np.ndarray # pseudo-legal target squares of the knights, bishops, rooks and queens
+    moves: np.ndarray # pseudo-legal moves of all pieces, without castling and en passant, a promotion counts once
+
+def _shift(bitboards: np.ndarray, amount: int) -> np.ndarray:
+    """Shift bitboards towards higher squares by amount, or towards lower squares if it is negative"""
+    return bitboards << np.uint64(amount) if amount > 0 else bitboards >> np.uint64(-amount)
+
+def _slide(sliders: np.ndarray, empty: np.ndarray, amount: int, mask: int) -> np.ndarray:
+    """Return the squares sliders reach in one direction, up to and including the first occupied square"""
+    # Kogge-Stone fill: each step doubles the distance the sliders have travelled through empty squares
+    empty = empty & np.uint64(mask)
+    for step in (amount, amount * 2, amount * 4):
+        sliders = sliders | (empty & _shift(sliders, step))
+        empty = empty & _shift(empty, step)
+    return _shift(sliders, amount) & np.uint64(mask)
+
+def _count(bitboards: np.ndarray) -> np.ndarray:
+    """Return the number of squares in each bitboard"""
+    return np.bitwise_count(bitboards).astype(np.int32)
+
+def boards_from_positions(positions: Iterable[Position]) -> np.ndarray:
+    """Return the (N, 64) int8 board array of positions"""
+    data = b"".join(bytes(position.squares) for position in positions)
+    return np.frombuffer(data, dtype=np.int8).reshape(-1, 64)
+
+def piece_bitboards(boards: np.ndarray) -> np.ndarray:
+    """Return a (15, N) uint64 array with the bitboard of every piece code in every board"""
+    boards = np.asarray(boards, dtype=np.int8)
+    bitboards = np.zeros((15, len(boards)), dtype=np.uint64)
+    for code in range(1, 15):
+        if 0 < code & TYPE_MASK <= KING:
+            bitboards[code] = np.packbits(boards == code, axis=1, bitorder="little").view("<u8")[:, 0]
+    return bitboards
+
+def analyse(boards: np.ndarray) -> BatchResult:
+    """Return the attacks, check flags, mobility and pseudo-legal move counts of both colours for all boards"""
+    pieces = piece_bitboards(boards)
+    occupied = np.bitwise_or.reduce(pieces, axis=0)
+    empty = ~occupied
+    size = len(occupied)
+    attacks = np.zeros((size, 2), dtype=np.uint64)
+    mobility = np.zeros((size, 2), dtype=np.int32)
+    moves = np.zeros((size, 2), dtype=np.int32)
+    for column, colour in enumerate((WHITE, BLACK)):
+        own = np.bitwise_or.reduce(pieces[colour + PAWN:colour + KING + 1], axis=0)
+        enemy = occupied & ~own
+        reachable = ~own
+        attacked = np.zeros(size, dtype=np.uint64)
+        # per direction the pieces land on distinct squares, so counting each direction separately counts every move
+        pawns = pieces[colour | PAWN]
+        for amount, mask in PAWN_CAPTURES[colour]:
+            targets = _shift(pawns, amount) & np.uint64(mask)
+            attacked |= targets
+            moves[:, column] += _count(targets & enemy)
+        forward = 8 if colour == WHITE else -8
+        single = _shift(pawns, forward) & empty
+        double = _shift(single & np.uint64(RANK_3 if colour == WHITE else RANK_6), forward) & empty
+        moves[:, column] += _count(single) + _count(double)
+        for code, steps in ((KNIGHT, KNIGHT_STEPS), (KING, KING_STEPS)):
+            for amount, mask in steps:
+                targets = _shift(pieces[colour | code], amount) & np.uint64(mask)
+                attacked |= targets
+                count = _count(targets & reachable)
+                moves[:, column] += count
+                if code == KNIGHT:
+                    mobility[:, column] += count
+        queens = pieces[colour | QUEEN]
+        for sliders, directions in ((pieces[colour | ROOK] | queens, ROOK_DIRECTIONS), (pieces[colour | BISHOP] | queens, BISHOP_DIRECTIONS)):
+            for amount, mask in directions:
+                targets = _slide(sliders, empty, amount, mask)
+                attacked |= targets
+                count = _count(targets & reachable)
+                moves[:, column] += count
+                mobility[:, column] += count
+        attacks[:, column] = attacked
+    in_check = np.stack([(attacks[:, 1] & pieces[WHITE | KING]) != 0, (attacks[:, 0] & pieces[BLACK | KING]) != 0], axis=1)
+    return BatchResult(attacks, in_check, mobility, moves)
+
+def cross_check(positions: List[Position], result: BatchResult) -> List[str]:
+    """Compare the batch results with the per-piece generators of Position and return a description of every difference"""
+    errors = []
+    for number, position in enumerate(positions):
+        # the boards carry no castling rights or en passant square, the generators must not see them either
+        position = Position(position.squares, position.side, 0, NO_SQUARE)
+        squares = position.squares
+        for column, colour in enumerate((WHITE, BLACK)):
+            attacked = sum(1 << sq for sq in range(64) if position.is_square_attacked(sq, colour))
+            in_check = position.is_square_attacked(position.king_square(colour), colour ^ BLACK)
+            moves = mobility = 0
+            for sq, code in enumerate(squares):
+                if code and code & COLOUR_MASK == colour:
+                    count = len(position.targets(sq))
+                    moves += count
+                    if code & TYPE_MASK in (KNIGHT, BISHOP, ROOK, QUEEN):
+                        mobility += count
+            expected = (attacked, in_check, mobility, moves)
+            found = (int(result.attacks[number, column]), bool(result.in_check[number, column]), int(result.mobility[number, column]), int(result.moves[number, column]))
+            for name, want, got in zip(BatchResult._fields, expected, found):
+                if want != got:
+                    errors.append(f"{position.to_fen()}: {TEAMS[colour]} {name} is {got}, the per-piece generators give {want}")
+    return errors
+
+def random_positions(count: int, seed: int = 0) -> List[Position]:
+    """Return positions from random games, starting a new game whenever one ends"""
+    rng = random.Random(seed)
+    positions = []
+    game = None
+    while len(positions) < count:
+        if game is None or game.check_game_over() is not None:
+            game = Game()
+            game.move_cache = None
+        game.make_move(rng.choice(game.legal_moves()))
+        positions.append(game.position.copy())
+    return positions
+
+def main(args: List[str]) -> int:
+    """Analyse positions from a FEN file or from random games, optionally checking the results"""
+    parser = argparse.ArgumentParser(prog="python -m chess batch", description="Analyse many positions at once.")
+    parser.add_argument("--fens", default=None, help="file with one FEN string per line (default: positions from random games)")
+    parser.add_argument("--positions", type=int, default=100000, help="number of random positions (default: 100000)")
+    parser.add_argument("--check", action="store_true", help="compare the results with the per-piece move generators")
+    options = parser.parse_args(args)
+    if options.fens is not None:
+        with open(options.fens) as file:
+            positions = [Position.from_fen(line) for line in file if line.strip()]
+    else:
+        positions = random_positions(options.positions)
+    start = time.perf_counter()
+    result = analyse(boards_from_positions(positions))
+    seconds = time.perf_counter() - start
+    print(f"{len(positions)} positions in {seconds:.2f}s ({len(positions) / seconds:.0f} positions/s)")
+    for column, colour in enumerate((WHITE, BLACK)):
+        print(f"{TEAMS[colour]}: {result.in_check[:, column].sum()} in check, mean mobility {result.mobility[:, column].mean():.1f}, "
+              f"mean pseudo-legal moves {result.moves[:, column].mean():.1f}")
+    if options.check:
+        errors = cross_check(positions, result)
+        for error in errors[:20]:
+            print(error)
+        print(f"{len(errors)} differences from the per-piece generators")
+        return 1 if errors else 0
+    return 0
@@ -0,0 +1,561 @@
+"""Benchmarks, run with python -m chess bench <name>"""
+from typing import List
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def bench_import(options: argparse.Namespace):
+    """Measure how long a fresh interpreter needs to import the chess package"""
+    timings = []
+    for _ in range(options.runs):
+        process = subprocess.run([sys.executable, "-X", "importtime", "-c", "import chess"], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True)
+        # importtime lines look like "import time: self [us] | cumulative | imported package"
+        for line in process.stderr.splitlines():
+            fields = [field.strip() for field in line.split("|")]
+            if len(fields) == 3 and fields[2] == "chess":
+                timings.append(int(fields[1]) / 1000)
+    print(f"import chess: median {statistics.median(timings):.2f} ms, min {min(timings):.2f} ms over {len(timings)} runs")
+
+def bench_parallel(options: argparse.Namespace):
+    """Measure time to depth and nodes per second of the parallel search for 1 up to --workers processes"""
+    import time
+    from chess.engine import Game, Position
+    from chess.parallel import ParallelSearcher
+    from chess.perft import PERFT_SUITE
+    depth = options.depth or 5
+    positions = [fen for _, fen, _ in PERFT_SUITE[:4]]
+    baseline = None
+    for workers in range(1, (options.workers or os.cpu_count() or 1) + 1):
+        with ParallelSearcher(workers) as searcher:
+            seconds, nodes = 0.0, 0
+            for fen in positions:
+                game = Game()
+                game.set_position(Position.from_fen(fen))
+                searcher.table.clear()
+                start = time.perf_counter()
+                nodes += searcher.search(game, depth).nodes
+                seconds += time.perf_counter() - start
+        baseline = baseline or seconds
+        print(f"parallel search depth {depth}, {workers} workers: {seconds:.2f} s to depth ({baseline / seconds:.2f}x), {nodes / seconds:.0f} nodes/s over {len(positions)} positions")
+
+def bench_move_cache(options: argparse.Namespace):
+    """Measure the legal move lookups of human turns as game_loop makes them, with and without the move cache"""
+    import random
+    import time
+    from chess.engine import Game
+    rng = random.Random(1)
+    games = []
+    for _ in range(20): # record random games to replay the turns of
+        game = Game()
+        moves = []
+        while game.check_game_over() is None and len(moves) < 200:
+            moves.append(rng.choice(game.legal_moves()))
+            game.make_move(moves[-1])
+        games.append(moves)
+    for cached in (False, True):
+        timings = []
+        for _ in range(options.runs):
+            turns = 0
+            start = time.perf_counter()
+            for moves in games:
+                game = Game()
+                if not cached:
+                    game.move_cache = None
+                for move in moves:
+                    # the source check, the highlighting, a target check, the move and the game over check of one turn
+                    piece = game.get_piece_at(move & 7, move >> 3 & 7)
+                    for _ in range(3):
+                        piece.get_valid_moves()
+                    game.make_move(move)
+                    game.check_game_over()
+                    turns += 1
+            timings.append((time.perf_counter() - start) / turns)
+        stats = f", {game.move_cache.hits} hits, {game.move_cache.misses} misses in the last game" if cached else ""
+        print(f"move cache {'on' if cached else 'off'}: median {statistics.median(timings) * 1e6:.0f} us per turn{stats}")
+
+def bench_server(options: argparse.Namespace):
+    """Measure moves per second and move latency of a game server process under simultaneous load test clients"""
+    import asyncio
+    import tempfile
+    import time
+    from chess.server import load_test
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "chess.sock")
+        server = subprocess.Popen([sys.executable, "-m", "chess", "serve", "--unix", path], cwd=PROJECT_ROOT, stderr=subprocess.DEVNULL)
+        try:
+            while not os.path.exists(path):
+                time.sleep(0.01)
+            for clients in options.clients or (1, 10, 100, 1000):
+                stats = asyncio.run(load_test(clients, 20, path=path))
+                print(f"server with {clients} clients: {stats['moves_per_second']:.0f} moves/s, "
+                      f"move latency p50 {stats['p50_ms']:.2f} ms, p99 {stats['p99_ms']:.2f} ms")
+        finally:
+            server.terminate()
+            server.wait()
+
+def bench_render(options: argparse.Namespace):
+    """Measure the time and output size of full and differential board frames along a random game"""
+    import random
+    import time
+    from chess.engine import Game
+    from chess.ui import Renderer
+    rng = random.Random(1)
+    game = Game()
+    moves = []
+    while game.check_game_over() is None and len(moves) < 100:
+        moves.append(rng.choice(game.legal_moves()))
+        game.make_move(moves[-1])
+    for differential in (False, True):
+        timings, sizes = [], []
+        for _ in range(options.runs):
+            game = Game()
+            renderer = Renderer()
+            for move in moves:
+                if not differential:
+                    renderer.invalidate()
+                start = time.perf_counter()
+                frame = renderer.frame(game)
+                timings.append(time.perf_counter() - start)
+                sizes.append(len(frame.encode()))
+                game.make_move(move)
+        print(f"render {'differential' if differential else 'full'} frames: median {statistics.median(timings) * 1e6:.0f} us, "
+              f"{statistics.mean(sizes):.0f} bytes per frame")
+
+def bench_fen(options: argparse.Namespace):
+    """Measure FEN and saved game parsing and serializing throughput, against the legacy save format"""
+    import random
+    import time
+    from chess.engine import Game, Position, board_to_str, export_game, import_game
+    rng = random.Random(1)
+    fens, games = [], []
+    for _ in range(50):
+        game = Game()
+        while game.check_game_over() is None and len(game.undo_stack) < 120:
+            game.make_move(rng.choice(game.legal_moves()))
+            fens.append(game.to_fen())
+        games.append(game)
+    positions = [Position.from_fen(fen) for fen in fens]
+    saves = [export_game(game) for game in games]
+    legacy_saves = [f"True;True;True;True;{game.current_player};{game.moves_since_last_significant};{board_to_str(game.board)}" for game in games]
+    def rate(function, items) -> float:
+        timings = []
+        for _ in range(options.runs):
+            start = time.perf_counter()
+            for item in items:
+                function(item)
+            timings.append(time.perf_counter() - start)
+        return len(items) / statistics.median(timings)
+    print(f"FEN parse: {rate(Position.from_fen, fens):.0f} positions/s, serialize: {rate(Position.to_fen, positions):.0f} positions/s")
+    print(f"saved games: export {rate(export_game, games):.0f} games/s, import with move replay {rate(import_game, saves):.0f} games/s "
+          f"({statistics.mean(len(game.undo_stack) for game in games):.0f} moves per game)")
+    print(f"legacy saves without history: import {rate(import_game, legacy_saves):.0f} games/s")
+
+def bench_stats(options: argparse.Namespace):
+    """Measure recording game results one transaction per game and in bulk, and player lookups, on a large database"""
+    import random
+    import sqlite3
+    import tempfile
+    import time
+    from chess.stats import db_setup, db_update_player, record_results
+    rng = random.Random(1)
+    names = [f"player{index}" for index in range(100000)]
+    outcomes = (("checkmate", "white"), ("checkmate", "black"), ("remis", None))
+    with tempfile.TemporaryDirectory() as directory:
+        db = sqlite3.connect(os.path.join(directory, "chess.db"))
+        db_setup(db)
+        start = time.perf_counter()
+        count = record_results(db, ((rng.choice(names), rng.choice(names), rng.choice(outcomes)) for _ in range(200000)))
+        seconds = time.perf_counter() - start
+        print(f"stats bulk record_results: {count / seconds:.0f} results/s into {len(names)} players")
+        start = time.perf_counter()
+        for _ in range(1000):
+            db_update_player(db, rng.choice(names), rng.choice(names), rng.choice(outcomes))
+        print(f"stats db_update_player: {1000 / (time.perf_counter() - start):.0f} results/s, one transaction each")
+        start = time.perf_counter()
+        for _ in range(10000):
+            db.execute("SELECT wins, loses, games FROM player WHERE name = ?", (rng.choice(names),)).fetchone()
+        print(f"stats player lookup: {10000 / (time.perf_counter() - start):.0f} lookups/s")
+        db.close()
+
+def bench_archive(options: argparse.Namespace):
+    """Measure archiving random games and looking up positions in the archive"""
+    import random
+    import sqlite3
+    import tempfile
+    import time
+    from chess.archive import archive_games, games_with_position, move_statistics
+    from chess.engine import Game
+    from chess.stats import db_setup
+    rng = random.Random(1)
+    games = []
+    for _ in range(options.games or 500):
+        game = Game()
+        game.move_cache = None
+        while game.check_game_over() is None:
+            game.make_move(rng.choice(game.legal_moves()))
+        games.append((game, "white", "black"))
+    plies = sum(len(game.undo_stack) + 1 for game, _, _ in games)
+    with tempfile.TemporaryDirectory() as directory:
+        db = sqlite3.connect(os.path.join(directory, "chess.db"))
+        db_setup(db)
+        start = time.perf_counter()
+        archive_games(db, games)
+        seconds = time.perf_counter() - start
+        print(f"archive {len(games)} games: {plies / seconds:.0f} positions/s stored, {plies} positions in total")
+        # look up positions deep into the games, which only a few games share, and the start position, which all share
+        samples = [game.undo_stack[min(len(game.undo_stack) - 1, 30)][6] for game, _, _ in rng.sample(games, 100)]
+        for name, keys in (("positions at ply 30", samples), ("start position", [games[0][0].undo_stack[0][6]])):
+            timings = []
+            for key in keys:
+                start = time.perf_counter()
+                games_with_position(db, key)
+                move_statistics(db, key)
+                timings.append(time.perf_counter() - start)
+            print(f"archive lookup of {name}: median {statistics.median(timings) * 1000:.2f} ms for games and move statistics")
+        db.close()
+
+def bench_book(options: argparse.Namespace):
+    """Measure opening and probing a large opening book file"""
+    import random
+    import tempfile
+    import time
+    from chess.book import OpeningBook, RECORD
+    rng = random.Random(1)
+    count = 2000000
+    keys = sorted(rng.getrandbits(64) for _ in range(count))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.book")
+        with open(path, "wb") as file:
+            file.write(b"".join(RECORD.pack(key, rng.getrandbits(12), 1) for key in keys))
+        start = time.perf_counter()
+        book = OpeningBook(path)
+        opened = time.perf_counter() - start
+        probes = [rng.choice(keys) for _ in range(50000)] + [rng.getrandbits(64) for _ in range(50000)]
+        start = time.perf_counter()
+        found = sum(1 for key in probes if book.entries(key))
+        seconds = time.perf_counter() - start
+        book.close()
+        print(f"book of {count} records: opened in {opened * 1e6:.0f} us, {len(probes) / seconds:.0f} probes/s ({found} hits)")
+
+def bench_tablebase(options: argparse.Namespace):
+    """Measure generating the endgame tables, probing them and searching an ending with and without them"""
+    import random
+    import tempfile
+    import time
+    import tracemalloc
+    from chess.engine import Game, Position, KING, BLACK, BISHOP, KNIGHT
+    from chess.search import Searcher
+    from chess.tablebase import ENDINGS, Tablebases, generate
+    with tempfile.TemporaryDirectory() as directory:
+        tracemalloc.start()
+        def report(name: str, table: bytes, seconds: float):
+            print(f"tablebase {name}: {len(table)} positions generated in {seconds:.1f}s, peak memory {tracemalloc.get_traced_memory()[1] / 1e6:.0f} MB")
+            tracemalloc.reset_peak()
+        generate(list(ENDINGS), directory, report)
+        tracemalloc.stop()
+        rng = random.Random(1)
+        tablebases = Tablebases(directory)
+        positions = []
+        for _ in range(10000): # KBNK positions, not all of them legal, which the probe does not check
+            position = Position.from_fen("4k3/8/8/8/8/8/8/4K3 w - -")
+            position.squares[:] = bytes(64)
+            for code, sq in zip((KING, KING | BLACK, BISHOP, KNIGHT), rng.sample(range(64), 4)):
+                position.squares[sq] = code
+            positions.append(position)
+        start = time.perf_counter()
+        for position in positions:
+            tablebases.probe(position)
+        print(f"tablebase probes: {len(positions) / (time.perf_counter() - start):.0f} probes/s")
+        for name, tables in (("without tables", None), ("with tables", tablebases)):
+            game = Game.from_fen("8/8/8/4k3/8/8/8/R3K3 w - - 0 1") # KRK, mate in 14 moves
+            game.tablebases = tables
+            result = Searcher().search(game, time_limit=10.0)
+            print(f"tablebase KRK search {name}: {result.seconds:.2f}s, {result.nodes} nodes, depth {result.depth}, score {result.score}")
+        tablebases.close()
+
+def bench_batch(options: argparse.Namespace):
+    """Measure the batch analysis of many positions against the per-piece generators"""
+    import time
+    from chess.batch import analyse, boards_from_positions, cross_check, random_positions
+    positions = random_positions(100000)
+    timings = []
+    for _ in range(options.runs):
+        start = time.perf_counter()
+        boards = boards_from_positions(positions)
+        result = analyse(boards)
+        timings.append(time.perf_counter() - start)
+    batch = len(positions) / statistics.median(timings)
+    # the per-piece generators are far slower, a sample of the positions is enough
+    sample = positions[:2000]
+    start = time.perf_counter()
+    errors = cross_check(sample, result)
+    per_piece = len(sample) / (time.perf_counter() - start)
+    print(f"batch analysis of {len(positions)} positions: {batch:.0f} positions/s, per-piece generators {per_piece:.0f} positions/s "
+          f"({batch / per_piece:.0f}x), {len(errors)} differences")
+
+def bench_profiling(options: argparse.Namespace):
+    """Measure a fixed-node search with profiling off, with the counting wrappers and with cProfile"""
+    import tempfile
+    import time
+    from chess import profiling
+    from chess.engine import Game
+    from chess.search import Searcher
+    def search() -> float:
+        start = time.perf_counter()
+        Searcher().search(Game(), node_limit=20000)
+        return time.perf_counter() - start
+    with tempfile.TemporaryDirectory() as directory:
+        for name, enabled, output in (("off", False, None), ("counters", True, None), ("cProfile", True, os.path.join(directory, "bench.prof"))):
+            timings = []
+            for _ in range(options.runs):
+                if enabled:
+                    profiling.enable(output)
+                timings.append(search())
+                profiling.disable()
+            print(f"profiling {name}: fixed-node search in {statistics.median(timings) * 1000:.0f} ms")
+
+def bench_journal(options: argparse.Namespace):
+    """Measure the cost of journaling each move and of resuming a game from its journal"""
+    import random
+    import tempfile
+    import time
+    from chess.engine import Game
+    from chess.journal import Journal, resume
+    rng = random.Random(1)
+    game = Game()
+    game.move_cache = None
+    while len(game.undo_stack) < 300 and game.check_game_over() is None:
+        game.make_move(rng.choice(game.legal_moves()))
+    moves = game.move_history()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "chess.journal")
+        for name, sync_records in (("fsync batched over 16 moves", 16), ("fsync every move", 1)):
+            timings = []
+            for _ in range(options.runs):
+                game = Game()
+                game.move_cache = None
+                journal = Journal(path, game, sync_records=sync_records)
+                for move in moves:
+                    game.make_move(move)
+                    start = time.perf_counter()
+                    journal.record(game)
+                    timings.append(time.perf_counter() - start)
+                journal.close()
+            print(f"journal record, {name}: median {statistics.median(timings) * 1e6:.0f} us, mean {statistics.mean(timings) * 1e6:.0f} us per move")
+        # a checkpoint of the first 200 moves followed by the rest as single records
+        game = Game()
+        game.move_cache = None
+        for move in moves[:200]:
+            game.make_move(move)
+        with Journal(path, game) as journal:
+            for move in moves[200:]:
+                game.make_move(move)
+                journal.record(game)
+        timings = []
+        for _ in range(options.runs):
+            start = time.perf_counter()
+            resume(path)
+            timings.append(time.perf_counter() - start)
+        print(f"journal resume of {len(moves)} moves, {len(moves) - 200} after the checkpoint: {statistics.median(timings) * 1000:.2f} ms, "
+              f"{os.path.getsize(path)} bytes")
+
+def bench_snapshot(options: argparse.Namespace):
+    """Measure cloning a game and pickling positions with snapshots against deepcopy and the save format"""
+    import copy
+    import pickle
+    import random
+    import time
+    from chess.engine import Game, export_game, import_game
+    rng = random.Random(1)
+    game = Game()
+    while len(game.undo_stack) < 40: # a middlegame position with some history
+        game.make_move(rng.choice(game.legal_moves()))
+    snapshot = game.snapshot()
+    def per_call(function, count: int = 2000) -> float:
+        timings = []
+        for _ in range(options.runs):
+            start = time.perf_counter()
+            for _ in range(count):
+                function()
+            timings.append((time.perf_counter() - start) / count)
+        return statistics.median(timings) * 1e6
+    print(f"snapshot clone: deepcopy {per_call(lambda: copy.deepcopy(game), 200):.0f} us, export and import {per_call(lambda: import_game(export_game(game)), 200):.0f} us, "
+          f"snapshot {per_call(game.snapshot):.1f} us, from_snapshot {per_call(lambda: Game.from_snapshot(snapshot)):.1f} us")
+    # different positions, as a batch sent to a worker process would hold them
+    games, snapshots = [], []
+    while len(games) < 500:
+        game = Game()
+        while game.check_game_over() is None and len(games) < 500:
+            game.make_move(rng.choice(game.legal_moves()))
+            games.append(copy.deepcopy(game))
+            snapshots.append(game.snapshot())
+    for name, values in (("games", games), ("snapshots", snapshots)):
+        data = pickle.dumps(values)
+        dumps = per_call(lambda: pickle.dumps(values), 1) / len(values)
+        loads = per_call(lambda: pickle.loads(data), 1) / len(values)
+        print(f"snapshot pickle of {len(values)} {name}: {len(data) / len(values):.0f} bytes, dumps {dumps:.1f} us and loads {loads:.1f} us per position")
+
+def bench_precompute(options: argparse.Namespace):
+    """Measure the work left on a human turn with and without the background precomputation, and its own cost"""
+    import random
+    import time
+    from chess.engine import Game, MoveCache, COLOUR_MASK
+    from chess.precompute import Precomputer
+    rng = random.Random(1)
+    games = []
+    while len(games) < 200:
+        game = Game()
+        while game.check_game_over() is None and len(games) < 200:
+            game.make_move(rng.choice(game.legal_moves()))
+            games.append(Game.from_snapshot(game.snapshot()))
+    def turn(game: Game) -> float:
+        """Time the end of game test after a move and highlighting the moves of every own piece"""
+        move = game.legal_moves()[0]
+        start = time.perf_counter()
+        game.make_move(move)
+        if game.check_game_over() is None:
+            squares, side = game.position.squares, game.position.side
+            for sq in range(64):
+                if squares[sq] and squares[sq] & COLOUR_MASK == side:
+                    game.get_piece_at(sq % 8, sq // 8).get_valid_moves()
+        elapsed = time.perf_counter() - start
+        game.unmake_move()
+        return elapsed
+    for precompute in (False, True):
+        timings, fills = [], []
+        for _ in range(options.runs):
+            total = fill = 0.0
+            for game in games:
+                game.move_cache = MoveCache()
+                game.game_over = False
+                if precompute:
+                    precomputer = Precomputer(game.move_cache)
+                    start = time.perf_counter()
+                    precomputer.submit(game)
+                    precomputer.wait()
+                    fill += time.perf_counter() - start
+                    precomputer.stop()
+                total += turn(game)
+            timings.append(total / len(games))
+            fills.append(fill / len(games))
+        print(f"precompute {'on' if precompute else 'off'}: {statistics.median(timings) * 1e6:.0f} us per turn"
+              + (f", filling a position and its replies takes {statistics.median(fills) * 1000:.1f} ms in the background" if precompute else ""))
+
+def bench_pgn(options: argparse.Namespace):
+    """Measure reading a PGN file and replaying its games in this process and across worker processes"""
+    import random
+    import tempfile
+    import time
+    from chess.engine import Game
+    from chess.pgn import game_to_pgn, read_games, replay_games
+    rng = random.Random(1)
+    texts = []
+    for _ in range(100):
+        game = Game()
+        game.move_cache = None
+        while game.check_game_over() is None:
+            game.make_move(rng.choice(game.legal_moves()))
+        texts.append(game_to_pgn(game))
+    count = options.games or 2000
+    workers = options.workers or os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.pgn")
+        with open(path, "w") as file:
+            for index in range(count): # the 100 distinct games over and over
+                file.write(texts[index % len(texts)] + "\n")
+        size = os.path.getsize(path)
+        start = time.perf_counter()
+        with open(path) as file:
+            games = sum(1 for _ in read_games(file))
+        seconds = time.perf_counter() - start
+        print(f"pgn read {games} games ({size / 1e6:.1f} MB): {games / seconds:.0f} games/s, {size / seconds / 1e6:.1f} MB/s")
+        for name, pool, ordered in (("in this process", 0, True), (f"{workers} workers, ordered", workers, True), (f"{workers} workers, unordered", workers, False)):
+            start = time.perf_counter()
+            with open(path) as file:
+                records = list(replay_games(read_games(file), pool, ordered=ordered))
+            seconds = time.perf_counter() - start
+            plies = sum(record["plies"] for record in records)
+            errors = sum(1 for record in records if record["error"] is not None)
+            print(f"pgn replay {name}: {len(records) / seconds:.0f} games/s, {plies / seconds:.0f} plies/s, {errors} illegal moves")
+
+def bench_ratings(options: argparse.Namespace):
+    """Measure leaderboard pages against OFFSET and a scan in Python, and re-rating from the archive, on a large database"""
+    import random
+    import sqlite3
+    import tempfile
+    import time
+    from chess.stats import db_setup, db_leaderboard, db_rerate
+    rng = random.Random(1)
+    players = 300000
+    with tempfile.TemporaryDirectory() as directory:
+        db = sqlite3.connect(os.path.join(directory, "chess.db"))
+        db_setup(db)
+        with db:
+            db.executemany("INSERT INTO player (name, wins, loses, games, rating) VALUES (?, 0, 0, 0, ?)",
+                           ((f"player{index}", round(rng.gauss(1500, 200))) for index in range(players)))
+        def per_call(function) -> float:
+            timings = []
+            for _ in range(options.runs):
+                start = time.perf_counter()
+                function()
+                timings.append(time.perf_counter() - start)
+            return statistics.median(timings) * 1000
+        # the cursor of page 20000, deep down the table, as reached by paging through it
+        after = db.execute("SELECT rating, id FROM player ORDER BY rating DESC, id DESC LIMIT 1 OFFSET 199999").fetchone()
+        top = per_call(lambda: db_leaderboard(db, 10))
+        keyset = per_call(lambda: db_leaderboard(db, 10, after))
+        offset = per_call(lambda: db.execute("SELECT id, name, rating, wins, loses, games FROM player ORDER BY rating DESC, id DESC LIMIT 10 OFFSET 200000").fetchall())
+        scan = per_call(lambda: sorted(db.execute("SELECT id, name, rating, wins, loses, games FROM player"), key=lambda row: (-row[2], -row[0]))[:10])
+        print(f"ratings leaderboard of {players} players: top 10 {top:.2f} ms, page 20000 {keyset:.2f} ms by (rating, id), "
+              f"{offset:.1f} ms by OFFSET, {scan:.0f} ms sorting all players in Python")
+        names = [f"player{index}" for index in range(players)]
+        outcomes = (("checkmate", "white"), ("checkmate", "black"), ("remis", None))
+        with db:
+            db.executemany("INSERT INTO games (white, black, result, winner) VALUES (?, ?, ?, ?)",
+                           ((rng.choice(names), rng.choice(names), *rng.choice(outcomes)) for _ in range(1000000)))
+        start = time.perf_counter()
+        count = db_rerate(db)
+        print(f"ratings rerate: {count / (time.perf_counter() - start):.0f} archived games/s")
+        db.close()
+
+# Benchmark name -> function taking the parsed command line options
+BENCHMARKS = {
+    "import": bench_import,
+    "parallel": bench_parallel,
+    "movecache": bench_move_cache,
+    "server": bench_server,
+    "render": bench_render,
+    "fen": bench_fen,
+    "stats": bench_stats,
+    "archive": bench_archive,
+    "book": bench_book,
+    "tablebase": bench_tablebase,
+    "batch": bench_batch,
+    "profiling": bench_profiling,
+    "journal": bench_journal,
+    "snapshot": bench_snapshot,
+    "precompute": bench_precompute,
+    "pgn": bench_pgn,
+    "ratings": bench_ratings,
+}
+
+def main(args: List[str]) -> int:
+    """Run the benchmarks named on the command line"""
+    parser = argparse.ArgumentParser(prog="python -m chess bench", description="Run performance benchmarks.")
+    parser.add_argument("names", nargs="*", metavar="name", help=f"benchmarks to run: {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument("--runs", type=int, default=10, help="repetitions per measurement (default: 10)")
+    parser.add_argument("--depth", type=int, default=None, help="search depth for the search benchmarks")
+    parser.add_argument("--clients", type=int, nargs="+", default=None, help="simultaneous clients for the server benchmark (default: 1 10 100 1000)")
+    parser.add_argument("--games", type=int, default=None, help="games to generate for the archive and book benchmarks (default: 500) and the PGN benchmark (default: 2000)")
+    parser.add_argument("--workers", type=int, default=None, help="most worker processes for the parallel benchmark (default: one per CPU)")
+    options = parser.parse_args(args)
+    for name in options.names:
+        if name not in BENCHMARKS:
+            parser.error(f"unknown benchmark {name!r}")
+    for name in options.names or BENCHMARKS:
+        BENCHMARKS[name](options)
+    return 0
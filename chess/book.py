@@ -0,0 +1,155 @@
+"""Opening book: a sorted binary file of (position key, move, weight) records, memory-mapped and binary searched
+
+Each record is 12 bytes, the key as an unsigned 64-bit and the move and weight as unsigned 16-bit big-endian
+integers, sorted by key. Opening a book maps the file without reading it, a lookup touches O(log n) records.
+"""
+from typing import Dict, Iterable, Iterator, List, Tuple
+import argparse
+import json
+import mmap
+import random
+import sqlite3
+import struct
+
+from chess.engine import Game, WHITE, move_to_str, move_from_str
+
+RECORD = struct.Struct(">QHH")
+KEY = struct.Struct(">Q")
+MAX_WEIGHT = 0xFFFF
+
+class OpeningBook:
+    """Read-only view of a book file, usable as Game.book"""
+
+    def __init__(self, path: str):
+        """Map the book file into memory"""
+        self.path = path
+        self.file = open(path, "rb")
+        size = self.file.seek(0, 2)
+        if size % RECORD.size:
+            self.file.close()
+            raise ValueError(f"{path} is not a book file, its size is not a multiple of {RECORD.size} bytes")
+        self.count = size // RECORD.size
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def entries(self, key: int) -> List[Tuple[int, int]]:
+        """Return the (move, weight) records of the position key"""
+        data = self.data
+        low, high = 0, self.count
+        while low < high: # find the first record with a key not below the one looked for
+            middle = (low + high) // 2
+            if KEY.unpack_from(data, middle * RECORD.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        entries = []
+        while low < self.count:
+            record_key, move, weight = RECORD.unpack_from(data, low * RECORD.size)
+            if record_key != key:
+                break
+            entries.append((move, weight))
+            low += 1
+        return entries
+
+    def choose(self, game: Game, rng: random.Random = None) -> int:
+        """Return a legal book move for the current position picked with probability by weight, or 0 if there is none"""
+        # a key collision could suggest a move from another position, so only legal moves are considered
+        entries = [(move, weight) for move, weight in self.entries(game.position.key) if weight and game.is_legal_move(move)]
+        if not entries:
+            return 0
+        return (rng or random).choices([move for move, _ in entries], [weight for _, weight in entries])[0]
+
+    def __reduce__(self):
+        # a pickled book, e.g. inside a game sent to a worker process, maps the file again when unpickled
+        return (OpeningBook, (self.path,))
+
+    def close(self):
+        """Unmap and close the book file"""
+        if self.count:
+            self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def game_moves(moves: Iterable[int], winner: str | None, max_ply: int) -> Iterator[Tuple[int, int, int]]:
+    """Yield (key, move, score) for the first max_ply moves of a game from the start position
+
+    The score of a move is 2 if the side making it went on to win the game, 1 for a draw and 0 for a loss.
+    """
+    game = Game()
+    game.move_cache = None
+    for ply, move in enumerate(moves):
+        if ply >= max_ply:
+            break
+        mover = "white" if game.position.side == WHITE else "black"
+        yield game.position.key, move, 1 if winner is None else 2 if winner == mover else 0
+        game.make_move(move)
+
+def moves_from_selfplay(path: str, max_ply: int) -> Iterator[Tuple[int, int, int]]:
+    """Yield (key, move, score) from the games of a self-play JSONL file"""
+    with open(path) as file:
+        for line in file:
+            record = json.loads(line)
+            yield from game_moves(map(move_from_str, record["moves"].split()), record["winner"], max_ply)
+
+def moves_from_archive(db: sqlite3.Connection, max_ply: int) -> Iterator[Tuple[int, int, int]]:
+    """Yield (key, move, score) from the games of the archive, the side to move is read from the packed position"""
+    for key, move, position, winner in db.execute("""SELECT position_key, move, position, winner FROM moves JOIN games ON games.id = moves.game_id
+                                                    WHERE ply < ? AND move IS NOT NULL""", (max_ply,)):
+        mover = "black" if position[32] & 1 else "white"
+        yield key + (1 << 64) if key < 0 else key, move, 1 if winner is None else 2 if winner == mover else 0
+
+def build_book(moves: Iterable[Tuple[int, int, int]], path: str, min_games: int = 1) -> int:
+    """Aggregate (key, move, score) samples into a book file and return the number of records written
+
+    The weight of a move is how often it was played plus its score, so popular and successful moves are preferred.
+    """
+    counts: Dict[Tuple[int, int], List[int]] = {}
+    for key, move, score in moves:
+        entry = counts.setdefault((key, move), [0, 0])
+        entry[0] += 1
+        entry[1] += score
+    records = sorted((key, move, min(games + score, MAX_WEIGHT)) for (key, move), (games, score) in counts.items() if games >= min_games)
+    with open(path, "wb") as file:
+        for start in range(0, len(records), 65536):
+            file.write(b"".join(RECORD.pack(*record) for record in records[start:start + 65536]))
+    return len(records)
+
+def main(args: List[str]) -> int:
+    """Build an opening book or look up a position in one"""
+    parser = argparse.ArgumentParser(prog="python -m chess book", description="Build or probe an opening book.")
+    parser.add_argument("action", choices=("build", "probe"), help="build a book from games, or list the book moves of a position")
+    parser.add_argument("--book", default="chess.book", help="book file (default: chess.book)")
+    parser.add_argument("--db", default=None, help="build from the game archive in this statistics database")
+    parser.add_argument("--selfplay", metavar="JSONL", action="append", default=[], help="build from a self-play output file, can be repeated")
+    parser.add_argument("--max-ply", type=int, default=20, help="only use the first moves of every game (default: 20)")
+    parser.add_argument("--min-games", type=int, default=1, help="leave out moves played in fewer games (default: 1)")
+    parser.add_argument("--fen", default=None, help="position to probe (default: the start position)")
+    options = parser.parse_args(args)
+
+    if options.action == "build":
+        if options.db is None and not options.selfplay:
+            parser.error("build needs --db or --selfplay")
+        def samples() -> Iterator[Tuple[int, int, int]]:
+            for path in options.selfplay:
+                yield from moves_from_selfplay(path, options.max_ply)
+            if options.db is not None:
+                db = sqlite3.connect(options.db)
+                yield from moves_from_archive(db, options.max_ply)
+                db.close()
+        count = build_book(samples(), options.book, options.min_games)
+        print(f"wrote {count} records to {options.book}")
+        return 0
+
+    game = Game.from_fen(options.fen) if options.fen else Game()
+    with OpeningBook(options.book) as book:
+        entries = sorted(book.entries(game.position.key), key=lambda entry: -entry[1])
+        total = sum(weight for _, weight in entries)
+        for move, weight in entries:
+            print(f"{move_to_str(move):6} weight {weight:6} ({weight * 100 / total:5.1f}%)")
+        if not entries:
+            print("the position is not in the book")
+    return 0
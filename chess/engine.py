@@ -0,0 +1,1016 @@
+"""Rules engine: positions, move generation, make/unmake and check detection, free of any I/O"""
+from collections import OrderedDict
+from typing import List, Tuple, Dict, Set, NamedTuple, NoReturn
+import random
+import re
+import threading
+
+# Piece codes stored in Position.squares: the lower three bits hold the piece type, bit 3 the colour
+EMPTY, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(7)
+WHITE, BLACK = 0, 8
+TYPE_MASK, COLOUR_MASK = 7, 8
+TEAMS = {WHITE: "white", BLACK: "black"}
+COLOURS = {"white": WHITE, "black": BLACK}
+
+# Castling rights are stored as a bit mask
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+ALL_CASTLING = 15
+NO_SQUARE = -1
+PROMOTION_PIECES = (QUEEN, ROOK, BISHOP, KNIGHT)
+# Material value of each piece type in centipawns, indexed by piece type
+PIECE_VALUES = (0, 100, 320, 330, 500, 900, 0)
+
+# Letters used by board_to_str, indexed by piece code ('e' marks an empty square)
+PIECE_LETTERS = "ePNBRQK--pnbrqk"
+PIECE_CODES = {letter: code for code, letter in enumerate(PIECE_LETTERS) if letter != "-"}
+
+# FEN letters of the piece codes with every empty square as "1", runs of empty squares are then replaced by their length
+_FEN_LETTERS = bytes.maketrans(bytes(range(15)), PIECE_LETTERS.replace("e", "1").replace("-", "1").encode())
+_FEN_EMPTY_RUNS = tuple(("1" * length, str(length)) for length in range(8, 1, -1))
+
+def square(x: int, y: int) -> int:
+    """Return the index of the square with the specified x and y coordinates"""
+    return y * 8 + x
+
+def encode_move(source: int, target: int, promotion: int = EMPTY) -> int:
+    """Pack a move into an int: source in bits 0-5, target in bits 6-11 and the promotion piece type above"""
+    return source | target << 6 | promotion << 12
+
+def move_to_str(move: int) -> str:
+    """Return the move in coordinate notation, e.g. e2e4 or e7e8q"""
+    source, target, promotion = move & 63, move >> 6 & 63, move >> 12
+    text = f"{chr(97 + (source & 7))}{(source >> 3) + 1}{chr(97 + (target & 7))}{(target >> 3) + 1}"
+    return text + PIECE_LETTERS[promotion].lower() if promotion else text
+
+def move_from_str(text: str) -> int:
+    """Return the encoded move written in coordinate notation, raise ValueError if the text is not a move"""
+    if len(text) not in (4, 5) or not ("a" <= text[0] <= "h" and "1" <= text[1] <= "8" and "a" <= text[2] <= "h" and "1" <= text[3] <= "8"):
+        raise ValueError(f"not a move in coordinate notation: {text!r}")
+    promotion = EMPTY
+    if len(text) == 5:
+        if text[4] not in "qrbn":
+            raise ValueError(f"unknown promotion piece in {text!r}")
+        promotion = PIECE_CODES[text[4].upper()]
+    return encode_move(square(ord(text[0]) - 97, int(text[1]) - 1), square(ord(text[2]) - 97, int(text[3]) - 1), promotion)
+
+def _leap_table(offsets: Tuple[Tuple[int,int], ...]) -> Tuple[Tuple[int, ...], ...]:
+    """Precompute the target squares of a leaping piece for every square"""
+    table = []
+    for sq in range(64):
+        x, y = sq & 7, sq >> 3
+        table.append(tuple(square(x + dx, y + dy) for dx, dy in offsets if 0 <= x + dx < 8 and 0 <= y + dy < 8))
+    return tuple(table)
+
+def _ray_table(directions: Tuple[Tuple[int,int], ...]) -> Tuple[Tuple[Tuple[int, ...], ...], ...]:
+    """Precompute for every square the squares along each direction, ordered outward"""
+    table = []
+    for sq in range(64):
+        rays = []
+        for dx, dy in directions:
+            x, y = (sq & 7) + dx, (sq >> 3) + dy
+            ray = []
+            while 0 <= x < 8 and 0 <= y < 8:
+                ray.append(square(x, y))
+                x += dx
+                y += dy
+            if ray:
+                rays.append(tuple(ray))
+        table.append(tuple(rays))
+    return tuple(table)
+
+KNIGHT_TARGETS = _leap_table(((2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2)))
+KING_TARGETS = _leap_table(((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)))
+ROOK_RAYS = _ray_table(((1, 0), (-1, 0), (0, 1), (0, -1)))
+BISHOP_RAYS = _ray_table(((1, 1), (1, -1), (-1, 1), (-1, -1)))
+QUEEN_RAYS = tuple(ROOK_RAYS[sq] + BISHOP_RAYS[sq] for sq in range(64))
+SLIDER_RAYS = {BISHOP: BISHOP_RAYS, ROOK: ROOK_RAYS, QUEEN: QUEEN_RAYS}
+# Squares attacked by a pawn of the given colour standing on a square
+PAWN_ATTACKS = {WHITE: _leap_table(((-1, 1), (1, 1))), BLACK: _leap_table(((-1, -1), (1, -1)))}
+
+# Zobrist keys, drawn from a fixed seed so that position keys are stable across processes and runs
+_zobrist_random = random.Random(0x5EED)
+ZOBRIST_PIECES = tuple(tuple(_zobrist_random.getrandbits(64) for _ in range(64)) if code & TYPE_MASK else None for code in range(15))
+ZOBRIST_EP_FILES = tuple(_zobrist_random.getrandbits(64) for _ in range(8))
+_zobrist_castling_bits = tuple(_zobrist_random.getrandbits(64) for _ in range(4))
+ZOBRIST_CASTLING = tuple(
+    (_zobrist_castling_bits[0] if rights & 1 else 0) ^ (_zobrist_castling_bits[1] if rights & 2 else 0) ^
+    (_zobrist_castling_bits[2] if rights & 4 else 0) ^ (_zobrist_castling_bits[3] if rights & 8 else 0)
+    for rights in range(16))
+ZOBRIST_BLACK_TO_MOVE = _zobrist_random.getrandbits(64)
+del _zobrist_random, _zobrist_castling_bits
+
+# Piece-square tables for the middlegame and the endgame, bonus in centipawns for a piece of the type standing on a square.
+# They are written from white's view as seen on a diagram, rank 8 in the first row, so white's square sq is at sq ^ 56.
+_PIECE_SQUARE_MIDDLEGAME = (None, (
+      0,   0,   0,   0,   0,   0,   0,   0,
+     50,  50,  50,  50,  50,  50,  50,  50,
+     10,  10,  20,  30,  30,  20,  10,  10,
+      5,   5,  10,  25,  25,  10,   5,   5,
+      0,   0,   0,  20,  20,   0,   0,   0,
+      5,  -5, -10,   0,   0, -10,  -5,   5,
+      5,  10,  10, -20, -20,  10,  10,   5,
+      0,   0,   0,   0,   0,   0,   0,   0), (
+    -50, -40, -30, -30, -30, -30, -40, -50,
+    -40, -20,   0,   0,   0,   0, -20, -40,
+    -30,   0,  10,  15,  15,  10,   0, -30,
+    -30,   5,  15,  20,  20,  15,   5, -30,
+    -30,   0,  15,  20,  20,  15,   0, -30,
+    -30,   5,  10,  15,  15,  10,   5, -30,
+    -40, -20,   0,   5,   5,   0, -20, -40,
+    -50, -40, -30, -30, -30, -30, -40, -50), (
+    -20, -10, -10, -10, -10, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,  10,  10,   5,   0, -10,
+    -10,   5,   5,  10,  10,   5,   5, -10,
+    -10,   0,  10,  10,  10,  10,   0, -10,
+    -10,  10,  10,  10,  10,  10,  10, -10,
+    -10,   5,   0,   0,   0,   0,   5, -10,
+    -20, -10, -10, -10, -10, -10, -10, -20), (
+      0,   0,   0,   0,   0,   0,   0,   0,
+      5,  10,  10,  10,  10,  10,  10,   5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+      0,   0,   0,   5,   5,   0,   0,   0), (
+    -20, -10, -10,  -5,  -5, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,   5,   5,   5,   0, -10,
+     -5,   0,   5,   5,   5,   5,   0,  -5,
+      0,   0,   5,   5,   5,   5,   0,  -5,
+    -10,   5,   5,   5,   5,   5,   0, -10,
+    -10,   0,   5,   0,   0,   0,   0, -10,
+    -20, -10, -10,  -5,  -5, -10, -10, -20), (
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -20, -30, -30, -40, -40, -30, -30, -20,
+    -10, -20, -20, -20, -20, -20, -20, -10,
+     20,  20,   0,   0,   0,   0,  20,  20,
+     20,  30,  10,   0,   0,  10,  30,  20))
+# In the endgame pawns gain from advancing and the king belongs in the centre, the other pieces keep their tables
+_PIECE_SQUARE_ENDGAME = (None, (
+      0,   0,   0,   0,   0,   0,   0,   0,
+     80,  80,  80,  80,  80,  80,  80,  80,
+     50,  50,  50,  50,  50,  50,  50,  50,
+     30,  30,  30,  30,  30,  30,  30,  30,
+     20,  20,  20,  20,  20,  20,  20,  20,
+     10,  10,  10,  10,  10,  10,  10,  10,
+     10,  10,  10,  10,  10,  10,  10,  10,
+      0,   0,   0,   0,   0,   0,   0,   0)) + _PIECE_SQUARE_MIDDLEGAME[KNIGHT:KING] + ((
+    -50, -40, -30, -20, -20, -30, -40, -50,
+    -30, -20, -10,   0,   0, -10, -20, -30,
+    -30, -10,  20,  30,  30,  20, -10, -30,
+    -30, -10,  30,  40,  40,  30, -10, -30,
+    -30, -10,  30,  40,  40,  30, -10, -30,
+    -30, -10,  20,  30,  30,  20, -10, -30,
+    -30, -30,   0,   0,   0,   0, -30, -30,
+    -50, -30, -30, -30, -30, -30, -30, -50),)
+# Material value in the endgame, pawns and rooks grow in importance as the board empties
+PIECE_VALUES_ENDGAME = (0, 120, 300, 320, 530, 920, 0)
+# Game phase: 24 with all minor and major pieces on the board, falling to 0 as they are traded off
+PHASE_WEIGHTS = (0, 0, 1, 1, 2, 4, 0)
+TOTAL_PHASE = 24
+
+def _score_table(values: Tuple[int, ...], tables: Tuple[Tuple[int, ...], ...]) -> Tuple[Tuple[int, ...] | None, ...]:
+    """Combine material and piece-square bonus per piece code and square, positive for white and negative for black"""
+    return tuple((tuple(values[code & TYPE_MASK] + tables[code & TYPE_MASK][sq ^ 56] for sq in range(64)) if code & COLOUR_MASK == WHITE else
+                  tuple(-values[code & TYPE_MASK] - tables[code & TYPE_MASK][sq] for sq in range(64))) if EMPTY < code & TYPE_MASK <= KING else None
+                 for code in range(15))
+
+MIDDLEGAME_SCORES = _score_table(PIECE_VALUES, _PIECE_SQUARE_MIDDLEGAME)
+ENDGAME_SCORES = _score_table(PIECE_VALUES_ENDGAME, _PIECE_SQUARE_ENDGAME)
+
+class CheckInfo(NamedTuple):
+    """Pieces giving check to a king and the own pieces pinned against it"""
+    checkers: List[int] # squares of the pieces giving check
+    pinned: Dict[int, Tuple[int, ...]] # pinned square -> squares along the pin ray up to and including the pinner
+    evasions: Set[int] | None # squares a non-king move has to reach to resolve the check, None if not in check
+
+class Snapshot(NamedTuple):
+    """Immutable, hashable state of a game without its move history, see Game.snapshot"""
+    squares: bytes
+    side: int
+    castling: int
+    ep_square: int
+    key: int
+    middlegame: int
+    endgame: int
+    phase: int
+    moves_since_last_significant: int
+    move_number: int # full move number
+    repetitions: Tuple[Tuple[int, int], ...] # (key, occurrences) of the positions since the last irreversible move, sorted by key
+    last_move: Tuple[int, int, int, int] | None
+
+class Position:
+    """Compact board state: a flat 64-square bytearray plus side to move, castling rights and en passant square"""
+    __slots__ = ("squares", "side", "castling", "ep_square", "key", "middlegame", "endgame", "phase")
+
+    def __init__(self, squares: bytes = None, side: int = WHITE, castling: int = ALL_CASTLING, ep_square: int = NO_SQUARE) -> NoReturn:
+        """Initialize the position, squares are indexed with y * 8 + x"""
+        self.squares = bytearray(64) if squares is None else bytearray(squares)
+        self.side = side
+        self.castling = castling
+        self.ep_square = ep_square
+        self.key = self.compute_key()
+        self.middlegame, self.endgame, self.phase = self.compute_scores()
+
+    @classmethod
+    def initial(cls) -> 'Position':
+        """Return the starting position"""
+        squares = bytearray(64)
+        for x, kind in enumerate((ROOK, KNIGHT, BISHOP, QUEEN, KING, BISHOP, KNIGHT, ROOK)):
+            squares[x] = kind | WHITE
+            squares[8 + x] = PAWN | WHITE
+            squares[48 + x] = PAWN | BLACK
+            squares[56 + x] = kind | BLACK
+        return cls(squares)
+
+    def copy(self) -> 'Position':
+        """Return an independent copy of the position"""
+        position = Position.__new__(Position)
+        position.squares = bytearray(self.squares)
+        position.side, position.castling, position.ep_square, position.key = self.side, self.castling, self.ep_square, self.key
+        position.middlegame, position.endgame, position.phase = self.middlegame, self.endgame, self.phase
+        return position
+
+    @classmethod
+    def from_fen(cls, fen: str) -> 'Position':
+        """Return the position described by the first four fields of a FEN string, raise ValueError if they are malformed"""
+        fields = fen.split()
+        rows = fields[0].split("/") if fields else []
+        if len(fields) < 4 or len(rows) != 8 or fields[1] not in ("w", "b") or not re.fullmatch(r"-|K?Q?k?q?", fields[2]) or not re.fullmatch(r"-|[a-h][36]", fields[3]):
+            raise ValueError(f"malformed FEN string: {fen!r}")
+        squares = bytearray(64)
+        for rank, row in enumerate(rows):
+            x = 0
+            for char in row:
+                if char in "12345678":
+                    x += int(char)
+                elif char in "PNBRQKpnbrqk" and x < 8:
+                    squares[(7 - rank) * 8 + x] = PIECE_CODES[char]
+                    x += 1
+                else:
+                    raise ValueError(f"malformed FEN string: {fen!r}")
+            if x != 8:
+                raise ValueError(f"malformed FEN string: {fen!r}")
+        if squares.count(KING) != 1 or squares.count(KING | BLACK) != 1:
+            raise ValueError(f"a FEN position needs one king of each colour: {fen!r}")
+        castling = 0
+        for char, flag in (("K", WHITE_KINGSIDE), ("Q", WHITE_QUEENSIDE), ("k", BLACK_KINGSIDE), ("q", BLACK_QUEENSIDE)):
+            if char in fields[2]:
+                castling |= flag
+        side = WHITE if fields[1] == "w" else BLACK
+        ep_square = NO_SQUARE
+        if fields[3] != "-":
+            ep_square = square(ord(fields[3][0]) - 97, int(fields[3][1]) - 1)
+            # only keep the en passant square if the enemy pawn has just passed it from its start square and a pawn
+            # can actually take there, as make_move does
+            forward = 8 if side == WHITE else -8
+            pawn_square, start_square, pawn = ep_square - forward, ep_square + forward, PAWN | side
+            if (ep_square >> 3 != (5 if side == WHITE else 2) or squares[pawn_square] != PAWN | (side ^ BLACK)
+                    or squares[ep_square] != EMPTY or squares[start_square] != EMPTY
+                    or not ((pawn_square & 7 > 0 and squares[pawn_square - 1] == pawn) or (pawn_square & 7 < 7 and squares[pawn_square + 1] == pawn))):
+                ep_square = NO_SQUARE
+        return cls(squares, side, castling, ep_square)
+
+    def to_fen(self) -> str:
+        """Return the first four fields of the FEN string of the position: pieces, side to move, castling and en passant"""
+        board = self.squares.translate(_FEN_LETTERS).decode()
+        placement = "/".join(board[y * 8:y * 8 + 8] for y in range(7, -1, -1))
+        for run, count in _FEN_EMPTY_RUNS:
+            placement = placement.replace(run, count)
+        castling = "".join(char for char, flag in (("K", WHITE_KINGSIDE), ("Q", WHITE_QUEENSIDE), ("k", BLACK_KINGSIDE), ("q", BLACK_QUEENSIDE))
+                           if self.castling & flag) or "-"
+        ep = f"{chr(97 + (self.ep_square & 7))}{(self.ep_square >> 3) + 1}" if self.ep_square != NO_SQUARE else "-"
+        return f"{placement} {'w' if self.side == WHITE else 'b'} {castling} {ep}"
+
+    def pack(self) -> bytes:
+        """Return the position in 34 bytes: two squares per byte, then side to move and castling rights, then the en passant square"""
+        squares = self.squares
+        return bytes([squares[sq] | squares[sq + 1] << 4 for sq in range(0, 64, 2)] + [self.side >> 3 | self.castling << 1, self.ep_square & 0xFF])
+
+    @classmethod
+    def unpack(cls, data: bytes) -> 'Position':
+        """Return the position packed by pack"""
+        squares = bytearray(64)
+        squares[0::2] = bytes(byte & 15 for byte in data[:32])
+        squares[1::2] = bytes(byte >> 4 for byte in data[:32])
+        return cls(squares, (data[32] & 1) << 3, data[32] >> 1, NO_SQUARE if data[33] == 0xFF else data[33])
+
+    def compute_key(self) -> int:
+        """Compute the 64-bit Zobrist key of the position from scratch"""
+        key = ZOBRIST_CASTLING[self.castling]
+        for sq, code in enumerate(self.squares):
+            if code:
+                key ^= ZOBRIST_PIECES[code][sq]
+        if self.ep_square != NO_SQUARE:
+            key ^= ZOBRIST_EP_FILES[self.ep_square & 7]
+        if self.side == BLACK:
+            key ^= ZOBRIST_BLACK_TO_MOVE
+        return key
+
+    def compute_scores(self) -> Tuple[int, int, int]:
+        """Compute the middlegame and endgame material plus piece-square score from white's view and the game phase from scratch"""
+        middlegame = endgame = phase = 0
+        for sq, code in enumerate(self.squares):
+            if code:
+                middlegame += MIDDLEGAME_SCORES[code][sq]
+                endgame += ENDGAME_SCORES[code][sq]
+                phase += PHASE_WEIGHTS[code & TYPE_MASK]
+        return middlegame, endgame, phase
+
+    def evaluate(self) -> int:
+        """Return the score in centipawns from the view of the side to move, blending middlegame and endgame by phase"""
+        phase = min(self.phase, TOTAL_PHASE) # early promotions can push the phase past its starting value
+        score = (self.middlegame * phase + self.endgame * (TOTAL_PHASE - phase)) // TOTAL_PHASE
+        return -score if self.side == BLACK else score
+
+    def king_square(self, colour: int) -> int:
+        """Return the square of the king of the specified colour"""
+        return self.squares.index(KING | colour)
+
+    def targets(self, sq: int) -> List[int]:
+        """Return the pseudo-legal target squares of the piece on sq, excluding squares held by own pieces"""
+        squares = self.squares
+        code = squares[sq]
+        kind = code & TYPE_MASK
+        colour = code & COLOUR_MASK
+        if kind == PAWN:
+            return self.pawn_targets(sq, colour)
+        if kind == KNIGHT or kind == KING:
+            targets = [t for t in (KNIGHT_TARGETS[sq] if kind == KNIGHT else KING_TARGETS[sq]) if not squares[t] or squares[t] & COLOUR_MASK != colour]
+            if kind == KING and sq == (4 if colour == WHITE else 60):
+                targets += self.castling_targets(colour)
+            return targets
+        targets = []
+        for ray in SLIDER_RAYS[kind][sq]:
+            for t in ray:
+                if squares[t]:
+                    if squares[t] & COLOUR_MASK != colour:
+                        targets.append(t)
+                    break
+                targets.append(t)
+        return targets
+
+    def pawn_targets(self, sq: int, colour: int) -> List[int]:
+        """Return the pseudo-legal target squares of a pawn"""
+        squares = self.squares
+        x, y = sq & 7, sq >> 3
+        step, start_rank, ep_rank = (8, 1, 4) if colour == WHITE else (-8, 6, 3)
+        targets = []
+        # Move one forward, or two forward on start field
+        forward = sq + step
+        if 0 <= forward < 64 and not squares[forward]:
+            targets.append(forward)
+            if y == start_rank and not squares[forward + step]:
+                targets.append(forward + step)
+        # Take sideways, including en passant
+        for dx in (-1, 1):
+            if 0 <= x + dx < 8 and 0 <= forward < 64:
+                t = forward + dx
+                if (squares[t] and squares[t] & COLOUR_MASK != colour) or (t == self.ep_square and y == ep_rank):
+                    targets.append(t)
+        return targets
+
+    def is_square_attacked(self, sq: int, colour: int) -> bool:
+        """Check if any piece of the specified colour attacks sq, looking outward from sq and stopping at the first attacker"""
+        squares = self.squares
+        knight = KNIGHT | colour
+        for s in KNIGHT_TARGETS[sq]:
+            if squares[s] == knight:
+                return True
+        pawn = PAWN | colour
+        for s in PAWN_ATTACKS[colour ^ BLACK][sq]:
+            if squares[s] == pawn:
+                return True
+        king = KING | colour
+        for s in KING_TARGETS[sq]:
+            if squares[s] == king:
+                return True
+        queen = QUEEN | colour
+        for rays, slider in ((ROOK_RAYS, ROOK | colour), (BISHOP_RAYS, BISHOP | colour)):
+            for ray in rays[sq]:
+                for s in ray:
+                    code = squares[s]
+                    if code:
+                        if code == slider or code == queen:
+                            return True
+                        break
+        return False
+
+    def check_info(self, colour: int) -> CheckInfo:
+        """Return the pieces checking the king of the specified colour and the own pieces pinned against it"""
+        squares = self.squares
+        king_square = self.king_square(colour)
+        enemy = colour ^ BLACK
+        checkers = []
+        pinned = {}
+        evasions = None
+        for leaps, attacker in ((KNIGHT_TARGETS[king_square], KNIGHT | enemy), (PAWN_ATTACKS[colour][king_square], PAWN | enemy)):
+            for s in leaps:
+                if squares[s] == attacker:
+                    checkers.append(s)
+                    evasions = {s}
+        queen = QUEEN | enemy
+        for rays, slider in ((ROOK_RAYS, ROOK | enemy), (BISHOP_RAYS, BISHOP | enemy)):
+            for ray in rays[king_square]:
+                blocker = None
+                for i, s in enumerate(ray):
+                    code = squares[s]
+                    if not code:
+                        continue
+                    if code & COLOUR_MASK == colour:
+                        if blocker is not None: # two own pieces in a row, nothing is pinned
+                            break
+                        blocker = s
+                        continue
+                    if code == slider or code == queen:
+                        if blocker is None:
+                            checkers.append(s)
+                            evasions = set(ray[:i + 1])
+                        else:
+                            pinned[blocker] = ray[:i + 1]
+                    break
+        if len(checkers) > 1: # double check, only the king can move
+            evasions = set()
+        return CheckInfo(checkers, pinned, evasions)
+
+    def castling_targets(self, colour: int) -> List[int]:
+        """Return the castling target squares of the king of the specified colour"""
+        squares = self.squares
+        targets = []
+        if colour == WHITE:
+            if self.castling & WHITE_KINGSIDE and not squares[5] and not squares[6]:
+                targets.append(6)
+            if self.castling & WHITE_QUEENSIDE and not squares[1] and not squares[2] and not squares[3]:
+                targets.append(2)
+        else:
+            if self.castling & BLACK_KINGSIDE and not squares[61] and not squares[62]:
+                targets.append(62)
+            if self.castling & BLACK_QUEENSIDE and not squares[57] and not squares[58] and not squares[59]:
+                targets.append(58)
+        return targets
+
+# Castling rights that survive a move from or to a square, a rook leaving or being taken on its corner loses its right
+CASTLING_MASKS = [ALL_CASTLING] * 64
+CASTLING_MASKS[0] &= ~WHITE_QUEENSIDE
+CASTLING_MASKS[7] &= ~WHITE_KINGSIDE
+CASTLING_MASKS[4] &= ~(WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_MASKS[56] &= ~BLACK_QUEENSIDE
+CASTLING_MASKS[63] &= ~BLACK_KINGSIDE
+CASTLING_MASKS[60] &= ~(BLACK_KINGSIDE | BLACK_QUEENSIDE)
+
+class MoveCache:
+    """Bounded cache of the legal moves of recently seen positions, the least recently used position is evicted first
+
+    Entries are keyed by the Zobrist key, which covers the pieces, side to move, castling rights and en passant
+    square, so making or taking back a move looks up a different entry and nothing has to be invalidated.
+    The targets of a square are only generated when first asked for, so a position costs no more than without the cache.
+    """
+
+    def __init__(self, size: int = 1024) -> NoReturn:
+        self.size = size
+        self.entries = OrderedDict() # position key -> (check info of the side to move, {source square: legal target squares})
+        self.lock = threading.Lock() # chess.precompute stores entries from a background thread
+        self.hits = 0
+        self.misses = 0
+
+    def __reduce__(self):
+        # a copied or pickled game gets an empty cache of the same size
+        return (MoveCache, (self.size,))
+
+    def entry(self, game: 'Game') -> Tuple[CheckInfo, Dict[int, Tuple[int, ...]]]:
+        """Return the entry of the current position, creating it if it is not cached"""
+        key = game.position.key
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = self.entries[key] = (game.position.check_info(game.position.side), {})
+                if len(self.entries) > self.size:
+                    self.entries.popitem(last=False)
+            else:
+                self.entries.move_to_end(key)
+        return entry
+
+    def store(self, key: int, info: CheckInfo, targets: Dict[int, Tuple[int, ...]]):
+        """Add the entry of a position with the targets of all pieces of the side to move, computed elsewhere"""
+        with self.lock:
+            self.entries[key] = (info, targets)
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def targets(self, game: 'Game', sq: int) -> Tuple[int, ...]:
+        """Return the legal target squares of the piece of the current player on sq"""
+        info, targets = self.entry(game)
+        if sq in targets:
+            self.hits += 1
+            return targets[sq]
+        self.misses += 1
+        square_targets = targets[sq] = tuple(game.legal_targets(sq, info))
+        return square_targets
+
+    def has_moves(self, game: 'Game') -> bool:
+        """Check if the current player has any legal move"""
+        squares, side = game.position.squares, game.position.side
+        return any(self.targets(game, sq) for sq in range(64) if squares[sq] and squares[sq] & COLOUR_MASK == side)
+
+    def clear(self):
+        """Remove all entries and reset the counters"""
+        with self.lock:
+            self.entries.clear()
+        self.hits = self.misses = 0
+
+class BoardView:
+    """List-of-lists style adapter over a Position, board[y][x] returns a Piece or None"""
+    __slots__ = ("game",)
+
+    def __init__(self, game: 'Game') -> NoReturn:
+        self.game = game
+
+    @property
+    def position(self) -> Position:
+        return self.game.position
+
+    def __getitem__(self, y: int) -> List['Piece | None']:
+        return [self.game.get_piece_at(x, y) for x in range(8)]
+
+    def __len__(self) -> int:
+        return 8
+
+class Game:
+    position: Position = None
+    last_move = None
+    moves_since_last_significant: int = 0
+    repetitions: Dict[int, int] = None # position key -> occurrences since the last irreversible move, used for threefold repetition
+    undo_stack: list = None # one entry per move made, used by unmake_move
+    game_over: bool = False
+    result: str = None
+    winner: str = None
+    termination: str = None # why the game ended, e.g. "checkmate", "stalemate" or "threefold repetition"
+    end_message: str = None
+    start_fen: str = None # position the move history starts from, saved games replay their moves from it
+    first_move_number: int = 1 # full move number of the start position
+    move_cache: MoveCache = None # legal moves of recent positions for the user interface, None disables caching
+    book = None # opening book asked by book_move, anything with a choose(game, rng) method like chess.book.OpeningBook
+    tablebases = None # endgame tables the search probes, anything with a probe(position) method like chess.tablebase.Tablebases
+
+    def __init__(self) -> NoReturn:
+        """Initialize the chess game"""
+        self.move_cache = MoveCache()
+        self.create_board()
+
+    @property
+    def board(self) -> BoardView:
+        """The board as rows of Piece objects, backed by the compact position"""
+        return BoardView(self)
+
+    @property
+    def zobrist_key(self) -> int:
+        """64-bit key of the current position, including side to move, castling rights and en passant"""
+        return self.position.key
+
+    @property
+    def current_player(self) -> str:
+        return TEAMS[self.position.side]
+
+    @current_player.setter
+    def current_player(self, team: str):
+        self.position.side = COLOURS[team]
+        self.position.key = self.position.compute_key()
+
+    def _castling_right(flag: int) -> property:
+        """Expose a castling right bit of the position as a boolean attribute"""
+        def getter(self) -> bool:
+            return bool(self.position.castling & flag)
+        def setter(self, value: bool):
+            self.position.castling = self.position.castling | flag if value else self.position.castling & ~flag
+            self.position.key = self.position.compute_key()
+        return property(getter, setter)
+
+    white_castling_kingside = _castling_right(WHITE_KINGSIDE)
+    white_castling_queenside = _castling_right(WHITE_QUEENSIDE)
+    black_castling_kingside = _castling_right(BLACK_KINGSIDE)
+    black_castling_queenside = _castling_right(BLACK_QUEENSIDE)
+    del _castling_right
+
+    def get_piece_at(self, x: int, y: int) -> 'Piece | None':
+        """Return the piece at the specified x and y coordinates"""
+        code = self.position.squares[y * 8 + x]
+        if not code:
+            return None
+        return PIECE_TYPES[code & TYPE_MASK](self, TEAMS[code & COLOUR_MASK], x, y)
+
+    def is_promotion(self, x: int, y: int, target_x: int, target_y: int) -> bool:
+        """Check if moving the piece at x and y to the target promotes a pawn"""
+        code = self.position.squares[y * 8 + x]
+        return code & TYPE_MASK == PAWN and target_y == (0 if code & COLOUR_MASK else 7)
+
+    def move_piece(self, x: int, y: int, target_x: int, target_y: int, promotion: str = "q"):
+        """Move a piece to a new position, a promoted pawn becomes the piece named by promotion (q, r, b or n)"""
+        promotion_piece = PIECE_CODES[promotion.upper()] if self.is_promotion(x, y, target_x, target_y) else EMPTY
+        self.make_move(encode_move(y * 8 + x, target_y * 8 + target_x, promotion_piece))
+
+    def make_move(self, move: int):
+        """Apply an encoded move, including en passant, castling and promotion, and record how to take it back"""
+        position = self.position
+        squares = position.squares
+        source, target, promotion = move & 63, move >> 6 & 63, move >> 12
+        code = squares[source]
+        kind = code & TYPE_MASK
+        colour = code & COLOUR_MASK
+        captured_square = target
+        if kind == PAWN and target == position.ep_square: # en passant takes the pawn beside the source
+            captured_square = (source & ~7) | (target & 7)
+        captured = squares[captured_square]
+        irreversible = kind == PAWN or captured
+        # the repetition counts are only replaced on irreversible moves, otherwise one count is incremented
+        self.undo_stack.append((move, code, captured, captured_square, position.castling, position.ep_square, position.key, self.last_move,
+                                self.moves_since_last_significant, self.repetitions if irreversible else None,
+                                position.middlegame, position.endgame, position.phase))
+
+        key = position.key ^ ZOBRIST_PIECES[code][source] ^ ZOBRIST_CASTLING[position.castling] ^ ZOBRIST_BLACK_TO_MOVE
+        if position.ep_square != NO_SQUARE:
+            key ^= ZOBRIST_EP_FILES[position.ep_square & 7]
+        middlegame = position.middlegame - MIDDLEGAME_SCORES[code][source]
+        endgame = position.endgame - ENDGAME_SCORES[code][source]
+        if captured:
+            key ^= ZOBRIST_PIECES[captured][captured_square]
+            middlegame -= MIDDLEGAME_SCORES[captured][captured_square]
+            endgame -= ENDGAME_SCORES[captured][captured_square]
+            position.phase -= PHASE_WEIGHTS[captured & TYPE_MASK]
+        squares[source] = squares[captured_square] = EMPTY
+        if promotion:
+            code = promotion | colour
+            position.phase += PHASE_WEIGHTS[promotion]
+        squares[target] = code
+        key ^= ZOBRIST_PIECES[code][target]
+        middlegame += MIDDLEGAME_SCORES[code][target]
+        endgame += ENDGAME_SCORES[code][target]
+        # move the rook along when castling
+        if kind == KING and abs(target - source) == 2:
+            rook_source, rook_target = (source + 3, source + 1) if target > source else (source - 4, source - 1)
+            rook = squares[rook_source]
+            squares[rook_target] = rook
+            squares[rook_source] = EMPTY
+            key ^= ZOBRIST_PIECES[rook][rook_source] ^ ZOBRIST_PIECES[rook][rook_target]
+            middlegame += MIDDLEGAME_SCORES[rook][rook_target] - MIDDLEGAME_SCORES[rook][rook_source]
+            endgame += ENDGAME_SCORES[rook][rook_target] - ENDGAME_SCORES[rook][rook_source]
+        # dissalow castling if the king or a rook gets moved or a rook gets taken
+        position.castling &= CASTLING_MASKS[source] & CASTLING_MASKS[target]
+        key ^= ZOBRIST_CASTLING[position.castling]
+        # remember the square a double pawn push passed over, as long as an enemy pawn stands ready to take en passant
+        position.ep_square = NO_SQUARE
+        if kind == PAWN and abs(target - source) == 16:
+            enemy_pawn = PAWN | (colour ^ BLACK)
+            if (target & 7 > 0 and squares[target - 1] == enemy_pawn) or (target & 7 < 7 and squares[target + 1] == enemy_pawn):
+                position.ep_square = (source + target) // 2
+                key ^= ZOBRIST_EP_FILES[target & 7]
+        position.side ^= BLACK
+        position.key = key
+        position.middlegame, position.endgame = middlegame, endgame
+        self.last_move = (source & 7, source >> 3, target & 7, target >> 3)
+        # reset moves_since_last_significant and the repetition counts if a irreversible move is made
+        if irreversible:
+            self.moves_since_last_significant = 0
+            self.repetitions = {key: 1}
+        else:
+            self.moves_since_last_significant += 1 # track moves since last significant move for 50 & 75 moves rule
+            self.repetitions[key] = self.repetitions.get(key, 0) + 1 # track positions for threefold repetition
+
+    def unmake_move(self):
+        """Take back the last move made with make_move"""
+        (move, code, captured, captured_square, castling, ep_square, key, last_move, moves_since_last_significant, repetitions,
+         middlegame, endgame, phase) = self.undo_stack.pop()
+        position = self.position
+        squares = position.squares
+        if repetitions is None:
+            count = self.repetitions[position.key]
+            if count == 1:
+                del self.repetitions[position.key]
+            else:
+                self.repetitions[position.key] = count - 1
+        else:
+            self.repetitions = repetitions
+        source, target = move & 63, move >> 6 & 63
+        squares[target] = EMPTY
+        squares[captured_square] = captured
+        squares[source] = code
+        if code & TYPE_MASK == KING and abs(target - source) == 2:
+            rook_source, rook_target = (source + 3, source + 1) if target > source else (source - 4, source - 1)
+            squares[rook_source] = squares[rook_target]
+            squares[rook_target] = EMPTY
+        position.castling = castling
+        position.ep_square = ep_square
+        position.key = key
+        position.middlegame, position.endgame, position.phase = middlegame, endgame, phase
+        position.side ^= BLACK
+        self.last_move = last_move
+        self.moves_since_last_significant = moves_since_last_significant
+
+    def is_check(self, player: str, no_recursion: bool = False) -> bool:
+        """Check if the specified player is in check"""
+        colour = COLOURS[player]
+        return self.position.is_square_attacked(self.position.king_square(colour), colour ^ BLACK)
+
+    def check_info(self, player: str) -> CheckInfo:
+        """Return the pieces checking the specified player and the pieces pinned against their king"""
+        return self.position.check_info(COLOURS[player])
+
+    def is_check_after_move(self, x: int, y: int, target_x: int, target_y: int) -> bool:
+        """Check if the player moving the piece is in check after a move"""
+        position = self.position
+        source, target = y * 8 + x, target_y * 8 + target_x
+        colour = position.squares[source] & COLOUR_MASK
+        # Simulate the move, a promotion is simulated as a queen
+        self.make_move(encode_move(source, target, QUEEN if position.squares[source] & TYPE_MASK == PAWN and target_y in (0, 7) else EMPTY))
+        is_check = position.is_square_attacked(position.king_square(colour), colour ^ BLACK)
+        self.unmake_move()
+        return is_check
+
+    def legal_targets(self, sq: int, info: CheckInfo = None) -> List[int]:
+        """Return the target squares of the piece on sq that do not leave the own king in check"""
+        position = self.position
+        squares = position.squares
+        code = squares[sq]
+        colour = code & COLOUR_MASK
+        enemy = colour ^ BLACK
+        if info is None:
+            info = position.check_info(colour)
+        targets = position.targets(sq)
+        if code & TYPE_MASK == KING:
+            # lift the king so that sliders also attack the squares behind it
+            squares[sq] = EMPTY
+            legal = [t for t in targets if not position.is_square_attacked(t, enemy)]
+            squares[sq] = code
+            # the king may not castle out of or through check
+            return [t for t in legal if abs(t - sq) != 2 or (not info.checkers and not position.is_square_attacked((sq + t) // 2, enemy))]
+        ep_square = position.ep_square
+        if code & TYPE_MASK == PAWN and ep_square in targets:
+            targets.remove(ep_square)
+            ep_legal = not self.is_check_after_move(sq & 7, sq >> 3, ep_square & 7, ep_square >> 3)
+        else:
+            ep_legal = False
+        if info.evasions is not None:
+            targets = [t for t in targets if t in info.evasions]
+        pin = info.pinned.get(sq)
+        if pin is not None:
+            targets = [t for t in targets if t in pin]
+        if ep_legal:
+            targets.append(ep_square)
+        return targets
+
+    def has_valid_mvoes(self, player: str) -> bool:
+        """Check if the specified player has any valid moves"""
+        squares = self.position.squares
+        colour = COLOURS[player]
+        if self.move_cache is not None and colour == self.position.side:
+            return self.move_cache.has_moves(self)
+        info = self.position.check_info(colour) # shared by all pieces of the player
+        for sq in range(64):
+            if squares[sq] and squares[sq] & COLOUR_MASK == colour and self.legal_targets(sq, info):
+                return True # return True as soon as a valid move is found
+        return False
+
+    def book_move(self, rng: random.Random = None) -> int:
+        """Return a move for the current position from the opening book, or 0 if there is no book or it has no move"""
+        return self.book.choose(self, rng) if self.book is not None else 0
+
+    def is_legal_move(self, move: int) -> bool:
+        """Check if an encoded move is legal for the current player, only generating the moves of the piece moved"""
+        source, target, promotion = move & 63, move >> 6 & 63, move >> 12
+        code = self.position.squares[source]
+        if not code or code & COLOUR_MASK != self.position.side:
+            return False
+        # a pawn reaching the last rank has to promote, nothing else may
+        if (promotion in PROMOTION_PIECES) != (code & TYPE_MASK == PAWN and (target < 8 or target >= 56)):
+            return False
+        return target in self.legal_targets(source)
+
+    def legal_moves(self) -> List[int]:
+        """Return all legal moves of the current player as encoded moves"""
+        squares = self.position.squares
+        colour = self.position.side
+        info = self.position.check_info(colour)
+        moves = []
+        for sq in range(64):
+            code = squares[sq]
+            if code and code & COLOUR_MASK == colour:
+                for target in self.legal_targets(sq, info):
+                    if code & TYPE_MASK == PAWN and (target < 8 or target >= 56):
+                        moves.extend(encode_move(sq, target, promotion) for promotion in PROMOTION_PIECES)
+                    else:
+                        moves.append(sq | target << 6)
+        return moves
+
+    def check_game_over(self) -> Tuple[Tuple[str, str], str] | None:
+        """Check if the current player can no longer continue, return ((result, winner), end_message) if the game ended"""
+        if not self.has_valid_mvoes(self.current_player):
+            if self.is_check(self.current_player): # If the player has no valid moves and is in check, it's checkmate
+                winner = "white" if self.current_player == "black" else "black"
+                return self.end_game("checkmate", "checkmate", f"Checkmate! {winner} wins!", winner)
+            # If the player has no valid moves and is not in check, it's a stalemate
+            return self.end_game("remis", "stalemate", "Game ended in a remis due to stalemate.")
+        # Check if it is a remis because of the 75 moves rule
+        if self.moves_since_last_significant >= 150:
+            return self.end_game("remis", "75 moves rule", "Game ended in a remis due to 75 moves rule.")
+        # Check if this position has repeated three times
+        if self.repetition_count() >= 3:
+            return self.end_game("remis", "threefold repetition", "Game ended in a remis due to threefold repetition.")
+        return None
+
+    def end_game(self, result: str, termination: str, end_message: str, winner: str = None) -> Tuple[Tuple[str, str], str]:
+        """Mark the game as over and return ((result, winner), end_message)"""
+        self.game_over = True
+        self.result = result
+        self.winner = winner
+        self.termination = termination
+        self.end_message = end_message
+        return ((result, winner), end_message)
+
+    def set_position(self, position: Position, moves_since_last_significant: int = 0, move_number: int = 1):
+        """Start playing from the specified position, forgetting the move history"""
+        position.key = position.compute_key()
+        position.middlegame, position.endgame, position.phase = position.compute_scores()
+        self.position = position
+        self.undo_stack = []
+        self.repetitions = {position.key: 1}
+        self.last_move = None
+        self.moves_since_last_significant = moves_since_last_significant
+        self.first_move_number = move_number
+        self.start_fen = self.to_fen()
+
+    @classmethod
+    def from_fen(cls, fen: str) -> 'Game':
+        """Return a game starting from the position described by a FEN string, the move counters may be left out"""
+        game = cls()
+        fields = fen.split()
+        if len(fields) < 4:
+            raise ValueError(f"a FEN string needs at least four fields: {fen!r}")
+        game.set_position(Position.from_fen(fen), int(fields[4]) if len(fields) > 4 else 0, int(fields[5]) if len(fields) > 5 else 1)
+        return game
+
+    def move_number(self) -> int:
+        """Return the full move number of the current position"""
+        # the start position had the other side to move if an odd number of moves was made since
+        black_started = (self.position.side == BLACK) ^ (len(self.undo_stack) & 1)
+        return self.first_move_number + (len(self.undo_stack) + black_started) // 2
+
+    def to_fen(self) -> str:
+        """Return the FEN string of the current position, including the halfmove clock and the full move number"""
+        return f"{self.position.to_fen()} {self.moves_since_last_significant} {self.move_number()}"
+
+    def snapshot(self) -> Snapshot:
+        """Return the current state as an immutable value, cheap to keep, hash and pickle"""
+        position = self.position
+        return Snapshot(bytes(position.squares), position.side, position.castling, position.ep_square, position.key,
+                        position.middlegame, position.endgame, position.phase, self.moves_since_last_significant,
+                        self.move_number(), tuple(sorted(self.repetitions.items())), self.last_move)
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Snapshot) -> 'Game':
+        """Return a game continuing from a snapshot, with a move history starting there"""
+        position = Position.__new__(Position)
+        position.squares = bytearray(snapshot.squares)
+        position.side, position.castling, position.ep_square, position.key, position.middlegame, position.endgame, position.phase = snapshot[1:8]
+        # the key and scores come from the snapshot, so this skips the recomputation a new Game or set_position does
+        game = cls.__new__(cls)
+        game.position = position
+        game.move_cache = MoveCache()
+        game.undo_stack = []
+        game.repetitions = dict(snapshot.repetitions)
+        game.last_move = snapshot.last_move
+        game.moves_since_last_significant = snapshot.moves_since_last_significant
+        game.first_move_number = snapshot.move_number
+        game.start_fen = game.to_fen()
+        return game
+
+    def move_history(self) -> List[int]:
+        """Return the moves made since the start position, oldest first"""
+        return [entry[0] for entry in self.undo_stack]
+
+    def repetition_count(self) -> int:
+        """Return how often the current position occurred since the last irreversible move"""
+        return self.repetitions.get(self.position.key, 0)
+
+    def create_board(self) -> BoardView:
+        """Create and return the initial chess board"""
+        self.set_position(Position.initial())
+        return self.board
+
+class Piece:
+    """Lightweight view of a piece standing on a square of a Game"""
+    __slots__ = ("game", "team", "x", "y")
+    kind: int = EMPTY
+    symbol: str = ''
+
+    def __init__(self, game: Game, team: str, x: int, y: int) -> NoReturn:
+        """Initialize the piece with the specified team, x and y coordinates"""
+        self.game = game
+        self.team = team
+        self.x = x
+        self.y = y
+
+    @property
+    def unicode(self) -> str:
+        """The coloured unicode character of the piece"""
+        color = "\033[97m" if self.team == "white" else "\033[30m"
+        return f"{color}{self.symbol}"
+
+    @property
+    def code(self) -> int:
+        """The piece code as stored in Position.squares"""
+        return self.kind | COLOURS[self.team]
+
+    def get_valid_moves(self, no_recursion: bool = False) -> List[Tuple[int,int]]:
+        """Return a List of Tuples with valid Moves"""
+        sq = self.y * 8 + self.x
+        game = self.game
+        if no_recursion: # skip the check whether the own king is left in check
+            targets = game.position.targets(sq)
+        elif game.move_cache is not None and game.position.squares[sq] & COLOUR_MASK == game.position.side:
+            targets = game.move_cache.targets(game, sq)
+        else:
+            targets = game.legal_targets(sq)
+        return [(t & 7, t >> 3) for t in targets]
+
+class Pawn(Piece):
+    __slots__ = ()
+    kind = PAWN
+    symbol = "\u265F"
+
+class Rook(Piece):
+    __slots__ = ()
+    kind = ROOK
+    symbol = "\u265C"
+
+class Knight(Piece):
+    __slots__ = ()
+    kind = KNIGHT
+    symbol = "\u265E"
+
+class Bishop(Piece):
+    __slots__ = ()
+    kind = BISHOP
+    symbol = "\u265D"
+
+class Queen(Piece):
+    __slots__ = ()
+    kind = QUEEN
+    symbol = "\u265B"
+
+class King(Piece):
+    __slots__ = ()
+    kind = KING
+    symbol = "\u265A"
+
+PIECE_TYPES = (None, Pawn, Knight, Bishop, Rook, Queen, King)
+
+def board_to_str(board: BoardView) -> str:
+    """Convert the board to a string representation"""
+    squares = board.position.squares
+    return str([[PIECE_LETTERS[squares[y * 8 + x]] for x in range(8)] for y in range(8)])
+
+# Version tag at the start of a saved game, saves without it are in the legacy format of board_to_str
+SAVE_FORMAT_VERSION = "2"
+
+def export_game(game: Game) -> str:
+    """Export the game as the version, the FEN string of the start position and the moves made, separated by semicolons"""
+    return f"{SAVE_FORMAT_VERSION};{game.start_fen};{' '.join(map(move_to_str, game.move_history()))}"
+
+def import_game(data: str) -> Game:
+    """Import a game exported with export_game, raise ValueError if the data is damaged"""
+    fields = data.strip().split(";")
+    if fields[0] != SAVE_FORMAT_VERSION:
+        return import_legacy_game(data)
+    if len(fields) != 3:
+        raise ValueError(f"a saved game needs 3 fields, got {len(fields)}")
+    game = Game.from_fen(fields[1])
+    # replay the moves so that the undo history, the last move and the repetition counts are restored
+    for text in fields[2].split():
+        move = move_from_str(text)
+        if not game.is_legal_move(move):
+            raise ValueError(f"illegal move {text} in saved game")
+        game.make_move(move)
+    return game
+
+def import_legacy_game(data: str) -> Game:
+    """Import the game from a string representation"""
+    game = Game()
+    data = data.split(";")
+    game.white_castling_kingside = True if data[0] == "True" else False
+    game.white_castling_queenside = True if data[1] == "True" else False
+    game.black_castling_kingside = True if data[2] == "True" else False
+    game.black_castling_queenside = True if data[3] == "True" else False
+    game.current_player = data[4]
+    # Translate the string representation to piece codes
+    import ast # only needed for saved games, so kept out of the import of the engine
+    rows = ast.literal_eval(data[6])
+    for y in range(8):
+        for x in range(8):
+            game.position.squares[y * 8 + x] = PIECE_CODES[rows[y][x]]
+    game.set_position(game.position, int(data[5]))
+    return game
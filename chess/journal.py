@@ -0,0 +1,187 @@
+"""Crash-safe move journal: every move and undo of a game appended to a binary file as it happens
+
+The file starts with MAGIC, followed by records of a kind byte, the payload length as unsigned 16-bit
+big-endian, the payload and a CRC-32 of all three. The first record is a checkpoint: the start position of the
+game as a FEN string, every move made since then and the packed position they lead to. Moves (the encoded move
+as unsigned 16-bit) and undos follow. A record cut short by a crash fails its checksum, and resuming stops there.
+
+Resuming replays the moves of the checkpoint without checking them, as they were legal when it was written, so
+the resumed game keeps its whole history: every move can be taken back and archived. Only the records after the
+checkpoint are checked move by move.
+
+Records reach the operating system as soon as they are written, so a crash of the program loses nothing.
+fsync, which also protects against a crash of the machine, is batched over several records. Writing a
+checkpoint replaces the file by one holding just the checkpoint, which keeps the journal short.
+"""
+from typing import List, Tuple
+import argparse
+import os
+import struct
+import time
+import zlib
+
+from chess.engine import Game, move_to_str
+
+MAGIC = b"CHJ\x01"
+RECORD_HEADER = struct.Struct(">BH")
+CRC = struct.Struct(">I")
+MOVE = struct.Struct(">H")
+CHECKPOINT_HEADER = struct.Struct(">HH") # length of the FEN string and number of moves
+# Record kinds
+CHECKPOINT, MOVE_MADE, MOVE_UNDONE = 1, 2, 3
+
+def encode_record(kind: int, payload: bytes = b"") -> bytes:
+    """Return a record with its header and checksum"""
+    record = RECORD_HEADER.pack(kind, len(payload)) + payload
+    return record + CRC.pack(zlib.crc32(record))
+
+def encode_checkpoint(game: Game) -> bytes:
+    """Return the checkpoint record of a game: its start position, its moves and the position they lead to"""
+    fen = game.start_fen.encode()
+    moves = game.move_history()
+    return encode_record(CHECKPOINT, CHECKPOINT_HEADER.pack(len(fen), len(moves)) + fen + struct.pack(f">{len(moves)}H", *moves) + game.position.pack())
+
+def decode_checkpoint(payload: bytes) -> Game:
+    """Return the game of a checkpoint payload, with all its moves made"""
+    fen_length, count = CHECKPOINT_HEADER.unpack_from(payload)
+    start = CHECKPOINT_HEADER.size + fen_length
+    game = Game.from_fen(payload[CHECKPOINT_HEADER.size:start].decode())
+    for move in struct.unpack_from(f">{count}H", payload, start):
+        game.make_move(move)
+    if game.position.pack() != payload[start + 2 * count:]:
+        raise ValueError("the journal checkpoint does not match its moves")
+    return game
+
+def read_records(data: bytes) -> Tuple[List[Tuple[int, bytes]], int]:
+    """Return the (kind, payload) records of journal data and the length of the intact part, which ends at the first damaged record"""
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("not a move journal")
+    records = []
+    offset = len(MAGIC)
+    while offset + RECORD_HEADER.size <= len(data):
+        kind, length = RECORD_HEADER.unpack_from(data, offset)
+        end = offset + RECORD_HEADER.size + length
+        if end + CRC.size > len(data) or CRC.unpack_from(data, end)[0] != zlib.crc32(data[offset:end]):
+            break # torn or damaged, nothing after it can be trusted
+        records.append((kind, data[offset + RECORD_HEADER.size:end]))
+        offset = end + CRC.size
+    return records, offset
+
+def replay(records: List[Tuple[int, bytes]]) -> Game:
+    """Return the game the records of a journal describe"""
+    if not records or records[0][0] != CHECKPOINT:
+        raise ValueError("the journal does not start with a checkpoint")
+    game = decode_checkpoint(records[0][1])
+    for kind, payload in records[1:]:
+        if kind == MOVE_MADE:
+            move = MOVE.unpack(payload)[0]
+            if not game.is_legal_move(move):
+                raise ValueError(f"illegal move {move_to_str(move)} in the journal")
+            game.make_move(move)
+        elif kind == MOVE_UNDONE:
+            if not game.undo_stack:
+                raise ValueError("the journal takes back a move that was never made")
+            game.unmake_move()
+        elif kind == CHECKPOINT:
+            raise ValueError("the journal has a checkpoint after its start")
+    return game
+
+def resume(path: str) -> Game:
+    """Return the game recorded in a journal file, as far as it was written intact, with its whole move history"""
+    with open(path, "rb") as file:
+        records, _ = read_records(file.read())
+    return replay(records)
+
+class Journal:
+    """Appends the moves of a game to a journal file"""
+
+    def __init__(self, path: str, game: Game, sync_records: int = 16, sync_seconds: float = 1.0, checkpoint_records: int = 256):
+        """Start a journal of the game, replacing the file with a checkpoint of the game's current state
+
+        fsync runs once sync_records records or sync_seconds have passed since the last one, and the file is
+        rewritten as a new checkpoint every checkpoint_records records.
+        """
+        self.path = path
+        self.sync_records = sync_records
+        self.sync_seconds = sync_seconds
+        self.checkpoint_records = checkpoint_records
+        self.fd = None
+        self.checkpoint(game)
+
+    def checkpoint(self, game: Game):
+        """Atomically replace the journal by a single checkpoint of the game"""
+        temporary = self.path + ".tmp"
+        fd = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.write(fd, MAGIC + encode_checkpoint(game))
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(temporary, self.path)
+        directory = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY)
+        try:
+            os.fsync(directory) # make the rename itself durable
+        finally:
+            os.close(directory)
+        if self.fd is not None:
+            os.close(self.fd)
+        self.fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+        self.moves = game.move_history()
+        self.records = 0 # written since the checkpoint
+        self.unsynced = 0
+        self.synced_at = time.monotonic()
+
+    def record(self, game: Game):
+        """Append the moves made and taken back since the game was last recorded"""
+        history = game.move_history()
+        common = min(len(history), len(self.moves))
+        while history[:common] != self.moves[:common]: # moves are only made and taken back at the end
+            common -= 1
+        records = [encode_record(MOVE_UNDONE)] * (len(self.moves) - common)
+        records += [encode_record(MOVE_MADE, MOVE.pack(move)) for move in history[common:]]
+        if not records:
+            return
+        self.moves = history
+        if self.records + len(records) >= self.checkpoint_records:
+            self.checkpoint(game)
+            return
+        os.write(self.fd, b"".join(records))
+        self.records += len(records)
+        self.unsynced += len(records)
+        if self.unsynced >= self.sync_records or time.monotonic() - self.synced_at >= self.sync_seconds:
+            self.sync()
+
+    def sync(self):
+        """Make the records written so far durable"""
+        if self.unsynced:
+            os.fsync(self.fd)
+            self.unsynced = 0
+        self.synced_at = time.monotonic()
+
+    def close(self):
+        """Sync and close the journal file, which keeps the game for resuming"""
+        if self.fd is not None:
+            self.sync()
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def main(args: List[str]) -> int:
+    """Show the game recorded in a journal file"""
+    parser = argparse.ArgumentParser(prog="python -m chess journal", description="Inspect a move journal.")
+    parser.add_argument("path", nargs="?", default="chess.journal", help="journal file (default: chess.journal)")
+    options = parser.parse_args(args)
+    with open(options.path, "rb") as file:
+        data = file.read()
+    records, intact = read_records(data)
+    game = replay(records)
+    print(f"{len(records)} records, {intact} of {len(data)} bytes intact")
+    print(f"start: {game.start_fen}")
+    print(f"moves: {' '.join(map(move_to_str, game.move_history()))}")
+    print(f"now:   {game.to_fen()}")
+    return 0
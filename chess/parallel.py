@@ -0,0 +1,146 @@
+"""Parallel search: Lazy SMP helpers in worker processes sharing a lock-free transposition table"""
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import os
+import pickle
+
+from chess.engine import Game
+from chess.search import Searcher, SearchResult, MAX_PLY
+
+# Shared memory layout: a header of 64-bit words followed by two words per slot
+STOP_WORD, GENERATION_WORD, HEADER_WORDS = 0, 1, 2
+
+# A slot holds key ^ data and data, where data packs the entry as
+# move (16 bits) | score + SCORE_OFFSET (32 bits) | depth (8 bits) | flag (2 bits) | generation (6 bits)
+# A reader only accepts a slot whose words xor to the probed key, so a slot torn by two processes
+# writing at the same time reads as empty instead of as a wrong entry, and no lock is needed.
+SCORE_OFFSET = 1 << 31
+
+class SharedTranspositionTable:
+    """Transposition table in shared memory with the interface of search.TranspositionTable"""
+
+    def __init__(self, size: int = 1 << 18, name: str = None):
+        """Create the table, size is rounded down to a power of two, or attach to the existing table called name"""
+        size = 1 << (size.bit_length() - 1)
+        self.mask = size - 1
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=(HEADER_WORDS + 2 * size) * 8)
+            self.owner = True
+        else:
+            # worker processes share the resource tracker of the creating process, which unlinks the segment
+            self.memory = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.words = self.memory.buf.cast("Q")
+        self.generation = self.words[GENERATION_WORD]
+
+    @property
+    def name(self) -> str:
+        return self.memory.name
+
+    def next_generation(self):
+        """Start a new generation and clear the stop request, done by the process coordinating the searches"""
+        self.words[GENERATION_WORD] = (self.words[GENERATION_WORD] + 1) & 63
+        self.words[STOP_WORD] = 0
+
+    def new_search(self):
+        """Pick up the current generation, so that entries of earlier generations get replaced first"""
+        self.generation = self.words[GENERATION_WORD]
+
+    def clear(self):
+        """Remove all entries"""
+        self.memory.buf[HEADER_WORDS * 8:] = bytes(len(self.memory.buf) - HEADER_WORDS * 8)
+
+    def stopped(self) -> bool:
+        """Check if the creating process asked all searches on this table to stop"""
+        return self.words[STOP_WORD] != 0
+
+    def stop(self):
+        """Ask all searches on this table to stop"""
+        self.words[STOP_WORD] = 1
+
+    def probe(self, key: int) -> tuple | None:
+        """Return the (key, depth, score, flag, move, generation) entry stored for key, or None"""
+        index = HEADER_WORDS + ((key & self.mask) << 1)
+        words = self.words
+        data = words[index + 1]
+        if data and words[index] ^ data == key:
+            return (key, data >> 48 & 0xFF, (data >> 16 & 0xFFFFFFFF) - SCORE_OFFSET, data >> 56 & 3, data & 0xFFFF, data >> 58)
+        return None
+
+    def store(self, key: int, depth: int, score: int, flag: int, move: int):
+        """Store a search result unless the slot holds a deeper result of the current search"""
+        index = HEADER_WORDS + ((key & self.mask) << 1)
+        words = self.words
+        old = words[index + 1]
+        if old and words[index] ^ old != key and old >> 58 == self.generation and depth < old >> 48 & 0xFF:
+            return
+        data = move | (score + SCORE_OFFSET) << 16 | min(depth, 255) << 48 | flag << 56 | self.generation << 58
+        words[index] = key ^ data
+        words[index + 1] = data
+
+    def close(self):
+        """Detach from the shared memory, the creating process also frees it"""
+        self.words.release()
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+# State of a helper process: the attached table and a searcher using it
+_table = None
+_searcher = None
+
+def _attach(name: str, size: int):
+    """Worker initializer: attach to the shared table"""
+    global _table, _searcher
+    _table = SharedTranspositionTable(size, name)
+    _searcher = Searcher(table=_table, stop=_table.stopped)
+
+def _helper_search(state: bytes, depth: int, time_limit: float, node_limit: int, start_depth: int) -> SearchResult:
+    """Worker task: search the position filling the shared table until done or asked to stop"""
+    return _searcher.search(pickle.loads(state), depth, time_limit, node_limit, start_depth=start_depth)
+
+class ParallelSearcher:
+    """Lazy SMP: the main search runs in this process while helper processes search the same position
+
+    The searches share only the transposition table, the helpers fill it with results the main search
+    finds again instead of computing them. Half of the helpers start one iteration deeper so they are
+    ahead of the main search rather than duplicating it.
+    """
+
+    def __init__(self, workers: int = os.cpu_count() or 1, table_size: int = 1 << 18):
+        """Initialize the shared table and start workers - 1 helper processes"""
+        self.table = SharedTranspositionTable(table_size)
+        self.searcher = Searcher(table=self.table)
+        self.helpers = workers - 1
+        self.pool = ProcessPoolExecutor(self.helpers, initializer=_attach, initargs=(self.table.name, table_size)) if self.helpers else None
+
+    def search(self, game: Game, depth: int = MAX_PLY, time_limit: float = None, node_limit: int = None, info=None) -> SearchResult:
+        """Search like Searcher.search, nodes in the result count the work of all processes"""
+        self.table.next_generation()
+        # pickle the game once and now, the executor would pickle it later while the main search changes it
+        state = pickle.dumps(game)
+        futures = [self.pool.submit(_helper_search, state, depth, time_limit, node_limit, 1 + (index + 1) % 2) for index in range(self.helpers)]
+        try:
+            result = self.searcher.search(game, depth, time_limit, node_limit, info)
+        finally:
+            self.table.stop()
+        nodes = result.nodes
+        for future in futures:
+            helper = future.result()
+            nodes += helper.nodes
+            # a helper can only be deeper when the main search ran out of time first
+            if helper.depth > result.depth and helper.move:
+                result = helper
+        return result._replace(nodes=nodes)
+
+    def close(self):
+        """Stop the helper processes and free the shared table"""
+        if self.pool is not None:
+            self.pool.shutdown()
+        self.table.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
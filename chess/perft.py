@@ -0,0 +1,105 @@
+"""Perft: move generation correctness checks and throughput measurement"""
+from typing import List, Tuple
+import argparse
+import time
+
+from chess.engine import Game, Position, move_to_str
+
+
+# Reference positions with their known perft node counts, indexed by depth - 1
+PERFT_SUITE = [
+    ("start position", "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1", [20, 400, 8902, 197281, 4865609]),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", [48, 2039, 97862, 4085603]),
+    ("position 3", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", [14, 191, 2812, 43238, 674624]),
+    ("position 4", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", [6, 264, 9467, 422333]),
+    ("position 5", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", [44, 1486, 62379, 2103487]),
+    ("position 6", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10", [46, 2079, 89890, 3894594]),
+    ("illegal en passant 1", "3k4/3p4/8/K1P4r/8/8/8/8 b - - 0 1", [18, 92, 1670, 10138]),
+    ("illegal en passant 2", "8/8/4k3/8/2p5/8/B2P2K1/8 w - - 0 1", [13, 102, 1266, 10276]),
+    ("en passant gives check", "8/8/1k6/2b5/2pP4/8/5K2/8 b - d3 0 1", [15, 126, 1928, 13931]),
+    ("short castling gives check", "5k2/8/8/8/8/8/8/4K2R w K - 0 1", [15, 66, 1198, 6399]),
+    ("long castling gives check", "3k4/8/8/8/8/8/8/R3K3 w Q - 0 1", [16, 71, 1286, 7418]),
+    ("castling rights", "r3k2r/1b4bq/8/8/8/8/7B/R3K2R w KQkq - 0 1", [26, 1141, 27826]),
+    ("castling prevented", "r3k2r/8/3Q4/8/8/5q2/8/R3K2R b KQkq - 0 1", [44, 1494, 50509]),
+    ("promote out of check", "2K2r2/4P3/8/8/8/8/8/3k4 w - - 0 1", [11, 133, 1442, 19174]),
+    ("discovered check", "8/8/1P2K3/8/2n5/1q6/8/5k2 b - - 0 1", [29, 165, 5160, 31961]),
+    ("promote to give check", "4k3/1P6/8/8/8/8/K7/8 w - - 0 1", [9, 40, 472, 2661, 38983]),
+    ("underpromote to give check", "8/P1k5/K7/8/8/8/8/8 w - - 0 1", [6, 27, 273, 1329, 18135]),
+    ("self stalemate", "K1k5/8/P7/8/8/8/8/8 w - - 0 1", [2, 6, 13, 63, 382]),
+    ("stalemate and checkmate", "8/k1P5/8/1K6/8/8/8/8 w - - 0 1", [10, 25, 268, 926, 10857]),
+    ("double check", "8/8/2k5/5q2/5n2/8/5K2/8 b - - 0 1", [37, 183, 6559, 23527]),
+]
+
+def perft(game: Game, depth: int) -> int:
+    """Count the leaf nodes of the legal move tree of the specified depth"""
+    if depth == 0:
+        return 1
+    moves = game.legal_moves()
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        game.make_move(move)
+        nodes += perft(game, depth - 1)
+        game.unmake_move()
+    return nodes
+
+def perft_check(game: Game, depth: int) -> int:
+    """Count like perft while checking at every node that the incrementally updated key and scores match a full recompute"""
+    position = game.position
+    if position.key != position.compute_key() or (position.middlegame, position.endgame, position.phase) != position.compute_scores():
+        raise AssertionError(f"incremental state differs from a full recompute after {' '.join(move_to_str(entry[0]) for entry in game.undo_stack)}")
+    if depth == 0:
+        return 1
+    nodes = 0
+    for move in game.legal_moves():
+        game.make_move(move)
+        nodes += perft_check(game, depth - 1)
+        game.unmake_move()
+    return nodes
+
+def perft_divide(game: Game, depth: int) -> List[Tuple[int, int]]:
+    """Return the perft node count below every legal move of the current player"""
+    counts = []
+    for move in game.legal_moves():
+        game.make_move(move)
+        counts.append((move, perft(game, depth - 1)))
+        game.unmake_move()
+    return counts
+
+def main(args: List[str]) -> int:
+    """Run perft from the command line, return the exit status"""
+    parser = argparse.ArgumentParser(prog="python -m chess perft", description="Count move tree leaf nodes to check move generation and measure its speed.")
+    parser.add_argument("--depth", type=int, default=3, help="search depth in plies (default: 3)")
+    parser.add_argument("--fen", default=PERFT_SUITE[0][1], help="position to start from (default: the start position)")
+    parser.add_argument("--suite", action="store_true", help="check all reference positions up to --depth against their known node counts")
+    parser.add_argument("--check", action="store_true", help="with --suite, also verify the incremental key and evaluation at every node (slow)")
+    options = parser.parse_args(args)
+    count = perft_check if options.check else perft
+
+    if options.suite:
+        failures = total_nodes = 0
+        start = time.perf_counter()
+        for name, fen, expected in PERFT_SUITE:
+            game = Game()
+            game.set_position(Position.from_fen(fen))
+            for depth in range(1, min(options.depth, len(expected)) + 1):
+                nodes = count(game, depth)
+                total_nodes += nodes
+                status = "ok" if nodes == expected[depth - 1] else f"FAILED, expected {expected[depth - 1]}"
+                failures += nodes != expected[depth - 1]
+                print(f"{name:28} depth {depth}: {nodes:>9} {status}")
+        elapsed = time.perf_counter() - start
+        print(f"{failures} failures, {total_nodes} nodes in {elapsed:.2f}s ({total_nodes / elapsed:.0f} nodes/s)")
+        return 1 if failures else 0
+
+    game = Game()
+    game.set_position(Position.from_fen(options.fen))
+    start = time.perf_counter()
+    counts = perft_divide(game, options.depth) if options.depth > 0 else []
+    elapsed = time.perf_counter() - start
+    for move, nodes in sorted(counts, key=lambda count: move_to_str(count[0])):
+        print(f"{move_to_str(move)}: {nodes}")
+    nodes = sum(nodes for _, nodes in counts) if options.depth > 0 else 1
+    print(f"\nNodes: {nodes}\nTime: {elapsed:.3f}s\nNodes per second: {nodes / elapsed if elapsed else 0:.0f}")
+    return 0
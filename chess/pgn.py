@@ -0,0 +1,318 @@
+"""PGN ingestion: a streaming reader, standard algebraic notation (SAN) and a parallel replay through the rules engine
+
+read_games yields one game at a time while reading the file line by line, so memory use does not grow with the
+size of the file. replay_games replays every game in worker processes, resolving each SAN move against the legal
+moves of the position, and reports the first illegal or unreadable move of a game together with the position.
+Only a bounded number of chunks of games is handed to the workers at any time, which keeps the whole pipeline
+in constant memory.
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Iterable, Iterator, List, NamedTuple, TextIO
+import argparse
+import itertools
+import json
+import os
+import re
+import sys
+import time
+
+from chess.engine import Game, PAWN, KING, WHITE, TYPE_MASK, COLOUR_MASK, PIECE_LETTERS, PIECE_CODES, encode_move
+
+class PgnGame(NamedTuple):
+    """Tag pairs and movetext of one game of a PGN file"""
+    tags: Dict[str, str]
+    movetext: str
+    line: int # line of the file the game starts on
+
+TAG = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+# Comments, variations, NAGs, move numbers, results and everything else, which are the moves
+TOKEN = re.compile(r"\{[^}]*\}?|;[^\n]*|\$\d+|[()]|\d+\.+|1-0|0-1|1/2-1/2|\*|[^\s{}();$]+")
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+SAN = re.compile(r"(O-O-O|0-0-0)|(O-O|0-0)|([NBRQK])?([a-h])?([1-8])?(x)?([a-h][1-8])(?:=?([NBRQ]))?")
+SAN_SUFFIXES = "+#!?"
+EN_PASSANT = "e.p." # an optional mark after an en passant capture, written on its own or right after the move
+COMMENT_CHARACTERS = re.compile(r"[{};]")
+
+def read_games(file: TextIO) -> Iterator[PgnGame]:
+    """Yield the games of a PGN file one at a time, reading it line by line"""
+    tags, movetext = {}, []
+    start = 1
+    comment = False # inside a {...} comment spanning several lines
+    depth = 0 # of the variations open at the end of the line
+    for number, line in enumerate(file, 1):
+        if not comment:
+            stripped = line.strip()
+            if stripped.startswith("["):
+                if movetext: # a tag after movetext starts the next game
+                    yield PgnGame(tags, "".join(movetext), start)
+                    tags, movetext = {}, []
+                if not tags:
+                    start = number
+                match = TAG.match(stripped)
+                if match:
+                    tags[match[1]] = match[2].replace('\\"', '"').replace("\\\\", "\\")
+                continue
+            if not stripped or stripped.startswith("%"):
+                continue
+            if not tags and not movetext:
+                start = number
+        movetext.append(line)
+        # braces do not nest, a ; outside braces comments out the rest of the line, braces included
+        code, start_of_code = [], 0 # the parts of the line outside comments
+        for match in COMMENT_CHARACTERS.finditer(line):
+            if comment:
+                if match[0] == "}":
+                    comment = False
+                    start_of_code = match.end()
+            elif match[0] == "{":
+                code.append(line[start_of_code:match.start()])
+                comment = True
+            elif match[0] == ";":
+                code.append(line[start_of_code:match.start()])
+                start_of_code = len(line)
+                break
+        if not comment:
+            code.append(line[start_of_code:])
+        for part in code:
+            depth = max(depth + part.count("(") - part.count(")"), 0)
+        words = " ".join(code).split()
+        if words and words[-1] in RESULTS and not depth: # the result ends the game, even if the next one has no tags
+            yield PgnGame(tags, "".join(movetext), start)
+            tags, movetext = {}, []
+    if tags or movetext:
+        yield PgnGame(tags, "".join(movetext), start)
+
+def movetext_moves(movetext: str) -> Iterator[str]:
+    """Yield the SAN moves of the main line, leaving out comments, variations, NAGs, move numbers and the result"""
+    depth = 0
+    move = None # held back until the next token, which may be its en passant mark
+    for token in TOKEN.findall(movetext):
+        first = token[0]
+        if first == "(":
+            depth += 1
+        elif first == ")":
+            depth = max(depth - 1, 0)
+        elif depth or first in "{;$" or token in RESULTS or first.isdigit() and token[-1] == ".":
+            continue
+        elif move and token.rstrip(SAN_SUFFIXES) == EN_PASSANT:
+            move += token # move_from_san checks that it is an en passant capture
+        else:
+            if move:
+                yield move
+            move = token
+    if move:
+        yield move
+
+def move_from_san(game: Game, san: str) -> int:
+    """Return the legal move of the current player written in SAN, raise ValueError if there is none or more than one"""
+    text = san.rstrip(SAN_SUFFIXES)
+    en_passant = text.endswith(EN_PASSANT)
+    match = SAN.fullmatch(text[:-len(EN_PASSANT)].rstrip(SAN_SUFFIXES) if en_passant else text)
+    if match is None:
+        raise ValueError(f"not a move in standard algebraic notation: {san!r}")
+    long_castling, short_castling, letter, file, rank, capture, target, promotion = match.groups()
+    position = game.position
+    side = position.side
+    if en_passant and (letter or not capture or (ord(target[0]) - 97) + (int(target[1]) - 1) * 8 != position.ep_square):
+        raise ValueError(f"illegal move {san}, it is not an en passant capture")
+    if long_castling or short_castling:
+        king = position.king_square(side)
+        move = encode_move(king, king - 2 if long_castling else king + 2)
+        if position.squares[king] != side | KING or not game.is_legal_move(move):
+            raise ValueError(f"illegal move {san}")
+        return move
+    # a pawn capture names the file the pawn comes from and nothing else, a pawn push names no source at all
+    if not letter and (rank is not None or (file is None) == bool(capture)):
+        raise ValueError(f"not a move in standard algebraic notation: {san!r}")
+    piece = side | (PIECE_CODES[letter] if letter else PAWN)
+    target = (ord(target[0]) - 97) + (int(target[1]) - 1) * 8
+    occupant = position.squares[target]
+    if bool(capture) != bool(occupant and occupant & COLOUR_MASK != side or not letter and target == position.ep_square):
+        raise ValueError(f"illegal move {san}, {'there is nothing to capture' if capture else 'a capture needs an x'}")
+    promotion = PIECE_CODES[promotion] if promotion else 0
+    # a pawn reaching the last rank has to promote, nothing else may
+    if (promotion != 0) != (not letter and (target < 8 or target >= 56)):
+        raise ValueError(f"illegal move {san}")
+    squares = position.squares
+    info = position.check_info(side) # shared by all candidate pieces, is_legal_move would compute it for each
+    moves = []
+    # only the pieces that could make the move have their moves generated
+    sq = squares.find(piece)
+    while sq >= 0:
+        if (file is None or sq & 7 == ord(file) - 97) and (rank is None or sq >> 3 == int(rank) - 1) and target in game.legal_targets(sq, info):
+            moves.append(encode_move(sq, target, promotion))
+        sq = squares.find(piece, sq + 1)
+    if len(moves) != 1:
+        raise ValueError(f"{'ambiguous' if moves else 'illegal'} move {san}")
+    return moves[0]
+
+def move_to_san(game: Game, move: int) -> str:
+    """Return a legal move of the current player in SAN, with + for check and # for checkmate"""
+    position = game.position
+    squares = position.squares
+    source, target, promotion = move & 63, move >> 6 & 63, move >> 12
+    code = squares[source]
+    kind = code & TYPE_MASK
+    square_name = f"{chr(97 + (target & 7))}{(target >> 3) + 1}"
+    if kind == KING and abs(target - source) == 2:
+        san = "O-O" if target > source else "O-O-O"
+    elif kind == PAWN:
+        capture = source & 7 != target & 7
+        san = (f"{chr(97 + (source & 7))}x" if capture else "") + square_name + (f"={PIECE_LETTERS[promotion]}" if promotion else "")
+    else:
+        # the other pieces of the same kind that can reach the target decide how much of the source square is written
+        others = [sq for sq in range(64) if squares[sq] == code and sq != source and game.is_legal_move(encode_move(sq, target))]
+        if not others:
+            origin = ""
+        elif all(sq & 7 != source & 7 for sq in others):
+            origin = chr(97 + (source & 7))
+        elif all(sq >> 3 != source >> 3 for sq in others):
+            origin = str((source >> 3) + 1)
+        else:
+            origin = f"{chr(97 + (source & 7))}{(source >> 3) + 1}"
+        san = PIECE_LETTERS[kind] + origin + ("x" if squares[target] else "") + square_name
+    game.make_move(move)
+    player = game.current_player
+    if game.is_check(player):
+        san += "+" if game.has_valid_mvoes(player) else "#"
+    game.unmake_move()
+    return san
+
+def game_to_pgn(game: Game, tags: Dict[str, str] = {}) -> str:
+    """Return the game in PGN, with the seven required tags filled in from tags and the game"""
+    result = {"white": "1-0", "black": "0-1"}.get(game.winner, "1/2-1/2") if game.game_over else "*"
+    tags = {"Event": "?", "Site": "?", "Date": "????.??.??", "Round": "?", "White": "?", "Black": "?", **tags, "Result": result}
+    replay = Game.from_fen(game.start_fen)
+    replay.move_cache = None
+    if game.start_fen != Game().to_fen():
+        tags.update(SetUp="1", FEN=game.start_fen)
+    words = []
+    for move in game.move_history():
+        if replay.position.side == WHITE or not words:
+            words.append(f"{replay.move_number()}{'.' if replay.position.side == WHITE else '...'}")
+        words.append(move_to_san(replay, move))
+        replay.make_move(move)
+    words.append(result)
+    lines, line = [], ""
+    for word in words: # PGN lines should stay below 80 characters
+        if line and len(line) + 1 + len(word) > 79:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    lines.append(line)
+    escaped = {name: value.replace("\\", "\\\\").replace('"', '\\"') for name, value in tags.items()}
+    return "".join(f'[{name} "{value}"]\n' for name, value in escaped.items()) + "\n" + "\n".join(lines) + "\n"
+
+def replay_game(index: int, game: PgnGame, positions: bool = False) -> dict:
+    """Replay a game through the rules engine and return its record, with the first illegal move if there is one"""
+    tags = game.tags
+    record = {"game": index, "line": game.line, "white": tags.get("White", "?"), "black": tags.get("Black", "?"),
+              "result": tags.get("Result", "*"), "plies": 0, "error": None}
+    try:
+        replay = Game.from_fen(tags["FEN"]) if "FEN" in tags else Game()
+    except (ValueError, IndexError, KeyError) as error:
+        record["error"] = f"bad FEN tag {tags['FEN']!r}: {error}"
+        return record
+    replay.move_cache = None # every position is seen once, caching would only cost time
+    fens = [replay.to_fen()] if positions else None
+    for san in movetext_moves(game.movetext):
+        try:
+            move = move_from_san(replay, san)
+        except ValueError as error:
+            number = replay.move_number()
+            record["error"] = f"{number}{'.' if replay.position.side == WHITE else '...'} {san}: {error}"
+            break
+        replay.make_move(move)
+        record["plies"] += 1
+        if positions:
+            fens.append(replay.to_fen())
+    record["fen"] = replay.to_fen() # the final position, or the one the illegal move was played in
+    if positions:
+        record["positions"] = fens
+    return record
+
+def _chunks(games: Iterable[PgnGame], size: int) -> Iterator[tuple]:
+    """Yield (number of the first game, list of up to size games) for consecutive games"""
+    games = iter(games)
+    for start in itertools.count(0, size):
+        chunk = list(itertools.islice(games, size))
+        if not chunk:
+            return
+        yield start, chunk
+
+def _replay_chunk(start: int, games: List[PgnGame], positions: bool) -> List[dict]:
+    """Worker task: replay a chunk of consecutive games, the first one having the number start"""
+    return [replay_game(start + offset, game, positions) for offset, game in enumerate(games)]
+
+def replay_games(games: Iterable[PgnGame], workers: int = None, chunksize: int = 64, ordered: bool = True, positions: bool = False) -> Iterator[dict]:
+    """Replay games across a pool of worker processes and yield their records, in game order if ordered"""
+    chunks = _chunks(games, chunksize)
+    if workers == 0: # replay in this process, handy for profiling and debugging
+        for start, chunk in chunks:
+            yield from _replay_chunk(start, chunk, positions)
+        return
+    workers = workers or os.cpu_count() or 1
+    # executor.map would read the whole file into pending tasks, instead a few chunks per worker are in flight at a time
+    limit = workers * 4
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for start, chunk in chunks:
+            pending.append(executor.submit(_replay_chunk, start, chunk, positions))
+            if len(pending) < limit:
+                continue
+            if ordered:
+                yield from pending.popleft().result()
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+                    yield from future.result()
+        if ordered:
+            while pending:
+                yield from pending.popleft().result()
+        else:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+                    yield from future.result()
+
+def main(args: List[str]) -> int:
+    """Replay the games of PGN files through the rules engine and report every illegal move"""
+    parser = argparse.ArgumentParser(prog="python -m chess pgn", description="Validate the games of PGN files by replaying them.")
+    parser.add_argument("paths", nargs="+", help="PGN files to read, - for stdin")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, 0 replays in this process (default: one per core)")
+    parser.add_argument("--chunksize", type=int, default=64, help="games handed to a worker at a time (default: 64)")
+    parser.add_argument("--unordered", action="store_true", help="write the records as the games finish rather than in file order")
+    parser.add_argument("--positions", action="store_true", help="add the FEN of every position of a game to its record")
+    parser.add_argument("--output", default=None, help="JSONL file to write a record per game to, - for stdout (default: none)")
+    options = parser.parse_args(args)
+
+    def games() -> Iterator[PgnGame]:
+        for path in options.paths:
+            if path == "-":
+                yield from read_games(sys.stdin)
+                continue
+            with open(path, encoding="utf-8", errors="replace") as file:
+                yield from read_games(file)
+
+    output = None if options.output is None else sys.stdout if options.output == "-" else open(options.output, "w")
+    count = plies = errors = 0
+    start = time.perf_counter()
+    try:
+        for record in replay_games(games(), options.workers, options.chunksize, not options.unordered, options.positions):
+            count += 1
+            plies += record["plies"]
+            if record["error"] is not None:
+                errors += 1
+                print(f"game {record['game'] + 1} (line {record['line']}, {record['white']} - {record['black']}): {record['error']}\n  in {record['fen']}", file=sys.stderr)
+            if output is not None:
+                output.write(json.dumps(record) + "\n")
+    finally:
+        if output is not None and output is not sys.stdout:
+            output.close()
+    elapsed = time.perf_counter() - start
+    print(f"{count} games, {plies} plies in {elapsed:.2f}s ({count / elapsed:.0f} games/s, {plies / elapsed:.0f} plies/s), {errors} with an illegal move", file=sys.stderr)
+    return 1 if errors else 0
@@ -0,0 +1,90 @@
+"""Background precomputation of legal moves while a human player is thinking
+
+As soon as a position is reached the worker thread works out the legal moves of every piece of the side to
+move, and then of every position one move away, and stores them in the game's MoveCache. Highlighting the moves
+of a piece and checking for checkmate, stalemate or the end of the game after the move then find their answers
+in the cache. The worker uses its own copy of the game, made from a snapshot, and never touches the live one.
+"""
+import threading
+
+from chess.engine import Game, MoveCache, COLOUR_MASK
+
+class Precomputer:
+    """Worker thread filling a move cache for the position last submitted, stopping early when a newer one arrives"""
+
+    def __init__(self, cache: MoveCache):
+        self.cache = cache
+        self.condition = threading.Condition()
+        self.snapshot = None # position waiting to be worked on
+        self.cancelled = threading.Event() # set to abandon the job in progress
+        self.stopped = False
+        self.idle = threading.Event() # set while the worker has nothing to do
+        self.idle.set()
+        self.positions = 0 # positions whose moves were stored, for tests and benchmarks
+        self.thread = threading.Thread(target=self.run, name="precompute", daemon=True)
+        self.thread.start()
+
+    def submit(self, game: Game):
+        """Start working on the game's current position, abandoning the previous one"""
+        snapshot = game.snapshot()
+        with self.condition:
+            self.cancelled.set()
+            self.snapshot = snapshot
+            self.idle.clear()
+            self.condition.notify()
+
+    def cancel(self):
+        """Abandon the current job, e.g. while the computer searches and needs the processor"""
+        with self.condition:
+            self.cancelled.set()
+            self.snapshot = None
+
+    def wait(self, timeout: float = None) -> bool:
+        """Wait until the worker has finished or abandoned its job, return False on timeout"""
+        return self.idle.wait(timeout)
+
+    def stop(self):
+        """Stop the worker thread"""
+        with self.condition:
+            self.stopped = True
+            self.cancelled.set()
+            self.condition.notify()
+        self.thread.join()
+
+    def run(self):
+        """Take the latest submitted position and work on it, until stopped"""
+        while True:
+            with self.condition:
+                while self.snapshot is None and not self.stopped:
+                    self.idle.set()
+                    self.condition.wait()
+                if self.stopped:
+                    self.idle.set()
+                    return
+                snapshot, self.snapshot = self.snapshot, None
+                self.cancelled.clear()
+            game = Game.from_snapshot(snapshot)
+            game.move_cache = None
+            if self.fill(game):
+                # the positions after each legal move, the opponent's replies are known before the move is made
+                for move in game.legal_moves():
+                    game.make_move(move)
+                    complete = self.fill(game)
+                    game.unmake_move()
+                    if not complete:
+                        break
+
+    def fill(self, game: Game) -> bool:
+        """Store the legal moves of the game's current position in the cache, return False if cancelled first"""
+        position = game.position
+        squares, side = position.squares, position.side
+        info = position.check_info(side)
+        targets = {}
+        for sq in range(64):
+            if squares[sq] and squares[sq] & COLOUR_MASK == side:
+                if self.cancelled.is_set():
+                    return False
+                targets[sq] = tuple(game.legal_targets(sq, info))
+        self.cache.store(position.key, info, targets)
+        self.positions += 1
+        return True
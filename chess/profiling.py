@@ -0,0 +1,166 @@
+"""Opt-in instrumentation of the hot paths: call counts, cumulative times and per-turn summaries
+
+Nothing is instrumented until enable() is called, which python -m chess does when the CHESS_PROFILE environment
+variable or the --profile option is set. enable() replaces the functions in HOT_PATHS with counting wrappers and
+disable() puts the originals back, so a run without profiling executes the unmodified functions. Only calls made
+by the main thread are counted.
+
+The output is chosen by the file name: a .json file gets the counters and the per-turn summaries, a .prof or
+.pstats file gets cProfile statistics of everything instead, for python -m pstats or snakeviz. Without a file
+the summary is printed to stderr.
+"""
+from typing import Dict, List
+import cProfile
+import functools
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+
+ENV_VARIABLE = "CHESS_PROFILE"
+
+# (module, attribute path) of the instrumented functions
+HOT_PATHS = (
+    ("chess.engine", "Game.make_move"),
+    ("chess.engine", "Game.unmake_move"),
+    ("chess.engine", "Game.legal_moves"),
+    ("chess.engine", "Game.legal_targets"),
+    ("chess.engine", "Game.is_legal_move"),
+    ("chess.engine", "Game.is_check"),
+    ("chess.engine", "Game.is_check_after_move"),
+    ("chess.engine", "Game.has_valid_mvoes"),
+    ("chess.engine", "Game.check_game_over"),
+    ("chess.engine", "Position.targets"),
+    ("chess.engine", "Position.is_square_attacked"),
+    ("chess.engine", "Position.check_info"),
+    ("chess.engine", "Piece.get_valid_moves"),
+    ("chess.engine", "board_to_str"),
+    ("chess.ui", "Renderer.frame"),
+    ("chess.ui", "render_board"),
+    ("chess.search", "Searcher.search"),
+)
+# A call of this function outside all other instrumented calls is a move made in the game and ends a turn
+TURN_FUNCTION = "Game.make_move"
+
+class Profiler:
+    """Call counts and cumulative times of the instrumented functions, with a summary of every turn"""
+
+    def __init__(self, output: str = None):
+        self.output = output
+        self.calls: Dict[str, int] = {name: 0 for _, name in HOT_PATHS}
+        self.seconds: Dict[str, float] = {name: 0.0 for _, name in HOT_PATHS}
+        self.active: Dict[str, bool] = {name: False for _, name in HOT_PATHS}
+        self.depth = 0 # instrumented calls in progress
+        self.busy = 0.0 # time spent in outermost instrumented calls
+        self.turns: List[dict] = []
+        self.turn_start = (dict(self.calls), dict(self.seconds), 0.0, time.perf_counter())
+        self.cprofile = cProfile.Profile() if output is not None and output.endswith((".prof", ".pstats")) else None
+
+    def wrap(self, name: str, function):
+        """Return a wrapper of the function counting its calls and timing them"""
+        calls, seconds, active = self.calls, self.seconds, self.active
+        turn = name == TURN_FUNCTION
+        main_thread = threading.main_thread()
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            # only the game itself is counted, work of background threads like chess.precompute would make up turns
+            if threading.current_thread() is not main_thread:
+                return function(*args, **kwargs)
+            calls[name] += 1
+            if active[name]: # a recursive call, its time is part of the outer one
+                return function(*args, **kwargs)
+            active[name] = True
+            self.depth += 1
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                seconds[name] += elapsed
+                active[name] = False
+                self.depth -= 1
+                if self.depth == 0:
+                    self.busy += elapsed
+                    if turn:
+                        self.end_turn(args[0])
+        return wrapper
+
+    def end_turn(self, game):
+        """Record what happened since the previous turn ended, game is the game a move was just made in"""
+        calls, seconds, busy, start = self.turn_start
+        now = time.perf_counter()
+        self.turns.append({
+            "turn": len(self.turns) + 1,
+            "player": "black" if game.current_player == "white" else "white",
+            "seconds": now - start,
+            "busy_seconds": self.busy - busy,
+            "calls": {name: count - calls[name] for name, count in self.calls.items() if count != calls[name]},
+            "times": {name: total - seconds[name] for name, total in self.seconds.items() if total != seconds[name]},
+        })
+        self.turn_start = (dict(self.calls), dict(self.seconds), self.busy, now)
+
+    def summary(self) -> str:
+        """Return the totals of every instrumented function that ran and a line per turn"""
+        lines = [f"{'function':28} {'calls':>10} {'seconds':>9} {'us/call':>8}"]
+        for name, count in sorted(self.calls.items(), key=lambda item: -self.seconds[item[0]]):
+            if count:
+                lines.append(f"{name:28} {count:10} {self.seconds[name]:9.3f} {self.seconds[name] * 1e6 / count:8.1f}")
+        for turn in self.turns:
+            calls = turn["calls"]
+            lines.append(f"turn {turn['turn']:3} {turn['player']:5}: {turn['busy_seconds'] * 1000:8.1f} ms in the engine, "
+                         f"{calls.get('Position.targets', 0)} piece move generations, {calls.get('Position.is_square_attacked', 0)} attack tests, "
+                         f"{calls.get('Game.make_move', 0)} moves made")
+        return "\n".join(lines)
+
+    def dump(self):
+        """Write the statistics to the output file, or the summary to stderr if there is none"""
+        if self.cprofile is not None:
+            self.cprofile.dump_stats(self.output) # this stops the profiler, so it is started again
+            self.cprofile.enable()
+        elif self.output is not None:
+            with open(self.output, "w") as file:
+                json.dump({"calls": self.calls, "seconds": self.seconds, "turns": self.turns}, file, indent=1)
+        else:
+            print(self.summary(), file=sys.stderr)
+
+profiler: Profiler | None = None
+_originals = []
+
+def enable(output: str = None) -> Profiler:
+    """Start profiling: instrument the hot paths, or with a .prof or .pstats output run cProfile"""
+    global profiler
+    if profiler is not None:
+        return profiler
+    profiler = Profiler(output)
+    if profiler.cprofile is not None:
+        profiler.cprofile.enable()
+        return profiler
+    for module_name, name in HOT_PATHS:
+        owner = importlib.import_module(module_name)
+        *path, attribute = name.split(".")
+        for part in path:
+            owner = getattr(owner, part)
+        function = getattr(owner, attribute)
+        _originals.append((owner, attribute, function))
+        setattr(owner, attribute, profiler.wrap(name, function))
+    return profiler
+
+def disable() -> Profiler | None:
+    """Stop profiling, restore the original functions and return the profiler with what it collected"""
+    global profiler
+    stopped, profiler = profiler, None
+    while _originals:
+        owner, attribute, function = _originals.pop()
+        setattr(owner, attribute, function)
+    if stopped is not None and stopped.cprofile is not None:
+        stopped.cprofile.disable()
+    return stopped
+
+def enable_from_environment() -> Profiler | None:
+    """Enable profiling if CHESS_PROFILE is set, its value is the output file or 1 for a summary on stderr"""
+    value = os.environ.get(ENV_VARIABLE)
+    if not value or value == "0":
+        return None
+    return enable(None if value == "1" else value)
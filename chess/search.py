@@ -0,0 +1,317 @@
+"""Computer player: negamax alpha-beta search with iterative deepening, quiescence search and a transposition table"""
+from typing import List, NamedTuple
+import argparse
+import random
+import time
+
+from chess.engine import Game, Position, EMPTY, PAWN, TYPE_MASK, move_to_str
+
+MATE = 100000 # score of giving mate right now, mates further away score a bit lower
+INFINITY = 1000000
+MAX_PLY = 128
+
+# Transposition table entry flags: the stored score is exact, a lower bound (fail high) or an upper bound (fail low)
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+
+def evaluate(game: Game) -> int:
+    """Return the tapered material and piece-square score in centipawns from the view of the current player"""
+    return game.position.evaluate()
+
+class TranspositionTable:
+    """Fixed-size table of search results indexed by position key, deeper results are kept over shallower ones"""
+
+    def __init__(self, size: int = 1 << 18):
+        """Initialize the table, size is rounded down to a power of two"""
+        size = 1 << (size.bit_length() - 1)
+        self.mask = size - 1
+        self.entries = [None] * size
+        self.generation = 0
+
+    def new_search(self):
+        """Age the stored entries so that results of earlier searches get replaced first"""
+        self.generation += 1
+
+    def clear(self):
+        """Remove all entries"""
+        self.entries = [None] * (self.mask + 1)
+
+    def probe(self, key: int) -> tuple | None:
+        """Return the (key, depth, score, flag, move, generation) entry stored for key, or None"""
+        entry = self.entries[key & self.mask]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def store(self, key: int, depth: int, score: int, flag: int, move: int):
+        """Store a search result unless the slot holds a deeper result of the current search"""
+        index = key & self.mask
+        entry = self.entries[index]
+        if entry is None or entry[0] == key or entry[5] != self.generation or depth >= entry[1]:
+            self.entries[index] = (key, depth, score, flag, move, self.generation)
+
+class SearchResult(NamedTuple):
+    """Outcome of a search: the best move, its score and how much work it took"""
+    move: int
+    score: int
+    depth: int
+    nodes: int
+    seconds: float
+    pv: List[int]
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time or node budget is used up"""
+
+class Searcher:
+    """Iterative deepening alpha-beta search that keeps its transposition table between searches"""
+
+    def __init__(self, table_size: int = 1 << 18, evaluate=evaluate, table: TranspositionTable = None, stop=None):
+        """Initialize the searcher with a transposition table of the specified number of entries
+
+        A table shared with other searchers can be passed instead, and stop is an optional callable that
+        returns True once the search should be abandoned.
+        """
+        self.table = TranspositionTable(table_size) if table is None else table
+        self.evaluate = evaluate
+        self.stop = stop
+        self.nodes = 0
+        self.killers = [[0, 0] for _ in range(MAX_PLY)]
+        self.deadline = None
+        self.node_limit = None
+
+    def search(self, game: Game, depth: int = MAX_PLY, time_limit: float = None, node_limit: int = None, info=None, start_depth: int = 1) -> SearchResult:
+        """Search the current position until the depth, time or node limit is reached and return the best move found
+
+        info is called with the SearchResult of every completed iteration, start_depth lets helper searches
+        of a parallel search run ahead of the main one.
+        """
+        start = time.perf_counter()
+        self.deadline = start + time_limit if time_limit else None
+        self.node_limit = node_limit
+        self.nodes = 0
+        self.killers = [[0, 0] for _ in range(MAX_PLY)]
+        self.table.new_search()
+        moves = game.legal_moves()
+        if not moves:
+            return SearchResult(0, -MATE if game.is_check(game.current_player) else 0, 0, 0, 0.0, [])
+        result = SearchResult(moves[0], 0, 0, 0, 0.0, [moves[0]])
+        undo_depth = len(game.undo_stack)
+        for iteration in range(min(start_depth, depth), depth + 1):
+            try:
+                score = self.negamax(game, iteration, -INFINITY, INFINITY, 0)
+            except SearchTimeout:
+                # take back the moves of the interrupted iteration and keep the last completed one
+                while len(game.undo_stack) > undo_depth:
+                    game.unmake_move()
+                break
+            pv = self.principal_variation(game, iteration)
+            result = SearchResult(pv[0] if pv else result.move, score, iteration, self.nodes, time.perf_counter() - start, pv)
+            if info is not None:
+                info(result)
+            if abs(score) >= MATE - MAX_PLY: # a forced mate was found, searching deeper will not change the move
+                break
+        return result._replace(nodes=self.nodes, seconds=time.perf_counter() - start)
+
+    def negamax(self, game: Game, depth: int, alpha: int, beta: int, ply: int) -> int:
+        """Return the score of the position from the view of the current player, searching depth plies"""
+        self.nodes += 1
+        if self.nodes & 1023 == 0:
+            self.check_limits()
+        position = game.position
+        if ply > 0:
+            # a repetition or the 75 moves rule inside the tree is scored as a draw
+            if game.repetitions[position.key] > 1 or game.moves_since_last_significant >= 150:
+                return 0
+            # mate distance pruning: no line can beat a mate that was already found closer to the root
+            alpha = max(alpha, -MATE + ply)
+            beta = min(beta, MATE - ply - 1)
+            if alpha >= beta:
+                return alpha
+            if ply >= MAX_PLY - 1:
+                return self.evaluate(game)
+            # with few pieces left an endgame table knows the exact outcome
+            if game.tablebases is not None and (result := game.tablebases.probe(position)) is not None:
+                wdl, plies = result
+                return 0 if wdl == 0 else MATE - ply - plies if wdl > 0 else -MATE + ply + plies
+
+        in_check = game.is_check(game.current_player)
+        if in_check:
+            depth += 1 # look one ply further when in check, check sequences are forcing
+        if depth <= 0:
+            return self.quiescence(game, alpha, beta, ply)
+
+        entry = self.table.probe(position.key)
+        table_move = 0
+        if entry is not None:
+            table_move = entry[4]
+            if ply > 0 and entry[1] >= depth:
+                score = score_from_table(entry[2], ply)
+                if entry[3] == EXACT or (entry[3] == LOWER_BOUND and score >= beta) or (entry[3] == UPPER_BOUND and score <= alpha):
+                    return score
+
+        moves = game.legal_moves()
+        if not moves:
+            return -MATE + ply if in_check else 0
+
+        original_alpha = alpha
+        best_score, best_move = -INFINITY, moves[0]
+        for move in self.order_moves(game, moves, table_move, ply):
+            game.make_move(move)
+            score = -self.negamax(game, depth - 1, -beta, -alpha, ply + 1)
+            game.unmake_move()
+            if score > best_score:
+                best_score, best_move = score, move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        if not is_capture(position, move):
+                            killers = self.killers[ply]
+                            if killers[0] != move:
+                                killers[1], killers[0] = killers[0], move
+                        break
+
+        flag = UPPER_BOUND if best_score <= original_alpha else LOWER_BOUND if best_score >= beta else EXACT
+        self.table.store(position.key, depth, score_to_table(best_score, ply), flag, best_move)
+        return best_score
+
+    def quiescence(self, game: Game, alpha: int, beta: int, ply: int) -> int:
+        """Resolve captures and promotions until the position is quiet, then return its static score"""
+        self.nodes += 1
+        if self.nodes & 1023 == 0:
+            self.check_limits()
+        stand_pat = self.evaluate(game)
+        if stand_pat >= beta or ply >= MAX_PLY - 1:
+            return stand_pat
+        alpha = max(alpha, stand_pat)
+        position = game.position
+        captures = [move for move in game.legal_moves() if move >> 12 or is_capture(position, move)]
+        for move in sorted(captures, key=lambda move: -mvv_lva(position, move)):
+            game.make_move(move)
+            score = -self.quiescence(game, -beta, -alpha, ply + 1)
+            game.unmake_move()
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    break
+        return alpha
+
+    def order_moves(self, game: Game, moves: List[int], table_move: int, ply: int) -> List[int]:
+        """Sort moves so that the likely best ones are searched first: table move, captures by MVV-LVA, killers, the rest"""
+        position = game.position
+        killers = self.killers[ply]
+        def priority(move: int) -> int:
+            if move == table_move:
+                return 1 << 20
+            if is_capture(position, move) or move >> 12:
+                return (1 << 16) + mvv_lva(position, move)
+            if move == killers[0]:
+                return 1 << 15
+            if move == killers[1]:
+                return (1 << 15) - 1
+            return 0
+        return sorted(moves, key=priority, reverse=True)
+
+    def principal_variation(self, game: Game, depth: int) -> List[int]:
+        """Follow the best moves stored in the transposition table from the current position"""
+        pv = []
+        seen = set()
+        while len(pv) < depth:
+            entry = self.table.probe(game.position.key)
+            if entry is None or game.position.key in seen or entry[4] not in game.legal_moves():
+                break
+            seen.add(game.position.key)
+            pv.append(entry[4])
+            game.make_move(entry[4])
+        for _ in pv:
+            game.unmake_move()
+        return pv
+
+    def check_limits(self):
+        """Abort the search once the time or node budget is used up"""
+        if (self.deadline is not None and time.perf_counter() >= self.deadline) or (self.node_limit is not None and self.nodes >= self.node_limit):
+            raise SearchTimeout()
+        if self.stop is not None and self.stop():
+            raise SearchTimeout()
+
+def is_capture(position: Position, move: int) -> bool:
+    """Check if the move takes a piece, including en passant"""
+    target = move >> 6 & 63
+    return position.squares[target] != EMPTY or (target == position.ep_square and position.squares[move & 63] & TYPE_MASK == PAWN)
+
+def mvv_lva(position: Position, move: int) -> int:
+    """Most valuable victim, least valuable attacker: prefer taking big pieces with small ones"""
+    squares = position.squares
+    victim = squares[move >> 6 & 63] & TYPE_MASK or PAWN # an empty target square is en passant or a plain promotion
+    attacker = squares[move & 63] & TYPE_MASK
+    return victim * 8 - attacker + (move >> 12) * 8
+
+def score_to_table(score: int, ply: int) -> int:
+    """Store mate scores relative to the position instead of the root"""
+    if score >= MATE - MAX_PLY:
+        return score + ply
+    if score <= -MATE + MAX_PLY:
+        return score - ply
+    return score
+
+def score_from_table(score: int, ply: int) -> int:
+    """Turn a stored mate score back into one relative to the root"""
+    if score >= MATE - MAX_PLY:
+        return score - ply
+    if score <= -MATE + MAX_PLY:
+        return score + ply
+    return score
+
+def format_score(score: int) -> str:
+    """Return the score in pawns, or as moves to mate"""
+    if abs(score) >= MATE - MAX_PLY:
+        moves = (MATE - abs(score) + 1) // 2
+        return f"mate {moves if score > 0 else -moves}"
+    return f"{score / 100:+.2f}"
+
+class ComputerPlayer:
+    """Search based move chooser for game_loop and self-play, keeping its transposition table between moves"""
+
+    def __init__(self, time_limit: float = None, node_limit: int = None, depth: int = MAX_PLY):
+        self.searcher = Searcher()
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.depth = depth
+
+    def __call__(self, game: Game, rng: random.Random = None) -> int:
+        """Return a move from the game's opening book, or the move the search considers best"""
+        return game.book_move(rng) or self.searcher.search(game, self.depth, self.time_limit, self.node_limit).move
+
+_selfplay_player = None
+
+def engine_player(game: Game, rng: random.Random) -> int:
+    """Self-play player searching a fixed number of nodes per move, so results do not depend on machine speed"""
+    global _selfplay_player
+    if _selfplay_player is None:
+        _selfplay_player = ComputerPlayer(node_limit=5000)
+    return _selfplay_player(game, rng)
+
+def main(args: List[str]) -> int:
+    """Search a position from the command line and print every completed iteration"""
+    from chess.perft import PERFT_SUITE
+    parser = argparse.ArgumentParser(prog="python -m chess search", description="Search a position for the best move.")
+    parser.add_argument("--fen", default=PERFT_SUITE[0][1], help="position to search (default: the start position)")
+    parser.add_argument("--depth", type=int, default=MAX_PLY, help="maximum depth in plies")
+    parser.add_argument("--time", type=float, default=None, help="time budget in seconds (default: 5 unless --depth or --nodes is given)")
+    parser.add_argument("--nodes", type=int, default=None, help="node budget")
+    parser.add_argument("--workers", type=int, default=1, help="search processes, more than one runs a parallel search")
+    options = parser.parse_args(args)
+    if options.time is None and options.nodes is None and options.depth == MAX_PLY:
+        options.time = 5.0
+
+    game = Game()
+    game.set_position(Position.from_fen(options.fen))
+    def info(result: SearchResult):
+        nps = result.nodes / result.seconds if result.seconds else 0
+        print(f"depth {result.depth:2} score {format_score(result.score):>8} nodes {result.nodes:8} nps {nps:7.0f} time {result.seconds:6.2f}s pv {' '.join(map(move_to_str, result.pv))}")
+    if options.workers > 1:
+        from chess.parallel import ParallelSearcher
+        with ParallelSearcher(options.workers) as searcher:
+            result = searcher.search(game, options.depth, options.time, options.nodes, info)
+    else:
+        result = Searcher().search(game, options.depth, options.time, options.nodes, info)
+    print(f"bestmove {move_to_str(result.move) if result.move else '(none)'}")
+    return 0
@@ -0,0 +1,134 @@
+"""Headless self-play: play many games between move choosers across worker processes and stream the results as JSONL"""
+from typing import Callable, Dict, Iterator, List
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import importlib
+import json
+import os
+import random
+import sys
+import time
+
+from chess.engine import Game, PAWN, TYPE_MASK, PIECE_VALUES, move_to_str
+from chess.search import engine_player
+
+# A player chooses one of the legal moves of the current player
+Player = Callable[[Game, random.Random], int]
+
+def random_player(game: Game, rng: random.Random) -> int:
+    """Play a uniformly random legal move"""
+    return rng.choice(game.legal_moves())
+
+def greedy_player(game: Game, rng: random.Random) -> int:
+    """Play the move that wins the most material right away, picking randomly between equally good moves"""
+    squares = game.position.squares
+    ep_square = game.position.ep_square
+    best_gain, best_moves = None, []
+    for move in game.legal_moves():
+        source, target, promotion = move & 63, move >> 6 & 63, move >> 12
+        gain = PIECE_VALUES[squares[target] & TYPE_MASK]
+        if target == ep_square and squares[source] & TYPE_MASK == PAWN:
+            gain = PIECE_VALUES[PAWN]
+        if promotion:
+            gain += PIECE_VALUES[promotion] - PIECE_VALUES[PAWN]
+        if best_gain is None or gain > best_gain:
+            best_gain, best_moves = gain, [move]
+        elif gain == best_gain:
+            best_moves.append(move)
+    return rng.choice(best_moves)
+
+# Built-in players, any other player can be given as "package.module:function"
+PLAYERS: Dict[str, Player] = {
+    "random": random_player,
+    "greedy": greedy_player,
+    "engine": engine_player,
+}
+
+def load_player(spec: str) -> Player:
+    """Return the player named by spec, either a built-in name or "package.module:function\""""
+    if spec in PLAYERS:
+        return PLAYERS[spec]
+    module, _, function = spec.partition(":")
+    if not function:
+        raise ValueError(f"unknown player {spec!r}, use one of {', '.join(PLAYERS)} or package.module:function")
+    return getattr(importlib.import_module(module), function)
+
+def play_game(index: int, white: str, black: str, seed: int, max_plies: int = 0) -> dict:
+    """Play one game between the specified players and return its result record"""
+    rng = random.Random(seed)
+    players = {"white": load_player(white), "black": load_player(black)}
+    game = Game()
+    moves = []
+    start = time.perf_counter()
+    while game.check_game_over() is None:
+        if max_plies and len(moves) >= max_plies:
+            game.end_game("unfinished", "ply limit", f"Game stopped after {max_plies} plies.")
+            break
+        move = players[game.current_player](game, rng)
+        game.make_move(move)
+        moves.append(move_to_str(move))
+    return {
+        "game": index, "white": white, "black": black, "seed": seed,
+        "result": game.result, "winner": game.winner, "termination": game.termination,
+        "plies": len(moves), "seconds": round(time.perf_counter() - start, 4), "moves": " ".join(moves),
+    }
+
+def run_selfplay(games: int, white: str, black: str, workers: int = None, seed: int = 0, max_plies: int = 0) -> Iterator[dict]:
+    """Play the games across a pool of worker processes and yield their records in game order as they finish"""
+    # resolve the players once up front so that a typo fails before any worker starts
+    load_player(white)
+    load_player(black)
+    indices = range(games)
+    arguments = (indices, [white] * games, [black] * games, [seed + index for index in indices], [max_plies] * games)
+    if workers == 0: # play in this process, handy for profiling and debugging
+        yield from map(play_game, *arguments)
+        return
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # small chunks keep every worker busy while still streaming results early
+        yield from executor.map(play_game, *arguments, chunksize=max(1, games // (workers * 8)))
+
+def main(args: List[str]) -> int:
+    """Run self-play from the command line"""
+    parser = argparse.ArgumentParser(prog="python -m chess selfplay", description="Play games between computer players and write one JSON line per game.")
+    parser.add_argument("--games", type=int, default=100, help="number of games to play (default: 100)")
+    parser.add_argument("--white", default="random", help=f"white player: {', '.join(PLAYERS)} or package.module:function (default: random)")
+    parser.add_argument("--black", default="random", help="black player (default: random)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, 0 plays in this process (default: one per core)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game, game i uses seed + i (default: 0)")
+    parser.add_argument("--max-plies", type=int, default=0, help="stop a game after this many plies, 0 for no limit (default: 0)")
+    parser.add_argument("--output", default="-", help="JSONL file to write, - for stdout (default: -)")
+    parser.add_argument("--db", default=None, help="also record the results and archive the games in this statistics database at the end")
+    options = parser.parse_args(args)
+
+    output = sys.stdout if options.output == "-" else open(options.output, "w")
+    terminations = {}
+    records = []
+    plies = 0
+    start = time.perf_counter()
+    try:
+        for record in run_selfplay(options.games, options.white, options.black, options.workers, options.seed, options.max_plies):
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+            key = f"{record['termination']} ({record['winner']})" if record["winner"] else record["termination"]
+            terminations[key] = terminations.get(key, 0) + 1
+            plies += record["plies"]
+            if options.db is not None:
+                records.append(record)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    if options.db is not None:
+        import sqlite3
+        from chess.stats import db_setup, record_results
+        from chess.archive import archive_games, replay_record
+        db = sqlite3.connect(options.db)
+        db_setup(db)
+        record_results(db, ((record["white"], record["black"], (record["result"], record["winner"])) for record in records))
+        archive_games(db, ((replay_record(record), record["white"], record["black"]) for record in records))
+        db.close()
+    elapsed = time.perf_counter() - start
+    print(f"{options.games} games, {plies} plies in {elapsed:.2f}s ({options.games / elapsed:.1f} games/s, {plies / elapsed:.0f} plies/s)", file=sys.stderr)
+    for key, count in sorted(terminations.items(), key=lambda item: -item[1]):
+        print(f"  {key}: {count}", file=sys.stderr)
+    return 0
@@ -0,0 +1,177 @@
+"""Game server: many concurrent games in one process, played over a line protocol on TCP or a Unix socket
+
+Every command is one line and gets one reply line, starting with "ok" or "error":
+
+    new             start a game and play in it              -> ok <game id>
+    join <id>       play in an existing game                 -> ok <game id>
+    move <move>     make a move in coordinate notation       -> ok <status>
+    legal           list the legal moves                     -> ok <move> <move> ...
+    state           describe the game                        -> ok <game id> <status> <FEN string>
+    close           end a game you started and forget it,    -> ok
+                    or leave a game you joined
+    quit            close the connection
+
+The status is "ongoing" or how the game ended, e.g. "checkmate". A game lives until it is closed or the
+connection that started it goes away.
+"""
+from typing import Dict, List, Set
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+from chess.engine import Game, move_to_str, move_from_str
+
+class Session:
+    """State of one connection: the game it plays in and the games it started"""
+    __slots__ = ("game_id", "owned")
+
+    def __init__(self):
+        self.game_id = None
+        self.owned: Set[int] = set()
+
+class GameServer:
+    """Hosts games in memory and answers the line protocol for any number of connections"""
+
+    def __init__(self):
+        self.games: Dict[int, Game] = {}
+        self.next_id = 1
+
+    def handle(self, session: Session, line: str) -> str:
+        """Execute one command line and return the reply line"""
+        command, _, argument = line.strip().partition(" ")
+        if command == "new":
+            game_id, self.next_id = self.next_id, self.next_id + 1
+            self.games[game_id] = Game()
+            session.owned.add(game_id)
+            session.game_id = game_id
+            return f"ok {game_id}"
+        if command == "join":
+            if not argument.isdigit() or int(argument) not in self.games:
+                return f"error no game {argument}"
+            session.game_id = int(argument)
+            return f"ok {session.game_id}"
+        game = self.games.get(session.game_id)
+        if game is None:
+            return "error no game, start one with new" if command in ("move", "legal", "state", "close") else f"error unknown command {command!r}"
+        if command == "move":
+            if game.game_over:
+                return f"error game over: {game.termination}"
+            try:
+                move = move_from_str(argument)
+            except ValueError as error:
+                return f"error {error}"
+            if not game.is_legal_move(move):
+                return f"error illegal move {argument}"
+            game.make_move(move)
+            game.check_game_over()
+            return f"ok {status(game)}"
+        if command == "legal":
+            return "ok " + " ".join(map(move_to_str, game.legal_moves())) if not game.game_over else "ok"
+        if command == "state":
+            return f"ok {session.game_id} {status(game)} {game.to_fen()}"
+        if command == "close":
+            if session.game_id in session.owned: # only the connection that started a game may end it
+                del self.games[session.game_id]
+                session.owned.discard(session.game_id)
+            session.game_id = None
+            return "ok"
+        return f"error unknown command {command!r}"
+
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Answer the commands of one connection until it closes or quits"""
+        session = Session()
+        try:
+            while line := await reader.readline():
+                if line.strip() == b"quit":
+                    break
+                writer.write(self.handle(session, line.decode("ascii", "replace")).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for game_id in session.owned:
+                self.games.pop(game_id, None)
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765, path: str = None):
+        """Listen on the Unix socket path if given, on host and port otherwise, until cancelled"""
+        # a deep listen backlog lets thousands of clients connect at once
+        if path is not None:
+            server = await asyncio.start_unix_server(self.serve_connection, path, backlog=4096)
+        else:
+            server = await asyncio.start_server(self.serve_connection, host, port, backlog=4096)
+        print(f"serving on {path or f'{host}:{port}'}", file=sys.stderr, flush=True)
+        async with server:
+            await server.serve_forever()
+
+def status(game: Game) -> str:
+    """Return "ongoing" or how the game ended"""
+    return game.termination.replace(" ", "-") if game.game_over else "ongoing"
+
+async def load_client(connect, plies: int, latencies: List[float], rng: random.Random):
+    """Play random moves on a fresh game, starting a new one whenever a game ends, and record each move's latency"""
+    reader, writer = await connect()
+    async def request(line: str) -> str:
+        writer.write(line.encode() + b"\n")
+        await writer.drain()
+        reply = (await reader.readline()).decode().rstrip("\n")
+        if not reply.startswith("ok"):
+            raise RuntimeError(f"{line!r} failed: {reply}")
+        return reply
+    await request("new")
+    for _ in range(plies):
+        moves = (await request("legal")).split()[1:]
+        start = time.perf_counter()
+        reply = await request(f"move {rng.choice(moves)}")
+        latencies.append(time.perf_counter() - start)
+        if reply != "ok ongoing":
+            await request("close")
+            await request("new")
+    writer.write(b"quit\n")
+    writer.close()
+
+async def load_test(clients: int, plies: int, host: str = "127.0.0.1", port: int = 8765, path: str = None, seed: int = 0) -> dict:
+    """Drive a running server with simultaneous clients and return the throughput and move latency percentiles"""
+    if path is not None:
+        connect = lambda: asyncio.open_unix_connection(path)
+    else:
+        connect = lambda: asyncio.open_connection(host, port)
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(load_client(connect, plies, latencies, random.Random(seed + index)) for index in range(clients)))
+    seconds = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "clients": clients,
+        "moves": len(latencies),
+        "seconds": seconds,
+        "moves_per_second": len(latencies) / seconds,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, len(latencies) * 99 // 100)] * 1000,
+    }
+
+def main(args: List[str]) -> int:
+    """Run the server, or with --load a load test against a running server"""
+    parser = argparse.ArgumentParser(prog="python -m chess serve", description="Host many games over a line protocol.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on or connect to (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port (default: 8765)")
+    parser.add_argument("--unix", metavar="PATH", default=None, help="use a Unix socket instead of TCP")
+    parser.add_argument("--load", metavar="CLIENTS", type=int, default=None, help="instead of serving, load test a running server with this many clients")
+    parser.add_argument("--plies", type=int, default=200, help="moves each load test client makes (default: 200)")
+    options = parser.parse_args(args)
+    if options.load is not None:
+        stats = asyncio.run(load_test(options.load, options.plies, options.host, options.port, options.unix))
+        print(f"{stats['clients']} clients: {stats['moves']} moves in {stats['seconds']:.2f}s ({stats['moves_per_second']:.0f} moves/s), "
+              f"move latency p50 {stats['p50_ms']:.2f} ms, p99 {stats['p99_ms']:.2f} ms")
+        return 0
+    if options.unix is not None and os.path.exists(options.unix):
+        os.unlink(options.unix) # a socket file left behind by an earlier run
+    try:
+        asyncio.run(GameServer().serve(options.host, options.port, options.unix))
+    except KeyboardInterrupt:
+        pass
+    return 0
@@ -0,0 +1,180 @@
+"""SQLite player statistics and Elo ratings"""
+from typing import Dict, Iterable, List, Tuple
+import argparse
+import sqlite3
+
+INITIAL_RATING = 1500.0 # rating of a new player
+ELO_K = 32 # most rating points a single game can win or lose
+# Results that end a game for good, others like the "unfinished" games of python -m chess selfplay count nowhere
+FINAL_RESULTS = ("checkmate", "remis")
+
+def _migrate_unique_names(cursor: sqlite3.Cursor):
+    """Merge players that were created more than once under the same name, then make names unique"""
+    cursor.execute("""UPDATE player SET (wins, loses, games) = (
+                          SELECT SUM(wins), SUM(loses), SUM(games) FROM player AS same WHERE same.name = player.name)
+                      WHERE id IN (SELECT MIN(id) FROM player GROUP BY name HAVING COUNT(*) > 1)""")
+    cursor.execute("DELETE FROM player WHERE id NOT IN (SELECT MIN(id) FROM player GROUP BY name)")
+    cursor.execute("CREATE UNIQUE INDEX player_name ON player (name)")
+
+def _migrate_game_archive(cursor: sqlite3.Cursor):
+    """Add the game archive: one row per game and one per position reached in it, see chess.archive"""
+    cursor.execute("""CREATE TABLE games (id INTEGER PRIMARY KEY, white TEXT, black TEXT, result TEXT, winner TEXT, termination TEXT,
+                                          start_fen TEXT, plies INTEGER, played_at TEXT DEFAULT CURRENT_TIMESTAMP)""")
+    cursor.execute("""CREATE TABLE moves (game_id INTEGER NOT NULL REFERENCES games (id), ply INTEGER NOT NULL, move INTEGER,
+                                          position_key INTEGER NOT NULL, position BLOB NOT NULL, PRIMARY KEY (game_id, ply)) WITHOUT ROWID""")
+    cursor.execute("CREATE INDEX moves_position_key ON moves (position_key)")
+
+def _migrate_ratings(cursor: sqlite3.Cursor):
+    """Add an indexed Elo rating to every player, computed from the archived games"""
+    cursor.execute(f"ALTER TABLE player ADD COLUMN rating REAL NOT NULL DEFAULT {INITIAL_RATING}")
+    # index entries end with the rowid, so this also orders players of equal rating by id for the leaderboard pages
+    cursor.execute("CREATE INDEX player_rating ON player (rating)")
+    _rerate(cursor)
+
+# Schema migrations, the database is at version n (PRAGMA user_version) after the first n have been applied
+MIGRATIONS = (
+    lambda cursor: cursor.execute("CREATE TABLE IF NOT EXISTS player (id INTEGER PRIMARY KEY, name TEXT, wins INTEGER, loses INTEGER, games INTEGER)"),
+    _migrate_unique_names,
+    _migrate_game_archive,
+    _migrate_ratings,
+)
+
+# Create a player unless one of that name exists
+_CREATE_PLAYER = "INSERT INTO player (name, wins, loses, games) VALUES (?, 0, 0, 0) ON CONFLICT (name) DO NOTHING"
+# Count one game for both players, and a win and a loss unless it was a draw
+_RECORD_RESULT = """UPDATE player SET wins = wins + (name IS :winner), loses = loses + (name IS :loser), games = games + 1
+                    WHERE name IN (:white, :black)"""
+
+def db_setup(db: sqlite3.Connection):
+    """Configure the connection and bring the database schema up to date"""
+    cursor = db.cursor()
+    # the write-ahead log lets readers continue during a write and makes each commit a single append
+    cursor.execute("PRAGMA journal_mode = WAL")
+    cursor.execute("PRAGMA synchronous = NORMAL") # with WAL a crash can lose the last commits but never corrupts the database
+    cursor.execute("PRAGMA busy_timeout = 5000")
+    cursor.execute("PRAGMA temp_store = MEMORY")
+    version = cursor.execute("PRAGMA user_version").fetchone()[0]
+    if version < len(MIGRATIONS):
+        with db:
+            cursor.execute("BEGIN IMMEDIATE") # the schema changes and the version bump happen together or not at all
+            for number, migration in enumerate(MIGRATIONS[version:], version + 1):
+                migration(cursor)
+                cursor.execute(f"PRAGMA user_version = {number}")
+
+def db_check_player(db: sqlite3.Connection, name: str):
+    """Check if the player exists in the database and create a new entry if not"""
+    with db:
+        db.execute(_CREATE_PLAYER, (name,))
+
+def _result_parameters(white: str, black: str, result: Tuple[str, str]) -> dict:
+    """Return the parameters of _RECORD_RESULT for a game result as returned by game_loop"""
+    winner = loser = None
+    if result[0] == "checkmate":
+        winner, loser = (white, black) if result[1] == "white" else (black, white)
+    return {"white": white, "black": black, "winner": winner, "loser": loser}
+
+def rate_game(ratings: Dict[str, float], white: str, black: str, result: Tuple[str, str]):
+    """Update the ratings of both players after a game with the Elo formula, players missing from ratings start at INITIAL_RATING"""
+    if white == black: # a player against themselves neither wins nor loses points
+        return
+    white_rating, black_rating = ratings.get(white, INITIAL_RATING), ratings.get(black, INITIAL_RATING)
+    winner = _result_parameters(white, black, result)["winner"]
+    score = 0.5 if winner is None else 1.0 if winner == white else 0.0
+    expected = 1 / (1 + 10 ** ((black_rating - white_rating) / 400))
+    change = ELO_K * (score - expected)
+    ratings[white], ratings[black] = white_rating + change, black_rating - change
+
+def _update_ratings(db: sqlite3.Connection, results: List[Tuple[str, str, Tuple[str, str]]]):
+    """Apply the rating changes of the results in order, inside the transaction recording them"""
+    ratings = {}
+    for name in {name for white, black, _ in results for name in (white, black)}:
+        if (row := db.execute("SELECT rating FROM player WHERE name = ?", (name,)).fetchone()) is not None:
+            ratings[name] = row[0]
+    for white, black, result in results:
+        rate_game(ratings, white, black, result)
+    db.executemany("UPDATE player SET rating = ? WHERE name = ?", ((rating, name) for name, rating in ratings.items()))
+
+def db_update_player(db: sqlite3.Connection, white: str, black: str, result: Tuple[str, str]):
+    """Update the player statistics and ratings in the database, unless the game has no final result"""
+    if result[0] not in FINAL_RESULTS:
+        return
+    with db:
+        db.execute(_RECORD_RESULT, _result_parameters(white, black, result))
+        _update_ratings(db, [(white, black, result)])
+
+def record_results(db: sqlite3.Connection, results: Iterable[Tuple[str, str, Tuple[str, str]]]) -> int:
+    """Record many (white, black, (result, winner)) game results in one transaction and return how many were recorded
+
+    Games without a final result are left out.
+    """
+    results = [(white, black, result) for white, black, result in results if result[0] in FINAL_RESULTS]
+    with db:
+        db.executemany(_CREATE_PLAYER, ((name,) for name in {name for white, black, _ in results for name in (white, black)}))
+        db.executemany(_RECORD_RESULT, (_result_parameters(white, black, result) for white, black, result in results))
+        _update_ratings(db, results)
+    return len(results)
+
+def _rerate(cursor: sqlite3.Cursor) -> int:
+    """Recompute all ratings from the archived games with a final result in the order they were played, return the number of games"""
+    ratings = {}
+    count = 0
+    # the games are streamed from the archive, only one rating per player is held in memory
+    games = cursor.connection.execute(f"SELECT white, black, result, winner FROM games WHERE result IN ({', '.join('?' * len(FINAL_RESULTS))}) ORDER BY id", FINAL_RESULTS)
+    for white, black, result, winner in games:
+        rate_game(ratings, white, black, (result, winner))
+        count += 1
+    cursor.execute("UPDATE player SET rating = ?", (INITIAL_RATING,))
+    cursor.executemany("UPDATE player SET rating = ? WHERE name = ?", ((rating, name) for name, rating in ratings.items()))
+    return count
+
+def db_rerate(db: sqlite3.Connection) -> int:
+    """Recompute all ratings from the game archive in one transaction, return the number of games rated"""
+    with db:
+        cursor = db.cursor()
+        cursor.execute("BEGIN IMMEDIATE") # no game may be recorded between reading the archive and writing the ratings
+        return _rerate(cursor)
+
+def db_leaderboard(db: sqlite3.Connection, limit: int = 10, after: Tuple[float, int] = None) -> List[Tuple[int, str, float, int, int, int]]:
+    """Return (id, name, rating, wins, loses, games) of the best rated players, best first
+
+    The next page starts after the (rating, id) of the last row of the previous one, which the rating index
+    finds directly instead of skipping all players before it like OFFSET would.
+    """
+    if after is None:
+        return db.execute("SELECT id, name, rating, wins, loses, games FROM player ORDER BY rating DESC, id DESC LIMIT ?", (limit,)).fetchall()
+    return db.execute("""SELECT id, name, rating, wins, loses, games FROM player WHERE (rating, id) < (?, ?)
+                         ORDER BY rating DESC, id DESC LIMIT ?""", (*after, limit)).fetchall()
+
+def print_leaderboard(rows: List[Tuple[int, str, float, int, int, int]], first_rank: int = 1):
+    """Print leaderboard rows, numbered from first_rank"""
+    for rank, (_, name, rating, wins, loses, games) in enumerate(rows, first_rank):
+        print(f"{rank:4}. {name:20} {rating:6.0f}  {wins} won, {loses} lost, {games - wins - loses} drawn")
+
+def db_get_statistics(db: sqlite3.Connection, name: str):
+    """Return the player statistics from the database"""
+    cursor = db.cursor()
+    cursor.execute("SELECT wins, loses, games, rating FROM player WHERE name = ?", (name,))
+    if (row := cursor.fetchone()) is not None:
+        print("Statistics for player", name)
+        print("Wins: ", row[0])
+        print("Loses: ", row[1])
+        print("Draws: ", (row[2] - row[0] - row[1]))
+        print(f"Rating: {row[3]:.0f}")
+    else:
+        print("No player with that name found.")
+        return
+
+def main(args: List[str]) -> int:
+    """Show the leaderboard, optionally recomputing all ratings from the game archive first"""
+    parser = argparse.ArgumentParser(prog="python -m chess ratings", description="Show the best rated players.")
+    parser.add_argument("--db", default="chess.db", help="statistics database (default: chess.db)")
+    parser.add_argument("--top", type=int, default=20, help="number of players to show (default: 20)")
+    parser.add_argument("--rerate", action="store_true", help="recompute all ratings from the archived games first")
+    options = parser.parse_args(args)
+    db = sqlite3.connect(options.db)
+    db_setup(db)
+    if options.rerate:
+        print(f"rated {db_rerate(db)} archived games")
+    print_leaderboard(db_leaderboard(db, options.top))
+    db.close()
+    return 0
@@ -0,0 +1,395 @@
+"""Endgame tablebases: distance to mate for KQK, KRK, KPK and KBNK, generated by retrograde analysis
+
+A table holds one byte per position of an ending with the pieces on white's side: 0 for a draw (or an
+impossible position), otherwise the distance to mate in plies plus one. Whether the distance is a win or a
+loss follows from the side to move, as only the side with the pieces can win. Positions are numbered by a
+perfect index over the side to move and the piece squares, after mirroring the board so that the white king
+is in the a1-d4 quarter, or for KPK the pawn is on the a-d files. Tables are generated with NumPy, which is
+only needed for generating, and probed through mmap.
+"""
+from typing import Dict, List, Tuple
+import argparse
+import mmap
+import os
+import sys
+import time
+
+from chess.engine import (Position, EMPTY, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, WHITE, BLACK, TYPE_MASK, COLOUR_MASK,
+                          KNIGHT_TARGETS, KING_TARGETS, ROOK_RAYS, BISHOP_RAYS, QUEEN_RAYS, PAWN_ATTACKS)
+
+# Ending name -> the pieces besides the two kings, all on the winning side
+ENDINGS = {
+    "KQK": (QUEEN,),
+    "KRK": (ROOK,),
+    "KPK": (PAWN,),
+    "KBNK": (BISHOP, KNIGHT),
+}
+# Endings whose tables another one needs while being generated, a pawn promotes into them
+DEPENDENCIES = {"KPK": ("KQK", "KRK")}
+DEFAULT_DIRECTORY = "tablebases"
+
+# Squares the white king is mirrored into for pawnless endings, and the pawn squares of KPK
+KING_SQUARES = tuple(sq for sq in range(64) if sq & 7 < 4 and sq >> 3 < 4)
+PAWN_SQUARES = tuple(sq for sq in range(8, 56) if sq & 7 < 4)
+KING_INDEX = {sq: index for index, sq in enumerate(KING_SQUARES)}
+PAWN_INDEX = {sq: index for index, sq in enumerate(PAWN_SQUARES)}
+
+def layout(pieces: Tuple[int, ...]) -> Tuple[int, ...]:
+    """Return the number of values of every index digit: side to move, white king, black king and each piece"""
+    pawns = PAWN in pieces
+    return (2, 64 if pawns else len(KING_SQUARES), 64) + tuple(len(PAWN_SQUARES) if piece == PAWN else 64 for piece in pieces)
+
+def table_size(pieces: Tuple[int, ...]) -> int:
+    """Return the number of positions of an ending"""
+    size = 1
+    for digit in layout(pieces):
+        size *= digit
+    return size
+
+def position_index(pieces: Tuple[int, ...], side: int, white_king: int, black_king: int, squares: Tuple[int, ...]) -> int:
+    """Return the index of a position of the ending, side is 0 with white to move and 1 with black to move"""
+    if PAWN in pieces:
+        flip = 7 if squares[pieces.index(PAWN)] & 7 > 3 else 0
+    else:
+        flip = (7 if white_king & 7 > 3 else 0) | (56 if white_king >> 3 > 3 else 0)
+    index = side * layout(pieces)[1] + (white_king ^ flip if PAWN in pieces else KING_INDEX[white_king ^ flip])
+    index = index * 64 + (black_king ^ flip)
+    for piece, sq in zip(pieces, squares):
+        index = index * len(PAWN_SQUARES) + PAWN_INDEX[sq ^ flip] if piece == PAWN else index * 64 + (sq ^ flip)
+    return index
+
+class Tablebases:
+    """Probes the tables found in a directory, each file is mapped on first use, usable as Game.tablebases"""
+
+    def __init__(self, directory: str = DEFAULT_DIRECTORY):
+        self.directory = directory
+        self.tables: Dict[str, mmap.mmap | None] = {}
+
+    def table(self, name: str) -> mmap.mmap | None:
+        """Return the mapped table of the ending, or None if there is no file for it"""
+        if name not in self.tables:
+            path = os.path.join(self.directory, f"{name}.tb")
+            self.tables[name] = None
+            if os.path.exists(path):
+                with open(path, "rb") as file:
+                    self.tables[name] = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.tables[name]
+
+    def probe(self, position: Position) -> Tuple[int, int] | None:
+        """Return (1 win, 0 draw or -1 loss for the side to move, plies to mate) or None if no table covers the position"""
+        squares = position.squares
+        if position.castling or 64 - squares.count(EMPTY) > 4:
+            return None
+        pieces = [(code, sq) for sq, code in enumerate(squares) if code and code & TYPE_MASK != KING]
+        if not pieces or len({code & COLOUR_MASK for code, _ in pieces}) != 1:
+            return None
+        strong = pieces[0][0] & COLOUR_MASK
+        flip = 56 if strong == BLACK else 0 # the tables have the pieces on white's side, mirror the ranks otherwise
+        pieces.sort(key=lambda piece: -(piece[0] & TYPE_MASK)) # QUEEN, ROOK, BISHOP, KNIGHT, PAWN like the ending names
+        name = "K" + "".join("PNBRQ"[(code & TYPE_MASK) - 1] for code, _ in pieces) + "K"
+        if name not in ENDINGS or (table := self.table(name)) is None:
+            return None
+        side = 0 if position.side == strong else 1
+        index = position_index(ENDINGS[name], side, squares.index(KING | strong) ^ flip, squares.index(KING | (strong ^ BLACK)) ^ flip,
+                               tuple(sq ^ flip for _, sq in pieces))
+        value = table[index]
+        if not value:
+            return (0, 0)
+        return (1 if side == 0 else -1, value - 1)
+
+    def __reduce__(self):
+        # a pickled game sent to a worker process maps the tables again when unpickled
+        return (Tablebases, (self.directory,))
+
+    def close(self):
+        """Unmap all tables"""
+        for table in self.tables.values():
+            if table is not None:
+                table.close()
+        self.tables = {}
+
+class _Geometry:
+    """NumPy versions of the engine's move tables"""
+
+    def __init__(self, np):
+        self.np = np
+        def padded(table, width):
+            return np.array([list(targets) + [-1] * (width - len(targets)) for targets in table], dtype=np.int16)
+        self.king_steps = padded(KING_TARGETS, 8)
+        self.knight_steps = padded(KNIGHT_TARGETS, 8)
+        self.rays = {}
+        for kind, rays in ((ROOK, ROOK_RAYS), (BISHOP, BISHOP_RAYS), (QUEEN, QUEEN_RAYS)):
+            table = np.full((64, 8, 7), -1, dtype=np.int16)
+            for sq in range(64):
+                for number, ray in enumerate(rays[sq]):
+                    table[sq, number, :len(ray)] = ray
+            self.rays[kind] = table
+        self.bit = np.array([1 << sq for sq in range(64)], dtype=np.uint64)
+        # attacks[kind][from, to] on an empty board, and the squares between two squares on a line
+        self.attacks = {}
+        self.between = np.zeros((64, 64), dtype=np.uint64)
+        for kind, table in ((KING, KING_TARGETS), (KNIGHT, KNIGHT_TARGETS), (PAWN, PAWN_ATTACKS[WHITE])):
+            attacks = np.zeros((64, 64), dtype=bool)
+            for sq in range(64):
+                attacks[sq, list(table[sq])] = True
+            self.attacks[kind] = attacks
+        for kind, rays in ((ROOK, ROOK_RAYS), (BISHOP, BISHOP_RAYS), (QUEEN, QUEEN_RAYS)):
+            attacks = np.zeros((64, 64), dtype=bool)
+            for sq in range(64):
+                for ray in rays[sq]:
+                    mask = 0
+                    for target in ray:
+                        attacks[sq, target] = True
+                        self.between[sq, target] = mask
+                        mask |= 1 << target
+            self.attacks[kind] = attacks
+
+    def attacks_square(self, kind: int, sq, target, occupancy):
+        """Check if a piece of the kind on sq attacks target, sliders are blocked by the occupancy bitboards"""
+        attacked = self.attacks[kind][sq, target] & (sq != target) # a captured piece attacks nothing
+        if kind in (ROOK, BISHOP, QUEEN):
+            attacked &= (self.between[sq, target] & occupancy) == 0
+        return attacked
+
+class _Generator:
+    """Retrograde analysis of one ending over NumPy arrays of positions"""
+
+    def __init__(self, np, geometry: _Geometry, pieces: Tuple[int, ...]):
+        self.np = np
+        self.geometry = geometry
+        self.pieces = pieces
+        self.layout = layout(pieces)
+        self.pawns = PAWN in pieces
+        self.king_squares = np.arange(64, dtype=np.int16) if self.pawns else np.array(KING_SQUARES, dtype=np.int16)
+        self.king_index = np.full(64, -1, dtype=np.int64)
+        self.king_index[self.king_squares] = np.arange(len(self.king_squares))
+        self.pawn_squares = np.array(PAWN_SQUARES, dtype=np.int16)
+        self.pawn_index = np.full(64, -1, dtype=np.int64)
+        self.pawn_index[self.pawn_squares] = np.arange(len(PAWN_SQUARES))
+
+    def decode(self, indices):
+        """Return the side to move, white king, black king and piece square arrays of position indices"""
+        np = self.np
+        digits = []
+        for size in reversed(self.layout):
+            indices, digit = np.divmod(indices, size)
+            digits.append(digit.astype(np.int16))
+        side, white_king, black_king, *pieces = reversed(digits)
+        pieces = [self.pawn_squares[sq] if piece == PAWN else sq for piece, sq in zip(self.pieces, pieces)]
+        return side.astype(np.int8), self.king_squares[white_king], black_king, pieces
+
+    def encode(self, side, white_king, black_king, pieces):
+        """Return the indices of positions, mirroring them onto the indexed part of the board first"""
+        np = self.np
+        if self.pawns:
+            flip = np.where(pieces[self.pieces.index(PAWN)] & 7 > 3, 7, 0).astype(np.int16)
+        else:
+            flip = (np.where(white_king & 7 > 3, 7, 0) | np.where(white_king >> 3 > 3, 56, 0)).astype(np.int16)
+        index = side.astype(np.int64) * self.layout[1] + self.king_index[white_king ^ flip]
+        index = index * 64 + (black_king ^ flip)
+        for piece, sq in zip(self.pieces, pieces):
+            index = index * len(PAWN_SQUARES) + self.pawn_index[sq ^ flip] if piece == PAWN else index * 64 + (sq ^ flip)
+        return index
+
+    def occupancy(self, squares):
+        """Return the bitboards of the squares occupied in each position"""
+        bits = self.geometry.bit
+        board = bits[squares[0]]
+        for sq in squares[1:]:
+            board = board | bits[sq]
+        return board
+
+    def white_attacks(self, target, white_king, pieces, occupancy):
+        """Check if the white pieces attack the target squares"""
+        attacked = self.geometry.attacks[KING][white_king, target]
+        for piece, sq in zip(self.pieces, pieces):
+            attacked = attacked | self.geometry.attacks_square(piece, sq, target, occupancy)
+        return attacked
+
+    def valid(self, side, white_king, black_king, pieces):
+        """Check which positions can occur: no two pieces on a square, and the side not to move is not in check"""
+        np = self.np
+        squares = [white_king, black_king] + pieces
+        valid = ~self.geometry.attacks[KING][white_king, black_king]
+        for first in range(len(squares)):
+            for second in range(first + 1, len(squares)):
+                valid &= squares[first] != squares[second]
+        occupancy = self.occupancy(squares)
+        return valid & ~((side == 0) & self.white_attacks(black_king, white_king, pieces, occupancy))
+
+    def black_moves(self, white_king, black_king, pieces):
+        """Return the number of legal black king moves that keep all white pieces, and if black can take one"""
+        np = self.np
+        geometry = self.geometry
+        count = np.zeros(len(black_king), dtype=np.int16)
+        escape = np.zeros(len(black_king), dtype=bool)
+        for step in range(8):
+            target = geometry.king_steps[black_king, step]
+            on_board = target >= 0
+            target = np.where(on_board, target, 0)
+            legal = on_board & (target != white_king) & ~geometry.attacks[KING][white_king, target]
+            captured = np.zeros(len(black_king), dtype=bool)
+            for sq in pieces:
+                captured |= sq == target
+            # the king is lifted from its square, a taken piece neither blocks nor attacks
+            occupancy = self.occupancy([white_king] + [np.where(sq == target, white_king, sq) for sq in pieces])
+            attacked = np.zeros(len(black_king), dtype=bool)
+            for piece, sq in zip(self.pieces, pieces):
+                attacked |= geometry.attacks_square(piece, sq, target, occupancy)
+            legal &= ~attacked
+            count += legal & ~captured
+            escape |= legal & captured
+        return count, escape
+
+    def white_predecessors(self, indices):
+        """Return the positions with white to move from which a white move leads to the positions, black to move"""
+        np = self.np
+        geometry = self.geometry
+        _, white_king, black_king, pieces = self.decode(indices)
+        squares = [white_king, black_king] + pieces
+        occupancy = self.occupancy(squares)
+        found = []
+        for moved, kind in enumerate((KING,) + self.pieces):
+            sq = squares[0] if moved == 0 else squares[moved + 1]
+            origins = []
+            if kind == KING:
+                origins = [geometry.king_steps[sq, step] for step in range(8)]
+            elif kind == KNIGHT:
+                origins = [geometry.knight_steps[sq, step] for step in range(8)]
+            elif kind == PAWN: # a single step back, or a double step back to the second rank
+                single = np.where((sq >= 16) & ((occupancy & geometry.bit[np.maximum(sq - 8, 0)]) == 0), sq - 8, -1)
+                origins = [single, np.where((sq >> 3 == 3) & (single >= 0) & ((occupancy & geometry.bit[np.maximum(sq - 16, 0)]) == 0), sq - 16, -1)]
+            else:
+                rays = geometry.rays[kind]
+                for ray in range(rays.shape[1]):
+                    open_ray = np.ones(len(sq), dtype=bool)
+                    for distance in range(7):
+                        origin = rays[sq, ray, distance]
+                        open_ray &= (origin >= 0) & ((occupancy & geometry.bit[np.maximum(origin, 0)]) == 0)
+                        origins.append(np.where(open_ray, origin, -1))
+            for origin in origins:
+                usable = origin >= 0
+                if kind != PAWN and kind not in (ROOK, BISHOP, QUEEN):
+                    usable &= (occupancy & geometry.bit[np.maximum(origin, 0)]) == 0
+                if not usable.any():
+                    continue
+                moved_squares = [square[usable] for square in squares]
+                moved_squares[0 if moved == 0 else moved + 1] = origin[usable].astype(np.int16)
+                side = np.zeros(len(moved_squares[0]), dtype=np.int8)
+                white, black, *others = moved_squares
+                valid = self.valid(side, white, black, others)
+                found.append(self.encode(side[valid], white[valid], black[valid], [other[valid] for other in others]))
+        return np.concatenate(found) if found else np.zeros(0, dtype=np.int64)
+
+    def black_predecessors(self, indices):
+        """Return the positions with black to move from which a black king move leads to the positions, white to move"""
+        np = self.np
+        geometry = self.geometry
+        _, white_king, black_king, pieces = self.decode(indices)
+        occupancy = self.occupancy([white_king, black_king] + pieces)
+        found = []
+        for step in range(8):
+            origin = geometry.king_steps[black_king, step]
+            usable = (origin >= 0) & ((occupancy & geometry.bit[np.maximum(origin, 0)]) == 0)
+            usable &= ~geometry.attacks[KING][white_king, np.maximum(origin, 0)]
+            side = np.ones(int(usable.sum()), dtype=np.int8)
+            found.append(self.encode(side, white_king[usable], origin[usable].astype(np.int16), [sq[usable] for sq in pieces]))
+        return np.concatenate(found)
+
+    def promotions(self, values, tables: Dict[str, bytes]) -> Dict[int, List]:
+        """Return plies to mate -> white to move positions winning by promoting the pawn into a won KQK or KRK position"""
+        np = self.np
+        indices = np.arange(values.size // 2, dtype=np.int64) # white to move
+        side, white_king, black_king, (pawn,) = self.decode(indices)
+        promoting = (pawn >> 3 == 6) & (white_king != pawn + 8) & (black_king != pawn + 8) & self.valid(side, white_king, black_king, [pawn])
+        injected: Dict[int, List] = {}
+        for name, kind in (("KQK", QUEEN), ("KRK", ROOK)):
+            generator = _Generator(np, self.geometry, ENDINGS[name])
+            piece = (pawn + 8)[promoting]
+            result = np.frombuffer(tables[name], dtype=np.uint8)[generator.encode(np.ones(piece.size, dtype=np.int8), white_king[promoting], black_king[promoting], [piece])]
+            for plies in np.unique(result[result > 0]):
+                # black is mated plies - 1 plies after the promotion, which is one ply more from here
+                injected.setdefault(int(plies), []).append(indices[promoting][result == plies])
+        return injected
+
+    def generate(self, tables: Dict[str, bytes]) -> bytes:
+        """Return the table of the ending, tables holds the finished tables of the endings it depends on"""
+        np = self.np
+        size = table_size(self.pieces)
+        side, white_king, black_king, pieces = self.decode(np.arange(size, dtype=np.int64))
+        valid = self.valid(side, white_king, black_king, pieces)
+        black = (side == 1) & valid
+        count, escape = self.black_moves(white_king, black_king, pieces)
+        count = np.where(black, count, 0)
+        escape &= black
+        in_check = self.white_attacks(black_king, white_king, pieces, self.occupancy([white_king, black_king] + pieces))
+        del side, white_king, black_king, pieces
+        values = np.zeros(size, dtype=np.uint8)
+        lost = np.flatnonzero(black & in_check & (count == 0) & ~escape)
+        del black, in_check
+        values[lost] = 1
+        injected = self.promotions(values, tables) if self.pawns else {}
+        plies = 0 # black to move in the positions in lost is mated in plies
+        while lost.size or any(depth > plies for depth in injected):
+            won = np.unique(np.concatenate([self.white_predecessors(lost)] + injected.pop(plies + 1, [])))
+            won = won[values[won] == 0]
+            values[won] = plies + 2
+            predecessors = self.black_predecessors(won)
+            np.subtract.at(count, predecessors, 1)
+            lost = np.unique(predecessors)
+            lost = lost[(count[lost] == 0) & ~escape[lost] & (values[lost] == 0)]
+            values[lost] = plies + 3
+            plies += 2
+        return values.tobytes()
+
+def generate(names: List[str], directory: str = DEFAULT_DIRECTORY, report=None) -> Dict[str, float]:
+    """Generate the tables of the endings and the ones they depend on into directory, return the seconds each took"""
+    import numpy as np # only needed to generate tables, probing works without it
+    geometry = _Geometry(np)
+    os.makedirs(directory, exist_ok=True)
+    tables: Dict[str, bytes] = {}
+    timings = {}
+    order = []
+    for name in names:
+        order.extend(dependency for dependency in DEPENDENCIES.get(name, ()) + (name,) if dependency not in order)
+    for name in order:
+        path = os.path.join(directory, f"{name}.tb")
+        if name not in names and os.path.exists(path): # a dependency generated earlier
+            with open(path, "rb") as file:
+                tables[name] = file.read()
+            continue
+        start = time.perf_counter()
+        tables[name] = _Generator(np, geometry, ENDINGS[name]).generate(tables)
+        timings[name] = time.perf_counter() - start
+        with open(path, "wb") as file:
+            file.write(tables[name])
+        if report is not None:
+            report(name, tables[name], timings[name])
+    return timings
+
+def main(args: List[str]) -> int:
+    """Generate tables or probe a position from the command line"""
+    parser = argparse.ArgumentParser(prog="python -m chess tablebase", description="Generate or probe endgame tablebases.")
+    parser.add_argument("action", choices=("generate", "probe"), help="generate tables, or look up a position")
+    parser.add_argument("endings", nargs="*", metavar="ending", help=f"endings to generate: {', '.join(ENDINGS)} (default: all)")
+    parser.add_argument("--dir", default=DEFAULT_DIRECTORY, help=f"directory of the table files (default: {DEFAULT_DIRECTORY})")
+    parser.add_argument("--fen", default=None, help="position to probe")
+    options = parser.parse_args(args)
+    if options.action == "generate":
+        for name in options.endings:
+            if name not in ENDINGS:
+                parser.error(f"unknown ending {name!r}")
+        def report(name: str, table: bytes, seconds: float):
+            decisive = sum(1 for value in table if value)
+            print(f"{name}: {len(table)} positions, {decisive} decisive, longest mate {max(table) - 1} plies, {seconds:.1f}s")
+        generate(options.endings or list(ENDINGS), options.dir, report)
+        return 0
+    if options.fen is None:
+        parser.error("probe needs --fen")
+    result = Tablebases(options.dir).probe(Position.from_fen(options.fen))
+    if result is None:
+        print("no table covers the position", file=sys.stderr)
+        return 1
+    wdl, plies = result
+    print("draw" if wdl == 0 else f"{'win' if wdl > 0 else 'loss'} for the side to move, mate in {plies} plies")
+    return 0
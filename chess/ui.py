@@ -0,0 +1,184 @@
+"""Terminal user interface: board rendering, key input and the interactive game loop"""
+from typing import Callable, Dict, List, Tuple
+import sys
+import re
+
+from chess.engine import Game, PIECE_TYPES, KING, TYPE_MASK, COLOUR_MASK
+from chess.journal import Journal
+from chess.precompute import Precomputer
+
+def get_key_press():
+    """Get a single key press from the user without the need to press Enter"""
+    import tty, termios # only available on terminals, so imported on first use
+    # Set raw mode to read a single character without waiting for Enter
+    old_settings = termios.tcgetattr(sys.stdin)
+    tty.setcbreak(sys.stdin.fileno())
+    try:
+        # Read a single character from the user
+        key_press = sys.stdin.read(1)
+        return key_press
+    finally:
+        # Reset terminal settings
+        termios.tcsetattr(sys.stdin, termios.TCSADRAIN, old_settings)
+
+# Background colours of the squares
+HIGHLIGHT = "\033[48;2;0;255;0m"
+DARK_SQUARE = "\033[48;2;215;135;0m"
+LIGHT_SQUARE = "\033[48;2;255;174;94m"
+RESET = "\033[m"
+# Text and colour of the piece codes in a cell, an empty cell is two spaces
+GLYPHS = tuple((("\033[30m" if code & COLOUR_MASK else "\033[97m") + PIECE_TYPES[code & TYPE_MASK].symbol + " ") if 0 < code & TYPE_MASK <= KING else "  "
+               for code in range(15))
+BOARD_ROW = 3 # screen row of rank 8, the player line and the file letters come first
+STATUS_ROW = BOARD_ROW + 9 # first screen row below the board, for the hints
+
+class Renderer:
+    """Draws the board by moving the cursor with ANSI escapes, repainting only what changed since the previous frame"""
+
+    def __init__(self):
+        self.invalidate()
+
+    def invalidate(self):
+        """Forget the previous frame, so that the next one clears the screen and draws everything"""
+        self.cells = [None] * 64 # what each square showed, indexed by screen position
+        self.lines = {}
+
+    def frame(self, game: Game, valid_moves: List[Tuple[int,int]] = []) -> str:
+        """Return the escape sequences turning the previous frame into the one of the game"""
+        parts = []
+        if not self.lines:
+            parts.append("\033[H\033[2J") # the first frame starts from a cleared screen
+        lines = {1: f"It's {game.current_player}'s turn.", 2: "  A B C D E F G H", STATUS_ROW - 1: "  A B C D E F G H",
+                 STATUS_ROW: "50 or more unsignificant moves passed. Press (r) for remis or continue playing." if game.moves_since_last_significant >= 100 else "",
+                 STATUS_ROW + 1: "Press (u) to undo the last move." if game.undo_stack else ""}
+        for y in range(8):
+            lines[BOARD_ROW + y] = f"{8-y} {' ' * 16} {8-y}"
+        for row, line in lines.items():
+            if self.lines.get(row) != line:
+                parts.append(f"\033[{row};1H{line}\033[K")
+                if BOARD_ROW <= row < BOARD_ROW + 8: # rewriting a rank line blanks its squares
+                    self.cells[(row - BOARD_ROW) * 8:(row - BOARD_ROW + 1) * 8] = [None] * 8
+        squares = game.position.squares
+        highlighted = set(valid_moves)
+        for y in range(8):
+            for x in range(8):
+                if (x, 7 - y) in highlighted: # Highlight valid moves
+                    background = HIGHLIGHT
+                elif (x + y) % 2 == 1: # Alternate the background color
+                    background = DARK_SQUARE
+                else:
+                    background = LIGHT_SQUARE
+                cell = background + GLYPHS[squares[(7 - y) * 8 + x]] + RESET
+                if self.cells[y * 8 + x] != cell:
+                    self.cells[y * 8 + x] = cell
+                    parts.append(f"\033[{BOARD_ROW + y};{3 + 2 * x}H{cell}")
+        self.lines = lines
+        # leave the cursor below the board and clear the messages printed after the previous frame
+        parts.append(f"\033[{STATUS_ROW + 2};1H\033[J")
+        return "".join(parts)
+
+renderer = Renderer()
+
+def render_board(game: Game, valid_moves: List[Tuple[int,int]] = []):
+    """Render the board in the terminal with a single write"""
+    sys.stdout.write(renderer.frame(game, valid_moves))
+    sys.stdout.flush()
+
+def get_coords(game: Game, allow_undo: bool = False) -> Tuple[int,int] | None:
+    """Get a pair of coordinates from the user, or None if the player wants to undo the last move"""
+    x = y = None
+    while x is None or y is None:
+        move_input = get_key_press()
+        if re.match(r"^([A-H]|[a-h])$", move_input): # Check if the input is a valid letter
+            x = ord(move_input[0].lower()) - 97
+        elif re.match(r"^[1-8]$", move_input): # Check if the input is a valid number
+            y = int(move_input) - 1
+        elif move_input == "r" and game.moves_since_last_significant >= 100: # Check if the player wants to end the game in a remis due to 50 moves rule
+            game.end_game("remis", "50 moves rule", "Game ended in a remis due to 50 moves rule.")
+            return (0, 0)
+        elif move_input == "u" and allow_undo and game.undo_stack: # Check if the player wants to undo the last move
+            return None
+
+    return (x, y)
+    
+def game_loop(game: Game, computer: Dict[str, Callable[[Game], int]] = {}, journal: Journal = None, precompute: bool = True) -> Tuple[Tuple[str, str], str]:
+    """Run the main game loop, computer maps a team to the function choosing its moves if it is not played by a human
+
+    Every move and undo is recorded in the journal if one is given, see chess.journal. With precompute a
+    background thread works out the legal moves while a human player thinks, see chess.precompute.
+    """
+    precomputer = Precomputer(game.move_cache) if precompute and game.move_cache is not None else None
+    try:
+        return _play(game, computer, journal, precomputer)
+    finally:
+        if precomputer is not None:
+            precomputer.stop()
+
+def _play(game: Game, computer: Dict[str, Callable[[Game], int]], journal: Journal | None, precomputer: Precomputer | None) -> Tuple[Tuple[str, str], str]:
+    """Play the game until it ends, for game_loop"""
+    renderer.invalidate() # the screen holds whatever was printed before the game
+    render_board(game)
+
+    while True:
+        if game.current_player in computer:
+            if precomputer is not None:
+                precomputer.cancel() # leave the processor to the search
+            print(f"The computer is thinking about {game.current_player}'s move...")
+            game.make_move(computer[game.current_player](game))
+            if journal is not None:
+                journal.record(game)
+            render_board(game)
+            if (outcome := game.check_game_over()) is not None:
+                return outcome
+            continue
+
+        if precomputer is not None:
+            precomputer.submit(game)
+        if journal is not None:
+            journal.sync() # the player is about to think, a good moment to make the journal durable
+        # Get the source coordinates from the user
+        while True:
+            source = get_coords(game, allow_undo=True)
+            if game.game_over:
+                return ((game.result, None), game.end_message)
+            if source is None:
+                game.unmake_move()
+                while game.current_player in computer and game.undo_stack: # take back the computer's reply as well
+                    game.unmake_move()
+                if journal is not None:
+                    journal.record(game)
+                render_board(game)
+                break
+            source_x, source_y = source
+            piece = game.get_piece_at(source_x, source_y)
+            if piece is not None and piece.team == game.current_player and piece.get_valid_moves() != []: # Check if the piece belongs to the current player and has at least one valid move
+                break
+            else:
+                print("Invalid move. Please enter a valid move.")
+        if source is None: # after an undo the computer may be the one to move, e.g. when its first move was taken back
+            continue
+
+        render_board(game, game.get_piece_at(source_x, source_y).get_valid_moves()) # Highlight valid moves
+        # Get the target coordinates from the user
+        while True:
+            target_x, target_y = get_coords(game)
+            if game.game_over:
+                return ((game.result, None), game.end_message)
+            if (target_x, target_y) in game.get_piece_at(source_x, source_y).get_valid_moves(): # Check if the target coordinates are a valid move
+                break
+            else:
+                print("Invalid move. Please enter a valid move.")
+
+        promotion = "q"
+        if game.is_promotion(source_x, source_y, target_x, target_y): # add support for pawn promotion
+            promotion = None
+            while promotion is None or not re.match(r"^[qrbn]$", promotion):
+                print("Which piece do you want to promote to? (q, r, b, n): ")
+                promotion = get_key_press()
+        game.move_piece(source_x, source_y, target_x, target_y, promotion)
+        if journal is not None:
+            journal.record(game)
+        render_board(game)
+
+        if (outcome := game.check_game_over()) is not None: # checkmate, stalemate, 75 moves rule or threefold repetition
+            return outcome
@@ -0,0 +1,18 @@
+"""The NumPy batch analysis against the per-piece move generators of Position"""
+import pytest
+
+np = pytest.importorskip("numpy")
+if not hasattr(np, "bitwise_count"):
+    pytest.skip("chess.batch needs NumPy 2.0 or later", allow_module_level=True)
+
+from chess.batch import analyse, boards_from_positions, cross_check, random_positions
+from chess.engine import Position
+from chess.perft import PERFT_SUITE
+
+def test_batch_matches_per_piece_generators():
+    # the reference positions plus a fixed sequence of positions from seeded random games
+    positions = [Position.from_fen(fen) for _, fen, _ in PERFT_SUITE] + random_positions(2000, seed=7)
+    result = analyse(boards_from_positions(positions))
+    assert result.attacks.shape == result.in_check.shape == result.mobility.shape == result.moves.shape == (len(positions), 2)
+    assert cross_check(positions, result) == []
+    assert result.in_check.any() and not result.in_check.all() # positions with and without check are covered
@@ -0,0 +1,42 @@
+"""Reading and writing FEN strings, in particular which en passant squares are kept"""
+import pytest
+
+from chess.engine import NO_SQUARE, Game, Position, move_to_str
+
+# (name, FEN, en passant field kept): only a square a pawn has just passed with a double push, and that a pawn can take on
+EN_PASSANT = [
+    ("white takes", "4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1", "d6"),
+    ("black takes", "4k3/8/8/8/3Pp3/8/8/4K3 b - d3 0 1", "d3"),
+    ("no pawn passed", "4k3/8/8/4P3/8/8/8/4K3 w - d6 0 1", "-"),
+    ("own pawn passed", "4k3/8/8/3PP3/8/8/8/4K3 w - d6 0 1", "-"),
+    ("wrong rank for white", "4k3/8/8/8/3pP3/8/8/4K3 w - d3 0 1", "-"),
+    ("wrong rank for black", "4k3/8/8/3Pp3/8/8/8/4K3 b - d6 0 1", "-"),
+    ("en passant square occupied", "4k3/8/3n4/3pP3/8/8/8/4K3 w - d6 0 1", "-"),
+    ("start square occupied", "4k3/3n4/8/3pP3/8/8/8/4K3 w - d6 0 1", "-"),
+    ("no pawn to take", "4k3/8/8/3p4/4P3/8/8/4K3 w - d6 0 1", "-"),
+]
+
+@pytest.mark.parametrize("name, fen, ep", EN_PASSANT, ids=[name for name, _, _ in EN_PASSANT])
+def test_en_passant_square(name, fen, ep):
+    position = Position.from_fen(fen)
+    assert position.to_fen().split()[3] == ep
+    assert (position.ep_square != NO_SQUARE) == (ep != "-")
+
+def test_bogus_en_passant_is_not_a_move():
+    game = Game.from_fen("4k3/8/8/4P3/8/8/8/4K3 w - d6 0 1")
+    assert "e5d6" not in map(move_to_str, game.legal_moves())
+    game = Game.from_fen("4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1")
+    assert "e5d6" in map(move_to_str, game.legal_moves())
+
+def test_en_passant_after_double_push_round_trips():
+    game = Game.from_fen("4k3/3p4/8/4P3/8/8/8/4K3 b - - 0 1")
+    game.make_move(next(move for move in game.legal_moves() if move_to_str(move) == "d7d5"))
+    fen = game.to_fen()
+    assert fen.split()[3] == "d6"
+    assert Game.from_fen(fen).to_fen() == fen
+
+@pytest.mark.parametrize("fen", ["4k3/8/8/8/8/8/8/4K3 w - d4 0 1", "4k3/8/8/8/8/8/8/4K3 x - - 0 1", "4k3/8/8/8/8/8/8/4K4 w - - 0 1",
+                                 "8/8/8/8/8/8/8/4K3 w - - 0 1"])
+def test_malformed_fen(fen):
+    with pytest.raises(ValueError):
+        Position.from_fen(fen)
@@ -0,0 +1,47 @@
+"""The incrementally updated key and evaluation against a full recompute, through make and unmake"""
+import pytest
+
+from chess.engine import Game
+from chess.perft import PERFT_SUITE, perft_check
+
+# (name, FEN, depth): castling, en passant, promotions and captures, each followed by unmake
+POSITIONS = [
+    ("kiwipete", PERFT_SUITE[1][1], 3), # castling both ways, captures, en passant after double pushes
+    ("position 4", PERFT_SUITE[3][1], 3), # promotions with and without capture, castling with the rook attacked
+    ("en passant gives check", "8/8/1k6/2b5/2pP4/8/5K2/8 b - d3 0 1", 3),
+    ("underpromote to give check", "8/P1k5/K7/8/8/8/8/8 w - - 0 1", 4),
+    ("castling rights", "r3k2r/1b4bq/8/8/8/8/7B/R3K2R w KQkq - 0 1", 3), # captured rooks lose their castling rights
+]
+
+def state(game: Game) -> tuple:
+    """Return everything make and unmake update"""
+    position = game.position
+    return (bytes(position.squares), position.side, position.castling, position.ep_square, position.key,
+            position.middlegame, position.endgame, position.phase, game.moves_since_last_significant, dict(game.repetitions))
+
+@pytest.mark.parametrize("name, fen, depth", POSITIONS, ids=[name for name, _, _ in POSITIONS])
+def test_incremental_state_matches_recompute(name, fen, depth):
+    game = Game.from_fen(fen)
+    game.move_cache = None
+    before = state(game)
+    # perft_check compares key and scores with compute_key and compute_scores at every node and raises on a difference
+    assert perft_check(game, depth) > 0
+    assert state(game) == before
+
+def test_unmake_restores_every_node():
+    game = Game.from_fen(PERFT_SUITE[1][1])
+    game.move_cache = None
+    for move in game.legal_moves():
+        before = state(game)
+        game.make_move(move)
+        position = game.position
+        assert position.key == position.compute_key()
+        assert (position.middlegame, position.endgame, position.phase) == position.compute_scores()
+        for reply in game.legal_moves():
+            inner = state(game)
+            game.make_move(reply)
+            assert game.position.key == game.position.compute_key()
+            game.unmake_move()
+            assert state(game) == inner
+        game.unmake_move()
+        assert state(game) == before
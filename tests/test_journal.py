@@ -0,0 +1,74 @@
+"""The move journal: recording, resuming after a crash, undo and archiving across checkpoints"""
+import random
+import sqlite3
+
+from chess.archive import archive_game, position_at
+from chess.engine import Game
+from chess.journal import Journal, read_records, resume
+from chess.stats import db_setup
+
+def play(game: Game, journal: Journal, rng: random.Random, moves: int):
+    """Make random moves, recording each"""
+    for _ in range(moves):
+        game.make_move(rng.choice(game.legal_moves()))
+        journal.record(game)
+
+def test_resume_keeps_history_across_checkpoints(tmp_path):
+    path = str(tmp_path / "chess.journal")
+    rng = random.Random(1)
+    game = Game()
+    game.move_cache = None
+    journal = Journal(path, game, checkpoint_records=4)
+    play(game, journal, rng, 10) # checkpoints after 4 and 8 records
+    # a crash: the journal is never closed
+    resumed = resume(path)
+    assert resumed.move_history() == game.move_history()
+    assert resumed.start_fen == game.start_fen
+    assert resumed.to_fen() == game.to_fen()
+
+    # a new session checkpoints the resumed game and continues it, taking back moves from before the resume
+    journal = Journal(path, resumed, checkpoint_records=4)
+    for _ in range(9):
+        resumed.unmake_move()
+    journal.record(resumed)
+    play(resumed, journal, rng, 3)
+    journal.close()
+    again = resume(path)
+    assert again.move_history() == resumed.move_history()
+    assert again.move_history()[0] == game.move_history()[0] and len(again.move_history()) == 4
+    while again.undo_stack:
+        again.unmake_move()
+    assert again.to_fen() == Game().to_fen()
+
+def test_archive_of_resumed_game_has_every_ply(tmp_path):
+    path = str(tmp_path / "chess.journal")
+    rng = random.Random(2)
+    game = Game()
+    game.move_cache = None
+    with Journal(path, game, checkpoint_records=4) as journal:
+        play(game, journal, rng, 9)
+    resumed = resume(path)
+    with Journal(path, resumed, checkpoint_records=4) as journal:
+        play(resumed, journal, rng, 6)
+    resumed = resume(path)
+    db = sqlite3.connect(":memory:")
+    db_setup(db)
+    game_id = archive_game(db, resumed, "white", "black")
+    assert db.execute("SELECT COUNT(*) FROM moves WHERE game_id = ?", (game_id,)).fetchone()[0] == 15 + 1
+    assert position_at(db, game_id, 0).pack() == Game().position.pack()
+    assert position_at(db, game_id, 15).pack() == resumed.position.pack()
+
+def test_torn_record_is_dropped(tmp_path):
+    path = str(tmp_path / "chess.journal")
+    rng = random.Random(3)
+    game = Game()
+    game.move_cache = None
+    with Journal(path, game) as journal:
+        play(game, journal, rng, 5)
+    with open(path, "rb") as file:
+        data = file.read()
+    records, intact = read_records(data)
+    assert intact == len(data) and len(records) == 6 # the checkpoint and five moves
+    with open(path, "wb") as file:
+        file.write(data[:-3]) # the last record was cut short
+    assert resume(path).move_history() == game.move_history()[:-1]
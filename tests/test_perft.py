@@ -0,0 +1,15 @@
+"""Perft regression gate: the reference positions at a shallow depth against their known node counts"""
+import pytest
+
+from chess.engine import Game
+from chess.perft import PERFT_SUITE, perft
+
+DEPTH = 3
+
+@pytest.mark.parametrize("name, fen, expected", PERFT_SUITE, ids=[name for name, _, _ in PERFT_SUITE])
+def test_perft_suite(name, fen, expected):
+    game = Game.from_fen(fen)
+    game.move_cache = None
+    for depth in range(1, min(DEPTH, len(expected)) + 1):
+        assert perft(game, depth) == expected[depth - 1], f"{name} at depth {depth}"
+    assert game.to_fen() == fen # make and unmake leave the position as it was
@@ -0,0 +1,91 @@
+"""PGN reading and writing: SAN in both directions, comments and variations, and a round trip through the replay"""
+import io
+import random
+
+import pytest
+
+from chess.engine import Game, move_to_str
+from chess.pgn import PgnGame, game_to_pgn, move_from_san, move_to_san, movetext_moves, read_games, replay_game
+
+# (name, FEN, SAN, move in coordinate notation)
+LEGAL = [
+    ("pawn push", Game().to_fen(), "e4", "e2e4"),
+    ("knight", Game().to_fen(), "Nf3", "g1f3"),
+    ("check and annotation suffixes", Game().to_fen(), "Nf3+!?", "g1f3"),
+    ("one knight pinned on the file", "4r2k/8/8/8/8/1N6/4N3/4K3 w - - 0 1", "Nd4", "b3d4"),
+    ("one knight pinned on the diagonal", "K7/8/2N5/3b4/8/8/2N5/7k w - - 0 1", "Nd4", "c2d4"),
+    ("needless rank", "K7/8/2N5/3b4/8/8/2N5/7k w - - 0 1", "N2d4", "c2d4"),
+    ("en passant", "4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1", "exd6", "e5d6"),
+    ("en passant mark", "4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1", "exd6e.p.", "e5d6"),
+    ("en passant mark and check", "8/2k5/8/3pP3/8/8/8/4K3 w - d6 0 1", "exd6e.p.+", "e5d6"),
+    ("promotion", "8/P6k/8/8/8/8/8/K7 w - - 0 1", "a8=Q", "a7a8q"),
+    ("promotion without =", "8/P6k/8/8/8/8/8/K7 w - - 0 1", "a8Q", "a7a8q"),
+    ("underpromotion", "8/P6k/8/8/8/8/8/K7 w - - 0 1", "a8=N", "a7a8n"),
+    ("promotion with capture", "1r6/P6k/8/8/8/8/8/K7 w - - 0 1", "axb8R", "a7b8r"),
+    ("castling", "4k3/8/8/8/8/8/8/R3K2R w KQ - 0 1", "O-O-O", "e1c1"),
+]
+
+# (name, FEN, SAN)
+ILLEGAL = [
+    ("capture mark on a quiet move", Game().to_fen(), "Nxf3"),
+    ("capture mark on a pawn push", Game().to_fen(), "exe4"),
+    ("capture without the mark", "4k3/8/8/3p4/4P3/8/8/4K3 w - - 0 1", "ed5"),
+    ("piece capture without the mark", "4k3/8/8/3p4/8/4N3/8/4K3 w - - 0 1", "Nd5"),
+    ("both knights can go", "K7/8/2N5/8/8/8/2N5/7k w - - 0 1", "Nd4"),
+    ("the pinned knight", "4r2k/8/8/8/8/1N6/4N3/4K3 w - - 0 1", "Ned4"),
+    ("the pinned knight by rank", "K7/8/2N5/3b4/8/8/2N5/7k w - - 0 1", "N6d4"),
+    ("en passant mark on a plain capture", "4k3/8/3n4/4P3/8/8/8/4K3 w - - 0 1", "exd6e.p."),
+    ("en passant mark on a push", "4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1", "e6e.p."),
+    ("promotion missing", "8/P6k/8/8/8/8/8/K7 w - - 0 1", "a8"),
+    ("promotion too early", "8/7k/P7/8/8/8/8/K7 w - - 0 1", "a7=Q"),
+    ("castling through check", "4k3/8/8/8/8/8/5r2/R3K2R w KQ - 0 1", "O-O"),
+]
+
+@pytest.mark.parametrize("name, fen, san, move", LEGAL, ids=[name for name, _, _, _ in LEGAL])
+def test_move_from_san(name, fen, san, move):
+    assert move_to_str(move_from_san(Game.from_fen(fen), san)) == move
+
+@pytest.mark.parametrize("name, fen, san", ILLEGAL, ids=[name for name, _, _ in ILLEGAL])
+def test_move_from_san_rejects(name, fen, san):
+    with pytest.raises(ValueError):
+        move_from_san(Game.from_fen(fen), san)
+
+def test_move_to_san_leaves_out_the_pinned_piece():
+    game = Game.from_fen("4r2k/8/8/8/8/1N6/4N3/4K3 w - - 0 1")
+    assert move_to_san(game, move_from_san(game, "Nd4")) == "Nd4"
+    game = Game.from_fen("K7/8/2N5/8/8/8/2N5/7k w - - 0 1")
+    assert move_to_san(game, move_from_san(game, "N2d4")) == "N2d4"
+
+def test_movetext_main_line():
+    movetext = "1. e4 {a comment, 1-0 (with a paren} e5 ; 0-1 and the rest of the line\n2. Nf3 (2. Nc3 (2. f4 exf4 1-0) Nc6) $1 Nc6 3. Bb5 1/2-1/2"
+    assert list(movetext_moves(movetext)) == ["e4", "e5", "Nf3", "Nc6", "Bb5"]
+    assert list(movetext_moves("1. e4 d5 2. e5 f5 3. exf6 e.p. Nxf6 *")) == ["e4", "d5", "e5", "f5", "exf6e.p.", "Nxf6"]
+
+def test_en_passant_mark_in_a_game():
+    game = PgnGame({}, "1. e4 d5 2. e5 f5 3. exf6 e.p. Nxf6 *", 1)
+    assert replay_game(0, game)["error"] is None
+    game = PgnGame({}, "1. e4 d5 2. exd5 e.p. *", 1)
+    assert "en passant" in replay_game(0, game)["error"]
+
+def test_results_in_comments_and_variations_do_not_end_the_game():
+    text = ('[Event "one"]\n\n1. e4 {ends here? 1-0} e5 ; 0-1\n2. Nf3 (2. f4 exf4\n3. Bc4 1-0\n) (2. Nc3 {0-1}\n) Nc6 1/2-1/2\n'
+            '1. d4 d5 *\n')
+    games = list(read_games(io.StringIO(text)))
+    assert [list(movetext_moves(game.movetext)) for game in games] == [["e4", "e5", "Nf3", "Nc6"], ["d4", "d5"]]
+    assert [game.line for game in games] == [1, 8]
+
+@pytest.mark.parametrize("fen", [Game().to_fen(), "r3k2r/1b4bq/8/8/8/8/7B/R3K2R b KQkq - 3 12", "4k3/8/8/8/3Pp3/8/8/4K3 b - d3 0 40"])
+def test_round_trip(fen):
+    rng = random.Random(fen)
+    game = Game.from_fen(fen)
+    game.move_cache = None
+    while len(game.move_history()) < 60 and not game.game_over:
+        game.make_move(rng.choice(game.legal_moves()))
+    text = game_to_pgn(game, {"White": 'A "quoted" name', "Black": "back\\slash"})
+    games = list(read_games(io.StringIO(text + "\n" + text)))
+    assert len(games) == 2
+    record = replay_game(0, games[0])
+    assert record["error"] is None
+    assert record["plies"] == len(game.move_history())
+    assert record["fen"] == game.to_fen()
+    assert (record["white"], record["black"]) == ('A "quoted" name', "back\\slash")
@@ -0,0 +1,78 @@
+"""The game server over a real socket: starting, joining, moving and closing games, and cleaning up after a connection"""
+import asyncio
+
+from chess.server import GameServer
+
+class Client:
+    """One connection to the server, sending a command line and reading its reply"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader, self.writer = reader, writer
+
+    async def request(self, line: str) -> str:
+        self.writer.write(line.encode() + b"\n")
+        await self.writer.drain()
+        return (await self.reader.readline()).decode().rstrip("\n")
+
+    async def quit(self):
+        self.writer.write(b"quit\n")
+        await self.writer.drain()
+        assert await self.reader.read() == b"" # the server closes its side
+        self.writer.close()
+
+async def session(test):
+    """Run test with a server listening on a free port and a function connecting clients to it"""
+    server = GameServer()
+    listener = await asyncio.start_server(server.serve_connection, "127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+    async def connect() -> Client:
+        return Client(*await asyncio.open_connection("127.0.0.1", port))
+    async with listener:
+        await test(server, connect)
+
+def test_new_join_move_close():
+    async def test(server, connect):
+        owner, guest = await connect(), await connect()
+        assert await owner.request("new") == "ok 1"
+        assert await guest.request("join 1") == "ok 1"
+        assert await guest.request("join 2") == "error no game 2"
+        assert await owner.request("move e2e4") == "ok ongoing"
+        assert await guest.request("move e2e4") == "error illegal move e2e4"
+        assert await guest.request("move e7e5") == "ok ongoing"
+        assert "e1e2" in (await owner.request("legal")).split()
+        assert await guest.request("state") == "ok 1 ongoing rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2"
+        # a guest closing only leaves the game
+        assert await guest.request("close") == "ok"
+        assert await guest.request("state") == "error no game, start one with new"
+        assert 1 in server.games
+        assert await owner.request("move g1f3") == "ok ongoing"
+        # the owner closing ends it for everyone
+        assert await guest.request("join 1") == "ok 1"
+        assert await owner.request("close") == "ok"
+        assert server.games == {}
+        assert await guest.request("move b8c6") == "error no game, start one with new"
+        assert await guest.request("join 1") == "error no game 1"
+        await owner.quit()
+        await guest.quit()
+    asyncio.run(session(test))
+
+def test_games_end_with_their_connection():
+    async def test(server, connect):
+        owner, guest = await connect(), await connect()
+        assert await owner.request("new") == "ok 1"
+        assert await owner.request("new") == "ok 2"
+        assert await guest.request("new") == "ok 3"
+        assert await guest.request("join 1") == "ok 1"
+        assert await owner.request("bogus") == "error unknown command 'bogus'"
+        await owner.quit()
+        assert sorted(server.games) == [3] # the guest's own game outlives the game it joined
+        assert await guest.request("move e2e4") == "error no game, start one with new"
+        # a connection dropped without quit cleans up as well
+        guest.writer.close()
+        await guest.writer.wait_closed()
+        for _ in range(100):
+            if not server.games:
+                break
+            await asyncio.sleep(0.01)
+        assert server.games == {}
+    asyncio.run(session(test))
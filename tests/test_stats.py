@@ -0,0 +1,101 @@
+"""Player statistics: the schema migrations, Elo ratings and the leaderboard pages"""
+import sqlite3
+
+import pytest
+
+from chess.stats import ELO_K, INITIAL_RATING, MIGRATIONS, db_leaderboard, db_setup, db_update_player, rate_game, record_results
+
+def connect(tmp_path) -> sqlite3.Connection:
+    return sqlite3.connect(str(tmp_path / "chess.db"))
+
+def test_migrate_from_version_0(tmp_path):
+    db = connect(tmp_path)
+    # the schema before it was versioned, when a name could be created twice
+    db.execute("CREATE TABLE player (id INTEGER PRIMARY KEY, name TEXT, wins INTEGER, loses INTEGER, games INTEGER)")
+    db.executemany("INSERT INTO player (name, wins, loses, games) VALUES (?, ?, ?, ?)",
+                   [("alice", 1, 0, 2), ("bob", 0, 1, 2), ("alice", 2, 1, 4), ("alice", 0, 0, 1)])
+    db.commit()
+    assert db.execute("PRAGMA user_version").fetchone()[0] == 0
+    db_setup(db)
+    assert db.execute("PRAGMA user_version").fetchone()[0] == len(MIGRATIONS) == 4
+    assert db.execute("SELECT id, name, wins, loses, games, rating FROM player ORDER BY id").fetchall() == [
+        (1, "alice", 3, 1, 7, INITIAL_RATING), (2, "bob", 0, 1, 2, INITIAL_RATING)]
+    with pytest.raises(sqlite3.IntegrityError):
+        db.execute("INSERT INTO player (name, wins, loses, games) VALUES ('bob', 0, 0, 0)")
+    assert db.execute("SELECT COUNT(*) FROM games").fetchone()[0] == db.execute("SELECT COUNT(*) FROM moves").fetchone()[0] == 0
+    # opening it again changes nothing
+    db.close()
+    db = connect(tmp_path)
+    db_setup(db)
+    assert db.execute("PRAGMA user_version").fetchone()[0] == 4
+    assert db.execute("SELECT COUNT(*) FROM player").fetchone()[0] == 2
+
+def test_migration_rates_archived_games(tmp_path):
+    db = connect(tmp_path)
+    cursor = db.cursor()
+    for number, migration in enumerate(MIGRATIONS[:3], 1):
+        migration(cursor)
+        cursor.execute(f"PRAGMA user_version = {number}")
+    cursor.executemany("INSERT INTO player (name, wins, loses, games) VALUES (?, 0, 0, 0)", [("alice",), ("bob",)])
+    cursor.executemany("INSERT INTO games (white, black, result, winner) VALUES (?, ?, ?, ?)",
+                       [("alice", "bob", "checkmate", "white"), ("bob", "alice", "unfinished", None)])
+    db.commit()
+    db_setup(db)
+    assert db.execute("PRAGMA user_version").fetchone()[0] == 4
+    # one win between equal players moves half of ELO_K, the unfinished game counts for nothing
+    assert db.execute("SELECT name, rating FROM player ORDER BY name").fetchall() == [("alice", INITIAL_RATING + 16), ("bob", INITIAL_RATING - 16)]
+
+@pytest.mark.parametrize("result, white_change", [
+    (("checkmate", "white"), ELO_K / 2),
+    (("remis", "stalemate"), 0),
+    (("checkmate", "black"), -ELO_K / 2),
+])
+def test_elo_between_equal_players(result, white_change):
+    ratings = {}
+    rate_game(ratings, "alice", "bob", result)
+    assert ratings == {"alice": INITIAL_RATING + white_change, "bob": INITIAL_RATING - white_change}
+
+@pytest.mark.parametrize("result, white_change", [
+    (("checkmate", "white"), ELO_K * (1 - 1 / (1 + 10 ** -0.5))),
+    (("remis", "stalemate"), ELO_K * (0.5 - 1 / (1 + 10 ** -0.5))),
+    (("checkmate", "black"), ELO_K * (0 - 1 / (1 + 10 ** -0.5))),
+])
+def test_elo_favourite(result, white_change):
+    ratings = {"alice": 1700.0, "bob": 1500.0} # 200 points apart, alice is expected to score about 0.76
+    rate_game(ratings, "alice", "bob", result)
+    assert ratings["alice"] == pytest.approx(1700.0 + white_change)
+    assert ratings["bob"] == pytest.approx(1500.0 - white_change)
+    assert ratings["alice"] + ratings["bob"] == pytest.approx(3200.0) # points move from one player to the other
+    assert (result[1] == "white") == (ratings["alice"] > 1700.0) # a draw costs the favourite points too
+
+def test_recorded_results(tmp_path):
+    db = connect(tmp_path)
+    db_setup(db)
+    assert record_results(db, [("alice", "bob", ("checkmate", "white")), ("alice", "bob", ("unfinished", "")),
+                               ("bob", "carol", ("remis", "stalemate"))]) == 2
+    db_update_player(db, "carol", "alice", ("checkmate", "black"))
+    db_update_player(db, "carol", "bob", ("unfinished", ""))
+    rows = {name: (wins, loses, games, rating) for name, wins, loses, games, rating in db.execute("SELECT name, wins, loses, games, rating FROM player")}
+    ratings = {}
+    for white, black, result in [("alice", "bob", ("checkmate", "white")), ("bob", "carol", ("remis", "stalemate")), ("carol", "alice", ("checkmate", "black"))]:
+        rate_game(ratings, white, black, result)
+    assert rows == {"alice": (2, 0, 2, pytest.approx(ratings["alice"])), "bob": (0, 1, 2, pytest.approx(ratings["bob"])),
+                    "carol": (0, 1, 2, pytest.approx(ratings["carol"]))}
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 5, 50])
+def test_leaderboard_pages_with_ties(tmp_path, limit):
+    db = connect(tmp_path)
+    db_setup(db)
+    ratings = [1500.0, 1600.0, 1500.0, 1500.0, 1400.0, 1600.0, 1500.0, 1400.0, 1500.0, 1700.0, 1500.0]
+    with db:
+        db.executemany("INSERT INTO player (name, wins, loses, games, rating) VALUES (?, 0, 0, 0, ?)",
+                       ((f"player {index}", rating) for index, rating in enumerate(ratings)))
+    rows, after = [], None
+    while page := db_leaderboard(db, limit, after):
+        assert len(page) <= limit
+        rows += page
+        after = page[-1][2], page[-1][0]
+    assert len(rows) == len(ratings)
+    assert len({row[0] for row in rows}) == len(ratings) # no player twice, none left out
+    assert [(row[2], row[0]) for row in rows] == sorted(((row[2], row[0]) for row in rows), reverse=True)
+    assert rows == db_leaderboard(db, len(ratings))